@@ -0,0 +1,48 @@
+// Loads the precomputed review word clouds written by
+// review-scraping/src/wordcloud_export.py (manifest.json + one compressed shard per segment).
+const WORDCLOUD_BASE_URL =
+  process.env.REACT_APP_WORDCLOUD_URL || "/wordclouds";
+
+let manifestPromise = null;
+
+const decompressJson = async (response, compression) => {
+  if (compression === "brotli") {
+    // DecompressionStream has no brotli support: the host must serve .json.br
+    // with Content-Encoding: br so the browser inflates the shard itself
+    return response.json();
+  }
+  // Static hosts serve .json.gz without Content-Encoding, so inflate here
+  const stream = response.body.pipeThrough(new DecompressionStream("gzip"));
+  return JSON.parse(await new Response(stream).text());
+};
+
+export const loadWordCloudManifest = () => {
+  if (!manifestPromise) {
+    manifestPromise = fetch(`${WORDCLOUD_BASE_URL}/manifest.json`).then(
+      (response) => {
+        if (!response.ok) {
+          manifestPromise = null;
+          throw new Error(`HTTP error! status: ${response.status}`);
+        }
+        return response.json();
+      }
+    );
+  }
+  return manifestPromise;
+};
+
+// segment: "rating/low", "app/<slug>" or "category/<group>/<slug>"
+// Returns { label, reviews, words, phrases } with {text, value} lists for <WordCloud />
+export const loadWordCloud = async (segment) => {
+  const manifest = await loadWordCloudManifest();
+  const entry = manifest.segments[segment];
+  if (!entry) {
+    throw new Error(`Unknown word cloud segment: ${segment}`);
+  }
+
+  const response = await fetch(`${WORDCLOUD_BASE_URL}/${entry.file}`);
+  if (!response.ok) {
+    throw new Error(`HTTP error! status: ${response.status}`);
+  }
+  return decompressJson(response, manifest.compression);
+};
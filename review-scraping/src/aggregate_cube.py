@@ -0,0 +1,296 @@
+"""
+Aggregate Cube
+Mention counts for every rating x app x keyword category x source combination
+"""
+
+import re
+
+import numpy as np
+import pandas as pd
+
+from negation import NegationMatcher
+
+
+AXES = ('rating', 'app', 'category', 'source')
+STARS = np.arange(1, 6)
+
+# Names of the AggregateCube.matches arrays in a saved cube
+MATCH_ARRAYS = ('match_docs', 'match_categories', 'match_hits', 'match_ratings')
+# ... and of AggregateCube.negated_hits, saved when the cube was built with backend='negation'
+NEGATED_ARRAY = 'match_negated'
+
+
+def _keyword_hits_python(reviews, keyword_lists):
+    """(doc, category, keyword hits) of every match, one review at a time"""
+    hit_docs, hit_categories, hit_counts = [], [], []
+    for doc, review in enumerate(reviews):
+        lower = review.lower() if isinstance(review, str) else ''
+        for cat_id, keywords in enumerate(keyword_lists):
+            hits = sum(keyword in lower for keyword in keywords)
+            if hits:
+                hit_docs.append(doc)
+                hit_categories.append(cat_id)
+                hit_counts.append(hits)
+    return (np.array(hit_docs, dtype=np.int64), np.array(hit_categories, dtype=np.int64),
+            np.array(hit_counts, dtype=np.int64))
+
+
+def _keyword_hits_arrow(reviews, keyword_lists, max_workers=None):
+    """
+    Same matches as _keyword_hits_python, evaluated column-wise with Arrow
+    compute kernels: the review column is lowercased once (utf8_lower), each
+    category's keywords are one match_substring_regex alternation over all
+    reviews, and per-keyword match_substring counts run on the matched rows
+    only. The kernels release the GIL, so categories run in parallel threads.
+    """
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    from concurrent.futures import ThreadPoolExecutor
+
+    lower = pc.utf8_lower(pa.array(reviews, type=pa.large_string(), from_pandas=True))
+
+    def category_hits(keywords):
+        # One regex pass finds the matching reviews; keyword hits are counted on those only
+        pattern = '|'.join(re.escape(keyword) for keyword in keywords)
+        matched = pc.match_substring_regex(lower, pattern).fill_null(False)
+        positions = np.flatnonzero(matched.to_numpy(zero_copy_only=False))
+        subset = lower.take(pa.array(positions))
+        counts = np.zeros(len(positions), dtype=np.int64)
+        for keyword in keywords:
+            counts += pc.match_substring(subset, keyword).to_numpy(zero_copy_only=False)
+        hits = np.zeros(len(lower), dtype=np.int64)
+        hits[positions] = counts
+        return hits
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        per_category = list(pool.map(category_hits, keyword_lists))
+
+    docs = [np.flatnonzero(hits) for hits in per_category]
+    hit_docs = np.concatenate(docs) if docs else np.zeros(0, dtype=np.int64)
+    hit_categories = np.repeat(np.arange(len(docs), dtype=np.int64), [len(d) for d in docs])
+    hit_counts = np.concatenate([hits[d] for hits, d in zip(per_category, docs)]) if docs else hit_docs
+    # Review-major order, as the row-by-row scan produces
+    order = np.lexsort((hit_categories, hit_docs))
+    return hit_docs[order].astype(np.int64), hit_categories[order], hit_counts[order].astype(np.int64)
+
+
+def _keyword_hits_negation(reviews, keyword_lists, window=4):
+    """
+    Matches of a NegationMatcher token scan (keywords as token prefixes) with,
+    besides the keyword hits, how many of them fell inside a negation scope.
+    """
+    matcher = NegationMatcher(dict(enumerate(keyword_lists)), window=window)
+    hit_docs, hit_categories, hit_counts, negated_counts = [], [], [], []
+    for doc, review in enumerate(reviews):
+        affirmed, negated, _ = matcher.count(review if isinstance(review, str) else '')
+        for cat_id, (a, n) in enumerate(zip(affirmed, negated)):
+            if a or n:
+                hit_docs.append(doc)
+                hit_categories.append(cat_id)
+                hit_counts.append(a + n)
+                negated_counts.append(n)
+    return (np.array(hit_docs, dtype=np.int64), np.array(hit_categories, dtype=np.int64),
+            np.array(hit_counts, dtype=np.int64), np.array(negated_counts, dtype=np.int64))
+
+
+# Keyword matching implementations for AggregateCube.build
+BACKENDS = {'python': _keyword_hits_python, 'arrow': _keyword_hits_arrow, 'negation': _keyword_hits_negation}
+
+
+class AggregateCube:
+    """
+    Dense array counts[rating, app, category, source] of reviews mentioning a
+    keyword category, plus reviews[rating, app, source] with the number of
+    reviews in each cell as the denominator.
+
+    The cube is built in one pass over the review text. Afterwards every
+    count-based question (a report section, a slice such as one app's pain
+    profile, a roll-up over sources) is indexing and summing a small array.
+    Categories are (group, category) pairs, e.g. ("pain", "bugs").
+    """
+
+    def __init__(self, counts, reviews, apps, sources, categories):
+        self.counts = counts
+        self.reviews = reviews
+        self.apps = list(apps)
+        self.sources = list(sources)
+        self.categories = [tuple(c) for c in categories]
+        self._app_index = {app: i for i, app in enumerate(self.apps)}
+        self._source_index = {source: i for i, source in enumerate(self.sources)}
+        self._category_index = {c: i for i, c in enumerate(self.categories)}
+        # (docs, category ids, keyword hits, ratings) of every match; set by build(keep_matches=True) or load()
+        self.matches = None
+        # Hits of each match inside a negation scope; set with backend='negation'
+        self.negated_hits = None
+
+    @classmethod
+    def build(cls, df, keyword_groups, keep_matches=False, backend='python'):
+        """
+        Count keyword-category mentions of a normalized review table in one pass.
+
+        A review mentions a category if any of its keywords occurs as a
+        substring of the lowercased text. With keep_matches the matched review
+        positions are kept in memory so examples can be picked without a rescan.
+        backend='arrow' evaluates the matches with multithreaded pyarrow
+        kernels instead of a Python loop over reviews (same results).
+        backend='negation' matches keywords as token prefixes with a
+        NegationMatcher and also keeps each match's negated hits, so the
+        negation-aware counts come from the same scan as the mentions.
+        """
+        apps, app_codes = np.unique(df['app_name'].astype(str).to_numpy(), return_inverse=True)
+        sources, source_codes = np.unique(df['source'].astype(str).to_numpy(), return_inverse=True)
+        rating_codes = df['rating'].to_numpy().astype(np.int64) - 1
+        categories = [(group, category) for group, cats in keyword_groups.items() for category in cats]
+        keyword_lists = [keyword_groups[group][category] for group, category in categories]
+        n_apps, n_sources, n_categories = len(apps), len(sources), len(categories)
+
+        cells = (rating_codes * n_apps + app_codes) * n_sources + source_codes
+        reviews = np.bincount(cells, minlength=5 * n_apps * n_sources).reshape(5, n_apps, n_sources)
+
+        hit_docs, hit_categories, hit_counts, *negated = BACKENDS[backend](df['review'].to_numpy(), keyword_lists)
+        flat = (((rating_codes[hit_docs] * n_apps + app_codes[hit_docs]) * n_categories + hit_categories)
+                * n_sources + source_codes[hit_docs])
+        counts = np.bincount(flat, minlength=5 * n_apps * n_categories * n_sources)
+        counts = counts.reshape(5, n_apps, n_categories, n_sources)
+
+        cube = cls(counts.astype(np.int32), reviews.astype(np.int32), apps, sources, categories)
+        if keep_matches:
+            cube.matches = (hit_docs, hit_categories, hit_counts, rating_codes[hit_docs] + 1)
+            cube.negated_hits = negated[0] if negated else None
+        return cube
+
+    # ------------------------------------------------------------------
+    # Slicing
+    # ------------------------------------------------------------------
+
+    def category_ids(self, group=None, categories=None):
+        """Category axis positions of a group, optionally restricted to some category names"""
+        return [i for i, (g, c) in enumerate(self.categories)
+                if (group is None or g == group) and (categories is None or c in categories)]
+
+    def _select(self, array, axes, ratings=None, apps=None, category_ids=None, sources=None):
+        selections = {
+            'rating': None if ratings is None else [r - 1 for r in ratings],
+            'app': None if apps is None else [self._app_index[a] for a in apps if a in self._app_index],
+            'category': category_ids,
+            'source': None if sources is None else [self._source_index[s] for s in sources
+                                                    if s in self._source_index]
+        }
+        for position, axis in enumerate(axes):
+            if selections[axis] is not None:
+                array = np.take(array, selections[axis], axis=position)
+        return array
+
+    @staticmethod
+    def _roll_up(array, axes, keep):
+        drop = tuple(i for i, axis in enumerate(axes) if axis not in keep)
+        return array.sum(axis=drop, dtype=np.int64)
+
+    def mentions(self, group=None, keep=('category',), ratings=None, apps=None,
+                 categories=None, sources=None):
+        """
+        Mention counts of a slice, summed over every axis not in keep.
+        Kept axes stay in cube order (rating, app, category, source).
+        """
+        sliced = self._select(self.counts, AXES, ratings, apps,
+                              self.category_ids(group, categories), sources)
+        return self._roll_up(sliced, AXES, keep)
+
+    def review_counts(self, keep=(), ratings=None, apps=None, sources=None):
+        """Number of reviews in a slice, summed over every axis not in keep"""
+        axes = ('rating', 'app', 'source')
+        sliced = self._select(self.reviews, axes, ratings, apps, None, sources)
+        return self._roll_up(sliced, axes, keep)
+
+    def frame(self, group, index='app', ratings=None, apps=None, sources=None, share=False):
+        """
+        Category mentions of a group as a DataFrame (rows: `index` axis, columns:
+        categories). With share=True each cell is the percentage of the row's
+        reviews in the slice that mention the category.
+        """
+        category_ids = self.category_ids(group)
+        table = self.mentions(group, keep=(index, 'category'), ratings=ratings, apps=apps, sources=sources)
+        if AXES.index(index) > AXES.index('category'):
+            table = table.T
+        labels = self._labels(index, ratings=ratings, apps=apps, sources=sources)
+        result = pd.DataFrame(table, index=labels, columns=[self.categories[i][1] for i in category_ids])
+        if share:
+            totals = self.review_counts(keep=(index,), ratings=ratings, apps=apps, sources=sources)
+            result = result.div(np.maximum(totals, 1), axis=0) * 100
+        return result
+
+    def _labels(self, axis, ratings=None, apps=None, sources=None):
+        if axis == 'rating':
+            return list(ratings) if ratings is not None else list(STARS)
+        if axis == 'app':
+            return [a for a in apps if a in self._app_index] if apps is not None else self.apps
+        return [s for s in sources if s in self._source_index] if sources is not None else self.sources
+
+    def app_rating_stats(self):
+        """Mean, count and sample standard deviation of the star rating per app"""
+        histogram = self.review_counts(keep=('rating', 'app')).T
+        n = histogram.sum(axis=1)
+        mean = (histogram * STARS).sum(axis=1) / np.maximum(n, 1)
+        variance = (histogram * (STARS - mean[:, None]) ** 2).sum(axis=1) / np.maximum(n - 1, 1)
+        return pd.DataFrame({
+            'avg_rating': mean,
+            'review_count': n,
+            'std_dev': np.where(n > 1, np.sqrt(variance), np.nan)
+        }, index=self.apps)
+
+    def top_apps(self, n=10):
+        """Apps with the most reviews"""
+        counts = self.review_counts(keep=('app',))
+        return [self.apps[i] for i in np.argsort(-counts, kind='stable')[:n]]
+
+    def matched(self, group, category, ratings=None):
+        """Review positions and keyword hit counts of one category's matches (needs build(keep_matches=True))"""
+        docs, category_ids, hits, doc_ratings = self.matches
+        mask = category_ids == self._category_index[(group, category)]
+        if ratings is not None:
+            mask &= np.isin(doc_ratings, list(ratings))
+        return docs[mask].tolist(), hits[mask].tolist()
+
+    def negation_counts(self, group):
+        """
+        Per category of a group: (category, affirmed review positions, affirmed
+        and negated review counts per star rating). A review is affirmed when at
+        least one hit lies outside a negation scope and negated when one lies
+        inside, as NegationMatcher.scan() decides. Needs build(backend='negation').
+        """
+        docs, category_ids, hits, doc_ratings = self.matches
+        affirmed = hits > self.negated_hits
+        negated = self.negated_hits > 0
+        results = []
+        for cat_id in self.category_ids(group):
+            mask = category_ids == cat_id
+            results.append((self.categories[cat_id][1], docs[mask & affirmed],
+                            np.bincount(doc_ratings[mask & affirmed] - 1, minlength=5),
+                            np.bincount(doc_ratings[mask & negated] - 1, minlength=5)))
+        return results
+
+    # ------------------------------------------------------------------
+    # Persistence
+    # ------------------------------------------------------------------
+
+    def save(self, path):
+        """Counts and labels, plus the match arrays when the cube kept them"""
+        arrays = {}
+        if self.matches is not None:
+            arrays = dict(zip(MATCH_ARRAYS, self.matches))
+            if self.negated_hits is not None:
+                arrays[NEGATED_ARRAY] = self.negated_hits
+        np.savez_compressed(path, counts=self.counts, reviews=self.reviews,
+                            apps=np.array(self.apps, dtype=str), sources=np.array(self.sources, dtype=str),
+                            categories=np.array(self.categories, dtype=str).reshape(-1, 2), **arrays)
+
+    @classmethod
+    def load(cls, path):
+        data = np.load(path)
+        cube = cls(data['counts'], data['reviews'], data['apps'].tolist(), data['sources'].tolist(),
+                   data['categories'].tolist())
+        if all(name in data for name in MATCH_ARRAYS):
+            cube.matches = tuple(data[name] for name in MATCH_ARRAYS)
+            if NEGATED_ARRAY in data:
+                cube.negated_hits = data[NEGATED_ARRAY]
+        return cube
@@ -0,0 +1,127 @@
+"""
+Annotation Export
+Streams one NDJSON record per review with its matched categories, sentiment and negation flags
+"""
+
+import os
+
+import pandas as pd
+
+from review_sources import iter_reviews
+from negation import NegationMatcher
+
+
+# Pseudo-group holding the sentiment lexicons inside the shared matcher
+SENTIMENT_GROUP = '_sentiment'
+
+
+def _open_output(path, compression):
+    """Binary output stream, zstd-compressed when requested"""
+    f = open(path, 'wb')
+    if compression == 'zstd':
+        import zstandard
+        return zstandard.ZstdCompressor(level=3).stream_writer(f, closefd=True)
+    return f
+
+
+class ReviewAnnotator:
+    """
+    Annotates reviews with one NegationMatcher scan each.
+
+    All keyword categories plus the positive / negative sentiment lexicons go
+    into a single matcher, so every review is tokenized once. A category is
+    listed when any of its keywords matches; it is also flagged as negated
+    when a match sits inside a negation scope. The sentiment score is
+    (positive - negative) / (positive + negative) over lexicon matches, where
+    a negated positive word ("not helpful") counts as negative and vice versa.
+    """
+
+    def __init__(self, keyword_groups, positive_keywords, negative_keywords):
+        flat = {f"{group}.{category}": keywords
+                for group, categories in keyword_groups.items()
+                for category, keywords in categories.items()}
+        self.labels = list(flat)
+        flat[f"{SENTIMENT_GROUP}.positive"] = positive_keywords
+        flat[f"{SENTIMENT_GROUP}.negative"] = negative_keywords
+        self.matcher = NegationMatcher(flat)
+        self.positive = len(self.labels)
+        self.negative = len(self.labels) + 1
+
+    def annotate(self, chunk):
+        """Annotation columns for a chunk of normalized review rows"""
+        labels = self.labels
+        n_categories = len(labels)
+        categories, negated, sentiment, tokens = [], [], [], []
+
+        for review in chunk['review'].to_numpy():
+            affirmed_counts, negated_counts, n_words = self.matcher.count(
+                review if isinstance(review, str) else '')
+            categories.append([labels[i] for i in range(n_categories)
+                               if affirmed_counts[i] or negated_counts[i]])
+            negated.append([labels[i] for i in range(n_categories) if negated_counts[i]])
+
+            positive = affirmed_counts[self.positive] + negated_counts[self.negative]
+            negative = affirmed_counts[self.negative] + negated_counts[self.positive]
+            sentiment.append(round((positive - negative) / (positive + negative), 3)
+                             if positive + negative else 0.0)
+            tokens.append(n_words)
+
+        return pd.DataFrame({
+            'source': chunk['source'].astype(str).to_numpy(),
+            'app': chunk['app_name'].astype(str).to_numpy(),
+            'rating': chunk['rating'].to_numpy(),
+            'categories': categories,
+            'negated': negated,
+            'sentiment': sentiment,
+            'tokens': tokens
+        })
+
+
+def annotation_chunks(paths, annotator, chunk_size=10000):
+    """Generator pipeline: review chunks -> annotation frames with global row ids"""
+    offset = 0
+    for chunk in iter_reviews(paths, chunk_size=chunk_size):
+        annotations = annotator.annotate(chunk)
+        annotations.insert(0, 'id', range(offset, offset + len(chunk)))
+        offset += len(chunk)
+        yield annotations
+
+
+def export_annotations(paths, output_path, annotator, chunk_size=10000, compression=None):
+    """
+    Write one NDJSON record per review to output_path.
+
+    Rows are read, annotated and serialized one chunk at a time (pandas'
+    C JSON writer renders a whole chunk into one buffer), so memory stays
+    constant in the corpus size. compression='zstd' (or an output path
+    ending in .zst) compresses the stream; it needs the zstandard package.
+    Returns the number of records written.
+    """
+    if compression is None and output_path.endswith('.zst'):
+        compression = 'zstd'
+
+    n_records = 0
+    tmp_path = output_path + '.tmp'
+    with _open_output(tmp_path, compression) as out:
+        for annotations in annotation_chunks(paths, annotator, chunk_size):
+            if len(annotations):
+                out.write(annotations.to_json(orient='records', lines=True,
+                                              force_ascii=False).rstrip('\n').encode('utf-8') + b'\n')
+                n_records += len(annotations)
+    os.replace(tmp_path, output_path)
+
+    print(f"🧾 Exported {n_records:,} review annotations -> {output_path}")
+    return n_records
+
+
+def main():
+    """Usage: annotation_export.py OUTPUT(.ndjson|.ndjson.zst) REVIEW_FILE..."""
+    import sys
+    from mhard_analyzer import MHARDAnalyzer
+
+    output_path, paths = sys.argv[1], sys.argv[2:]
+    MHARDAnalyzer(paths).export_annotations(output_path)
+
+
+if __name__ == "__main__":
+    main()
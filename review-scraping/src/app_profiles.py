@@ -0,0 +1,196 @@
+"""
+App Profiles
+App x term and app x category profiles, pairwise app similarity and hierarchical clusters of competitors
+"""
+
+import numpy as np
+
+from token_store import TokenStore
+from keyword_discovery import STOP_WORDS
+from segment_comparison import distinctive_terms
+
+
+class AppProfiles:
+    """
+    Per-app review profiles, aggregated from the reviews in one sparse product.
+
+    Every review is a row of [term presence | matched keyword categories]
+    (terms from a TokenStore, categories from an AggregateCube's matches); a
+    one-hot apps x reviews matrix times that gives, per app, the number of its
+    reviews using each term and mentioning each category. Only apps x
+    vocabulary counts are kept, so the profiles stay small however many
+    reviews there are.
+
+    - terms: share of an app's reviews using a term, weighted by idf across
+      apps (terms every app uses carry little) and L2-normalized
+    - categories: share of an app's reviews mentioning a category, centered
+      on the mean app so the profile says which complaints and success
+      factors are over- or under-represented, L2-normalized
+    """
+
+    def __init__(self, apps, vocab, categories, term_counts, category_counts, reviews, ratings):
+        self.apps = list(apps)
+        self.vocab = list(vocab)
+        self.categories = [tuple(c) for c in categories]
+        self.term_counts = term_counts.tocsr()
+        self.category_counts = np.asarray(category_counts, dtype=np.float64)
+        self.reviews = np.asarray(reviews)
+        self.ratings = np.asarray(ratings, dtype=np.float64)
+        self._app_index = {app: i for i, app in enumerate(self.apps)}
+        self._similarity = None
+
+    @classmethod
+    def build(cls, df, cube, min_reviews=20, min_apps=2, store=None):
+        """
+        Profiles of the apps with at least min_reviews reviews. cube must be
+        built from df with keep_matches=True; terms used by fewer than
+        min_apps apps are dropped (they cannot make two apps similar).
+        """
+        from scipy.sparse import csr_matrix, hstack
+
+        if cube.matches is None:
+            raise ValueError("AppProfiles needs a cube built with keep_matches=True")
+        store = store or TokenStore.build(df['review_cleaned'].fillna(''), normalize=True)
+        presence = store.doc_term_matrix().copy()
+        presence.data[:] = 1
+
+        docs, category_ids, _, _ = cube.matches
+        mentions = csr_matrix((np.ones(len(docs), dtype=np.int32), (docs, category_ids)),
+                              shape=(store.n_docs, len(cube.categories)))
+
+        app_codes = np.searchsorted(cube.apps, df['app_name'].astype(str).to_numpy())
+        onehot = csr_matrix((np.ones(store.n_docs, dtype=np.int32), (app_codes, np.arange(store.n_docs))),
+                            shape=(len(cube.apps), store.n_docs))
+        counts = (onehot @ hstack([presence, mentions], format='csr')).tocsc()
+
+        stats = cube.app_rating_stats()
+        reviews = stats['review_count'].to_numpy()
+        kept_apps = np.flatnonzero(reviews >= min_reviews)
+        term_counts = counts[:, :store.n_terms][kept_apps]
+        app_df = np.diff(term_counts.tocsc().indptr)
+        term_mask = np.array([len(t) >= 3 and t.isalpha() and t not in STOP_WORDS for t in store.vocab])
+        kept_terms = np.flatnonzero(term_mask & (app_df >= min_apps))
+
+        return cls([cube.apps[i] for i in kept_apps], [store.vocab[i] for i in kept_terms],
+                   cube.categories, term_counts[:, kept_terms],
+                   counts[:, store.n_terms:][kept_apps].toarray(), reviews[kept_apps],
+                   stats['avg_rating'].to_numpy()[kept_apps])
+
+    # ------------------------------------------------------------------
+    # Normalized profiles
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _l2_rows(matrix):
+        from scipy.sparse import diags, issparse
+
+        if issparse(matrix):
+            norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+            return (diags(1 / np.where(norms > 0, norms, 1)) @ matrix).tocsr()
+        norms = np.linalg.norm(matrix, axis=1)
+        return matrix / np.where(norms > 0, norms, 1)[:, None]
+
+    def term_profiles(self):
+        """Apps x terms: idf-weighted share of the app's reviews using the term, L2 rows"""
+        from scipy.sparse import diags
+
+        n_apps = len(self.apps)
+        app_df = np.diff(self.term_counts.tocsc().indptr)
+        idf = np.log((1 + n_apps) / (1 + app_df)) + 1
+        shares = diags(1 / np.maximum(self.reviews, 1)) @ self.term_counts.astype(np.float64)
+        return self._l2_rows(shares @ diags(idf))
+
+    def category_shares(self):
+        """Apps x categories: percentage of the app's reviews mentioning the category"""
+        return self.category_counts / np.maximum(self.reviews, 1)[:, None] * 100
+
+    def category_profiles(self):
+        """Category shares centered on the mean app, L2 rows"""
+        shares = self.category_shares()
+        return self._l2_rows(shares - shares.mean(axis=0))
+
+    def similarity(self, term_weight=0.5):
+        """
+        Apps x apps cosine similarity: term_weight of the term profiles'
+        cosine plus the rest from the category profiles'.
+        """
+        if self._similarity is None or self._similarity[0] != term_weight:
+            terms = self.term_profiles()
+            categories = self.category_profiles()
+            similarity = (term_weight * (terms @ terms.T).toarray()
+                          + (1 - term_weight) * (categories @ categories.T))
+            self._similarity = (term_weight, similarity)
+        return self._similarity[1]
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    def similar_apps(self, app, k=5, term_weight=0.5):
+        """The k apps most similar to one app, e.g. competitors with a complaint profile like ours"""
+        i = self._app_index[app]
+        row = self.similarity(term_weight)[i].copy()
+        row[i] = -np.inf
+        k = min(k, len(self.apps) - 1)
+        nearest = np.argpartition(-row, k - 1)[:k] if k > 0 else np.array([], dtype=np.int64)
+        nearest = nearest[np.argsort(-row[nearest], kind='stable')]
+        return [{"app": self.apps[j], "similarity": round(float(row[j]), 4)} for j in nearest]
+
+    def clusters(self, n_clusters=None, term_weight=0.5):
+        """
+        Average-linkage hierarchical clustering on cosine distance; cluster
+        label of every app. n_clusters defaults to about sqrt(apps / 2).
+        """
+        from scipy.cluster.hierarchy import linkage, fcluster
+        from scipy.spatial.distance import squareform
+
+        n_apps = len(self.apps)
+        if n_apps < 2:
+            return np.zeros(n_apps, dtype=np.int64)
+        if n_clusters is None:
+            n_clusters = max(2, int(round(np.sqrt(n_apps / 2))))
+        distance = np.clip(1 - self.similarity(term_weight), 0, None)
+        np.fill_diagonal(distance, 0)
+        tree = linkage(squareform(distance, checks=False), method='average')
+        return fcluster(tree, t=min(n_clusters, n_apps), criterion='maxclust') - 1
+
+    def summary(self, n_clusters=None, term_weight=0.5, top_terms=10, n_neighbors=3):
+        """
+        Clusters (largest first) with their apps, review-weighted mean rating,
+        distinctive terms against all other apps (weighted log-odds) and the
+        categories most over-represented relative to the mean app; plus each
+        app's nearest neighbors.
+        """
+        labels = self.clusters(n_clusters, term_weight)
+        shares = self.category_shares()
+        term_totals = np.asarray(self.term_counts.sum(axis=0)).ravel()
+        mean_shares = shares.mean(axis=0)
+
+        clusters = []
+        for label in np.argsort(-np.bincount(labels), kind='stable'):
+            members = np.flatnonzero(labels == label)
+            if len(members) == 0:
+                continue
+            counts = np.asarray(self.term_counts[members].sum(axis=0)).ravel()
+            terms = distinctive_terms(self.vocab, counts, term_totals - counts, top_n=top_terms, min_count=5)
+            lift = shares[members].mean(axis=0) - mean_shares
+            order = np.argsort(-lift, kind='stable')[:5]
+            reviews = self.reviews[members]
+            clusters.append({
+                "apps": [self.apps[i] for i in members[np.argsort(-reviews, kind='stable')]],
+                "reviews": int(reviews.sum()),
+                "avg_rating": round(float((self.ratings[members] * reviews).sum() / max(reviews.sum(), 1)), 2),
+                "distinctive_terms": [t["term"] for t in terms["a"]],
+                "overrepresented_categories": [
+                    {"group": self.categories[j][0], "category": self.categories[j][1],
+                     "share": round(float(shares[members, j].mean()), 2),
+                     "vs_average": round(float(lift[j]), 2)}
+                    for j in order if lift[j] > 0
+                ]
+            })
+
+        return {
+            "apps": len(self.apps),
+            "clusters": clusters,
+            "neighbors": {app: self.similar_apps(app, n_neighbors, term_weight) for app in self.apps}
+        }
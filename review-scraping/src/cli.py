@@ -0,0 +1,265 @@
+"""
+Review Analysis CLI
+One entry point for the review analyses: report, discover, insights, export, expand, spelling, query
+
+Only the standard library is imported at startup. pandas, scikit-learn and
+the other backends are imported inside the subcommand that needs them, so
+`--help` and cache-backed queries start without paying for them.
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import sys
+
+
+# Query names -> (cached stage, analyzer call computing it). The analyzer runs
+# with negation_aware=True like `report`, so both share the same snapshots.
+QUERY_STAGES = {
+    "overview": ("overview", lambda analyzer: analyzer.get_rating_distribution()),
+    "pain_points": ("pain_points", lambda analyzer: analyzer.analyze_pain_points()),
+    "features": ("features", lambda analyzer: analyzer.analyze_features()),
+    "mental_health": ("mental_health_negation_aware",
+                      lambda analyzer: analyzer.analyze_mental_health_impact()),
+    "pain_profile": ("profile_pain", lambda analyzer: analyzer.category_profile("pain")),
+    "pain_trends": ("trends_pain", lambda analyzer: analyzer.analyze_trends("pain")),
+    "rating_drivers": ("rating_drivers", lambda analyzer: analyzer.analyze_rating_drivers()),
+    "feature_requests": ("feature_requests", lambda analyzer: analyzer.analyze_feature_requests())
+}
+
+
+def _default_cache_dir(paths):
+    """Same location mhard_analyzer.py uses: .analysis_cache next to the first review file"""
+    return os.path.join(os.path.dirname(os.path.abspath(paths[0])), '.analysis_cache')
+
+
+def _keyword_config(args):
+    """Accepted keyword expansions: --keywords, or expanded_keywords.json next to the first review file"""
+    return args.keywords or os.path.join(os.path.dirname(os.path.abspath(args.paths[0])),
+                                         'expanded_keywords.json')
+
+
+def _analyzer(args):
+    from mhard_analyzer import MHARDAnalyzer
+
+    cache_dir = None if args.no_cache else (args.cache_dir or _default_cache_dir(args.paths))
+    return MHARDAnalyzer(args.paths, cache_dir=cache_dir, negation_aware=True,
+                         keyword_config=_keyword_config(args))
+
+
+def cmd_report(args):
+    analyzer = _analyzer(args)
+    if args.append:
+        analyzer.append(args.paths, args.append, output_path=args.output, use_intervals=True)
+    else:
+        output = args.output or os.path.splitext(args.paths[0])[0] + '_insights.json'
+        analyzer.generate_report(output_path=output, use_intervals=True)
+
+
+def cmd_discover(args):
+    from keyword_discovery import discover_keywords
+
+    output = args.output or os.path.join(os.path.dirname(os.path.abspath(args.paths[0])),
+                                         'discovered_keywords.json')
+    discover_keywords(args.paths, output)
+
+
+def cmd_insights(args):
+    import reflecta_insights_analysis as insights
+
+    insights.apply_keyword_config(_keyword_config(args))
+    output = args.output or os.path.join(insights.DATA_DIR, 'reflecta_insights.json')
+    if args.append:
+        insights.append_reviews(args.paths, args.append, output)
+    else:
+        insights.run_insights(args.paths, output, cube_path=args.cube, backend=args.backend)
+
+
+def cmd_export(args):
+    allowed = {'wordclouds': ('gzip', 'brotli'), 'annotations': ('zstd',)}[args.kind]
+    if args.compression and args.compression not in allowed:
+        sys.exit(f"{args.kind} export supports compression: {', '.join(allowed)}")
+
+    analyzer = _analyzer(args)
+    if args.kind == 'wordclouds':
+        from wordcloud_export import export_word_clouds
+        export_word_clouds(analyzer, args.output, compression=args.compression or 'gzip')
+    else:
+        analyzer.export_annotations(args.output, compression=args.compression)
+
+
+def cmd_expand(args):
+    from keyword_expansion import KeywordExpander, write_expansions
+
+    if args.analyzer == 'reflecta':
+        import reflecta_insights_analysis as insights
+        insights.apply_keyword_config(_keyword_config(args))
+        groups = insights._state_groups()
+    else:
+        from mhard_analyzer import MHARDAnalyzer
+        groups = MHARDAnalyzer(args.paths, keyword_config=_keyword_config(args))._state_groups()
+    if args.category not in groups.get(args.group, {}):
+        sys.exit(f"Unknown category {args.group}/{args.category}; choose from: "
+                 + ', '.join(f"{g}/{c}" for g, cats in groups.items() for c in cats))
+    seeds = groups[args.group][args.category]
+
+    # Corpus matrices are computed once per dataset and reused by every query
+    from result_cache import dataset_fingerprint
+    cache_dir = args.cache_dir or _default_cache_dir(args.paths)
+    os.makedirs(cache_dir, exist_ok=True)
+    matrix_path = os.path.join(cache_dir, f"expander_{dataset_fingerprint(args.paths)}.npz")
+    if os.path.exists(matrix_path):
+        expander = KeywordExpander.load(matrix_path)
+    else:
+        from review_sources import load_reviews
+        expander = KeywordExpander.build(load_reviews(args.paths)['review'].fillna(''))
+        expander.save(matrix_path)
+
+    candidates = expander.expand(seeds, top_k=args.top)
+    print(f"🔎 {args.group}/{args.category}: {len(seeds)} seeds match "
+          f"{expander.recall(seeds)['seed_reviews']:,} reviews")
+    print(f"   {'term':<20}{'score':>8}{'similar':>9}{'npmi':>8}{'+reviews':>10}{'+recall':>9}")
+    for c in candidates:
+        print(f"   {c['term']:<20}{c['score']:>8.3f}{c['similarity']:>9.3f}{c['npmi']:>8.3f}"
+              f"{c['extra_reviews']:>10,}{c['recall_gain']:>8.1f}%")
+
+    if args.accept:
+        added = write_expansions(_keyword_config(args), args.group, args.category, args.accept)
+        recall = expander.recall(seeds, args.accept)
+        print(f"\n✅ Added {', '.join(added) or 'nothing new'} -> {_keyword_config(args)} "
+              f"({recall['seed_reviews']:,} -> {recall['expanded_reviews']:,} reviews, "
+              f"+{recall['recall_gain']:.1f}%)")
+
+
+def cmd_spelling(args):
+    from keyword_expansion import write_expansions
+
+    if args.analyzer == 'reflecta':
+        import reflecta_insights_analysis as insights
+        from review_sources import load_reviews
+        from spelling import corpus_normalizer, keyword_misspellings
+
+        insights.apply_keyword_config(_keyword_config(args))
+        normalizer, vocabulary = corpus_normalizer(load_reviews(args.paths)['review'].fillna(''))
+        variants = keyword_misspellings(insights._state_groups(), normalizer, vocabulary)
+    else:
+        from mhard_analyzer import MHARDAnalyzer
+        variants = MHARDAnalyzer(args.paths, keyword_config=_keyword_config(args)).spelling_variants()
+
+    for group, categories in variants.items():
+        for category, terms in categories.items():
+            print(f"🔤 {group}/{category}: {', '.join(terms)}")
+            if args.write:
+                write_expansions(_keyword_config(args), group, category, terms)
+    if args.write:
+        print(f"\n✅ Written to {_keyword_config(args)}")
+
+
+def cmd_query(args):
+    stage, compute = QUERY_STAGES[args.stage]
+    result = None
+    if not args.no_cache:
+        from result_cache import ResultCache, dataset_fingerprint, file_digest
+
+        cache = ResultCache(args.cache_dir or _default_cache_dir(args.paths))
+        # A snapshot computed with other keyword expansions is a miss
+        result = cache.latest(dataset_fingerprint(args.paths), stage, file_digest(_keyword_config(args)))
+    if result is None:
+        # Not cached yet for this dataset and code version: compute (and cache) it.
+        # Progress goes to stderr so stdout only ever carries the JSON document
+        with contextlib.redirect_stdout(sys.stderr):
+            result = compute(_analyzer(args))
+    json.dump(result, sys.stdout, indent=2, ensure_ascii=False)
+    sys.stdout.write('\n')
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog='cli.py', description='Mental health app review analysis for Reflecta')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    def add_paths(sub):
+        sub.add_argument('paths', nargs='+', metavar='REVIEW_FILE',
+                         help='MHARD CSV or scraper.js JSON/CSV review files')
+
+    def add_keywords(sub):
+        sub.add_argument('--keywords', metavar='CONFIG',
+                         help='keyword expansions file (default: expanded_keywords.json next to the first file)')
+
+    def add_cache(sub):
+        sub.add_argument('--cache-dir', help='stage cache directory (default: .analysis_cache next to the first file)')
+        sub.add_argument('--no-cache', action='store_true', help='recompute every stage')
+
+    report = commands.add_parser('report', help='full MHARD insights report (JSON)')
+    add_paths(report)
+    add_cache(report)
+    report.add_argument('-o', '--output', help='report path (default: <first file>_insights.json)')
+    report.add_argument('--append', metavar='STATE_FILE',
+                        help='fold only new reviews into this aggregate state file')
+    add_keywords(report)
+    report.set_defaults(run=cmd_report)
+
+    discover = commands.add_parser('discover', help='discover keyword groups from the reviews')
+    add_paths(discover)
+    discover.add_argument('-o', '--output', help='keyword config path (default: discovered_keywords.json)')
+    discover.set_defaults(run=cmd_discover)
+
+    insights = commands.add_parser('insights', help='Reflecta development insights')
+    add_paths(insights)
+    insights.add_argument('-o', '--output', help='results path (default: data/reflecta_insights.json)')
+    insights.add_argument('--cube', help='also save the aggregate cube here (.npz)')
+    insights.add_argument('--backend', choices=['python', 'arrow'], default='python',
+                          help='keyword matching engine (arrow: multithreaded pyarrow kernels)')
+    insights.add_argument('--append', metavar='STATE_FILE',
+                          help='fold only new reviews into this aggregate state file')
+    add_keywords(insights)
+    insights.set_defaults(run=cmd_insights)
+
+    export = commands.add_parser('export', help='word cloud shards or per-review annotations')
+    export.add_argument('kind', choices=['wordclouds', 'annotations'])
+    export.add_argument('output', help='output directory (wordclouds) or NDJSON file (annotations)')
+    add_paths(export)
+    add_cache(export)
+    export.add_argument('--compression', choices=['gzip', 'brotli', 'zstd'])
+    add_keywords(export)
+    export.set_defaults(run=cmd_export)
+
+    expand = commands.add_parser('expand', help='propose extra keywords for a category and accept them')
+    expand.add_argument('group', help='keyword group, e.g. pain, features, success')
+    expand.add_argument('category', help='category within the group, e.g. bugs')
+    add_paths(expand)
+    add_keywords(expand)
+    expand.add_argument('--cache-dir', help='where the corpus matrices are kept')
+    expand.add_argument('--analyzer', choices=['mhard', 'reflecta'], default='mhard',
+                        help='whose keyword lists to expand')
+    expand.add_argument('--top', type=int, default=20, help='number of candidates')
+    expand.add_argument('--accept', nargs='+', metavar='TERM',
+                        help='write these candidates into the keyword config')
+    expand.set_defaults(run=cmd_expand)
+
+    spelling = commands.add_parser('spelling', help='find misspelled keyword variants in the reviews')
+    add_paths(spelling)
+    add_keywords(spelling)
+    spelling.add_argument('--analyzer', choices=['mhard', 'reflecta'], default='mhard',
+                          help='whose keyword lists to check')
+    spelling.add_argument('--write', action='store_true', help='add the variants to the keyword config')
+    spelling.set_defaults(run=cmd_spelling)
+
+    query = commands.add_parser('query', help='print one analysis stage as JSON, from the cache when possible')
+    query.add_argument('stage', choices=sorted(QUERY_STAGES))
+    add_paths(query)
+    add_cache(query)
+    add_keywords(query)
+    query.set_defaults(run=cmd_query)
+
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    args.run(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""
+Collocation Extraction
+PMI, NPMI and log-likelihood scores for bigrams and trigrams over token-id arrays
+"""
+
+import numpy as np
+
+
+def _xlogx_ratio(observed, expected):
+    """observed * ln(observed / expected), with 0 * ln(0) = 0"""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(observed > 0, observed * np.log(observed / expected), 0.0)
+
+
+def log_likelihood(k11, k12, k21, k22):
+    """Dunning's G^2 statistic for 2x2 contingency tables (vectorized)"""
+    k11, k12, k21, k22 = (np.asarray(k, dtype=np.float64) for k in (k11, k12, k21, k22))
+    n = k11 + k12 + k21 + k22
+    row1, row2 = k11 + k12, k21 + k22
+    col1, col2 = k11 + k21, k12 + k22
+    return 2 * (_xlogx_ratio(k11, row1 * col1 / n) + _xlogx_ratio(k12, row1 * col2 / n)
+                + _xlogx_ratio(k21, row2 * col1 / n) + _xlogx_ratio(k22, row2 * col2 / n))
+
+
+def _pair_starts(token_store, doc_mask, length):
+    """Token positions that start an n-gram of `length` inside one (selected) review"""
+    n_tokens = len(token_store.ids)
+    if n_tokens < length:
+        return np.zeros(0, dtype=np.int64)
+
+    doc_index = token_store.doc_index()
+    starts = np.arange(n_tokens - length + 1)
+    valid = doc_index[starts] == doc_index[starts + length - 1]
+    if doc_mask is not None:
+        valid &= np.asarray(doc_mask)[doc_index[starts]]
+    return starts[valid]
+
+
+def extract_collocations(token_store, doc_mask=None, min_count=5, edge_mask=None):
+    """
+    Score every bigram and trigram of the corpus in one vectorized pass.
+
+    doc_mask restricts counting to a subset of reviews. N-grams seen fewer
+    than min_count times are pruned before scoring, and trigrams are only
+    counted where both of their bigrams survived, so memory stays bounded.
+    edge_mask (bool per vocabulary id) drops n-grams whose first or last
+    token is not allowed, e.g. function words.
+
+    Returns {"bigrams": {...}, "trigrams": {...}} of parallel arrays:
+    ids (n x len), count, pmi, npmi, llr.
+    """
+    ids = token_store.ids.astype(np.int64)
+    n_terms = token_store.n_terms
+
+    if doc_mask is None:
+        unigram = np.bincount(ids, minlength=n_terms)
+    else:
+        token_mask = np.asarray(doc_mask)[token_store.doc_index()]
+        unigram = np.bincount(ids[token_mask], minlength=n_terms)
+    n_unigrams = max(unigram.sum(), 1)
+
+    # Bigrams: encode (a, b) as a * V + b and count unique keys
+    starts = _pair_starts(token_store, doc_mask, 2)
+    first, second = ids[starts], ids[starts + 1]
+    n_bigrams = max(len(starts), 1)
+    keys, counts = np.unique(first * n_terms + second, return_counts=True)
+    # Marginals of each token as left / right element of a bigram, for G^2
+    left = np.bincount(first, minlength=n_terms)
+    right = np.bincount(second, minlength=n_terms)
+
+    keep = counts >= min_count
+    keys, counts = keys[keep], counts[keep]
+    a, b = keys // n_terms, keys % n_terms
+
+    # All probabilities share the token total, which keeps NPMI within [-1, 1]
+    p_ab = counts / n_unigrams
+    pmi = np.log2(p_ab / ((unigram[a] / n_unigrams) * (unigram[b] / n_unigrams)))
+    npmi = pmi / -np.log2(p_ab)
+    llr = log_likelihood(counts, left[a] - counts, right[b] - counts,
+                         n_bigrams - left[a] - right[b] + counts)
+    bigrams = {"ids": np.stack([a, b], axis=1), "count": counts,
+               "pmi": pmi, "npmi": npmi, "llr": llr}
+
+    # Trigrams: only where both (a, b) and (b, c) are frequent bigrams
+    starts = _pair_starts(token_store, doc_mask, 3)
+    t1, t2, t3 = ids[starts], ids[starts + 1], ids[starts + 2]
+    n_trigrams = max(len(starts), 1)
+    prefix_rank = np.searchsorted(keys, t1 * n_terms + t2)
+    prefix_rank = np.minimum(prefix_rank, max(len(keys) - 1, 0))
+    suffix_key = t2 * n_terms + t3
+    suffix_rank = np.minimum(np.searchsorted(keys, suffix_key), max(len(keys) - 1, 0))
+    if len(keys):
+        frequent = (keys[prefix_rank] == t1 * n_terms + t2) & (keys[suffix_rank] == suffix_key)
+    else:
+        frequent = np.zeros(len(starts), dtype=bool)
+
+    # Encode as (prefix bigram rank, third token) so the key never overflows int64
+    tri_keys, tri_counts = np.unique(prefix_rank[frequent] * n_terms + t3[frequent],
+                                     return_counts=True)
+    keep = tri_counts >= min_count
+    tri_keys, tri_counts = tri_keys[keep], tri_counts[keep]
+    prefix, c = tri_keys // n_terms, tri_keys % n_terms
+    ta, tb = a[prefix], b[prefix]
+    prefix_counts = counts[prefix]
+    third = np.bincount(t3, minlength=n_terms)
+
+    p_abc = tri_counts / n_unigrams
+    tri_pmi = np.log2(p_abc / ((unigram[ta] / n_unigrams) * (unigram[tb] / n_unigrams)
+                               * (unigram[c] / n_unigrams)))
+    # Three-way PMI peaks at -2 log p(a,b,c)
+    tri_npmi = tri_pmi / (-2 * np.log2(p_abc))
+    # G^2 of the prefix bigram against the third token
+    tri_llr = log_likelihood(tri_counts, prefix_counts - tri_counts, third[c] - tri_counts,
+                             n_trigrams - prefix_counts - third[c] + tri_counts)
+    trigrams = {"ids": np.stack([ta, tb, c], axis=1), "count": tri_counts,
+                "pmi": tri_pmi, "npmi": tri_npmi, "llr": tri_llr}
+
+    if edge_mask is not None:
+        edge_mask = np.asarray(edge_mask)
+        bigrams = _filter(bigrams, edge_mask[bigrams["ids"][:, 0]] & edge_mask[bigrams["ids"][:, -1]])
+        trigrams = _filter(trigrams, edge_mask[trigrams["ids"][:, 0]] & edge_mask[trigrams["ids"][:, -1]])
+
+    return {"bigrams": bigrams, "trigrams": trigrams}
+
+
+def _filter(table, mask):
+    return {name: values[mask] for name, values in table.items()}
+
+
+def top_collocations(table, vocab, rank_by='llr', top_k=50):
+    """Top-k phrases of a bigram/trigram table as JSON-friendly dicts"""
+    order = np.argsort(-table[rank_by], kind='stable')[:top_k]
+    return [{
+        "phrase": ' '.join(vocab[i] for i in table["ids"][j]),
+        "count": int(table["count"][j]),
+        "pmi": round(float(table["pmi"][j]), 3),
+        "npmi": round(float(table["npmi"][j]), 3),
+        "llr": round(float(table["llr"][j]), 1)
+    } for j in order]
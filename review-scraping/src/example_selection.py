@@ -0,0 +1,97 @@
+"""
+Example Selection
+Picks representative review examples per category instead of the first N matches
+"""
+
+import numpy as np
+
+
+class ExampleSelector:
+    """
+    Scores matched reviews in one vectorized pass and picks diverse top-k examples.
+
+    Relevance combines keyword density (hits per sqrt(length)) with TF-IDF
+    cosine similarity to the centroid of all matched reviews; reviews outside
+    the preferred length range are down-weighted. Maximal marginal relevance
+    (MMR) then trades relevance against similarity to already-picked examples;
+    near-duplicates of a picked example are only used once nothing else is left.
+    """
+
+    def __init__(self, token_store, min_tokens=8, max_tokens=120,
+                 density_weight=0.4, diversity=0.3, pool_size=200, duplicate_threshold=0.9,
+                 idf=None):
+        self.tfidf = token_store.tfidf_matrix(idf)
+        self.lengths = token_store.doc_lengths()
+        self.min_tokens = min_tokens
+        self.max_tokens = max_tokens
+        self.density_weight = density_weight
+        self.diversity = diversity
+        self.pool_size = pool_size
+        self.duplicate_threshold = duplicate_threshold
+
+    def relevance(self, doc_ids, keyword_hits):
+        """Relevance score of each matched review (same order as doc_ids)"""
+        doc_ids = np.asarray(doc_ids, dtype=np.int64)
+        hits = np.asarray(keyword_hits, dtype=np.float64)
+        lengths = self.lengths[doc_ids].astype(np.float64)
+
+        density = hits / np.sqrt(np.maximum(lengths, 1))
+        density /= max(density.max(), 1e-9)
+
+        rows = self.tfidf[doc_ids]
+        centroid = np.asarray(rows.mean(axis=0)).ravel()
+        centroid /= max(np.linalg.norm(centroid), 1e-9)
+        similarity = rows @ centroid
+
+        score = self.density_weight * density + (1 - self.density_weight) * similarity
+        in_range = (lengths >= self.min_tokens) & (lengths <= self.max_tokens)
+        return np.where(in_range, score, score * 0.5)
+
+    def _mmr(self, doc_ids, scores, k):
+        """Greedy MMR over the highest-scoring candidates; returns positions into doc_ids"""
+        pool = np.argsort(-scores, kind='stable')[:self.pool_size]
+        if len(pool) <= 1:
+            return list(pool[:k])
+
+        rows = self.tfidf[doc_ids[pool]]
+        pairwise = (rows @ rows.T).toarray()
+        pool_scores = scores[pool]
+
+        picked = [0]
+        max_sim = pairwise[0].copy()
+        while len(picked) < min(k, len(pool)):
+            mmr = (1 - self.diversity) * pool_scores - self.diversity * max_sim
+            mmr[max_sim >= self.duplicate_threshold] -= 2.0
+            mmr[picked] = -np.inf
+            best = int(np.argmax(mmr))
+            picked.append(best)
+            np.maximum(max_sim, pairwise[best], out=max_sim)
+        return list(pool[picked])
+
+    def select(self, doc_ids, keyword_hits, k=3):
+        """Top-k representative review ids among the matched reviews"""
+        doc_ids = np.asarray(doc_ids, dtype=np.int64)
+        if len(doc_ids) == 0:
+            return []
+        scores = self.relevance(doc_ids, keyword_hits)
+        return [int(doc_ids[i]) for i in self._mmr(doc_ids, scores, k)]
+
+    def select_by_group(self, doc_ids, keyword_hits, groups, k=1):
+        """
+        Top-k examples for every group (e.g. app) of the matched reviews.
+
+        Relevance is computed once against the category-wide centroid, so each
+        group's examples are representative of the category, not just the group.
+        """
+        doc_ids = np.asarray(doc_ids, dtype=np.int64)
+        if len(doc_ids) == 0:
+            return {}
+        groups = np.asarray(groups)
+        scores = self.relevance(doc_ids, keyword_hits)
+
+        selected = {}
+        for group in np.unique(groups):
+            members = np.flatnonzero(groups == group)
+            picks = self._mmr(doc_ids[members], scores[members], k)
+            selected[group] = [int(doc_ids[members[i]]) for i in picks]
+        return selected
@@ -0,0 +1,170 @@
+"""
+Feature Request Mining
+Extracts "I wish it had ..." / "please add ..." requests from reviews and clusters them by head term
+"""
+
+import re
+from collections import Counter, defaultdict
+
+from uncertainty import wilson_interval, as_percent_interval
+
+
+# Phrases that introduce a request (mhard_analysis_plan.md 1.2, "Missing Features")
+TRIGGERS = [
+    'wish', 'would be nice', 'would be great', 'would love', 'would like', 'please add',
+    'add', 'should add', 'should have', 'needs', 'need', 'missing', 'feature request',
+    'no option', 'no way to', 'there is no', "there's no", "doesn't have", 'doesnt have',
+    'lacks', 'if only', 'hope they add', 'can you add', 'bring back'
+]
+
+# All triggers as one alternation, longest first so "would be nice" wins over shorter overlaps
+TRIGGER_PATTERN = re.compile(
+    r"\b(?:" + '|'.join(re.escape(t) for t in sorted(TRIGGERS, key=len, reverse=True)) + r")\b")
+
+WORD_PATTERN = re.compile(r"[a-z]+(?:'[a-z]+)?")
+CLAUSE_END = re.compile(r"[.!?,;:()]")
+
+# Skipped before the request starts ("wish [it had more] themes", "no option [to] edit")
+LEADING_FILLERS = {
+    'to', 'a', 'an', 'the', 'be', 'been', 'have', 'had', 'has', 'there', 'was', 'were', 'is',
+    'it', 'they', 'you', 'could', 'would', 'can', 'will', 'please', 'add', 'added', 'adding',
+    'more', 'some', 'any', 'option', 'options', 'ability', 'way', 'ways', 'for', 'of',
+    'if', 'i', 'we', 'me', 'us', 'my', 'your', 'their', 'this', 'that', 'also', 'like',
+    'see', 'get', 'maybe', 'just', 'feature', 'features', 'able', 'allow', 'let', 'which'
+}
+
+# End the request span ("cloud sync [between] devices", "themes [but] ...")
+BREAK_WORDS = {
+    'but', 'so', 'because', 'since', 'which', 'that', 'when', 'where', 'while', 'as', 'than',
+    'then', 'between', 'on', 'in', 'into', 'for', 'from', 'with', 'without', 'by', 'at', 'of',
+    'about', 'to', 'it', 'i', 'we', 'you', 'they', 'he', 'she', 'this', 'these', 'those', 'is',
+    'are', 'was', 'were', 'be', 'though', 'too', 'very', 'really', 'please', 'if', 'like'
+}
+
+# Split coordinated requests ("cloud sync and export")
+COORDINATORS = {'and', 'or', 'plus'}
+
+# Dropped from the end, so "backup option" clusters under "backup"
+GENERIC_TAILS = {'option', 'options', 'feature', 'features', 'function', 'functionality',
+                 'button', 'setting', 'settings', 'ability', 'thing', 'things', 'stuff'}
+
+
+def normalize_head(word):
+    """Crude singular form of a head word ("entries" -> "entry", "themes" -> "theme")"""
+    if len(word) > 4 and word.endswith('ies'):
+        return word[:-3] + 'y'
+    if len(word) > 3 and word.endswith('s') and not word.endswith(('ss', 'us', 'is')):
+        return word[:-1]
+    return word
+
+
+def _phrases(segment, max_words=4):
+    """Request phrases in the text between a trigger and the next trigger or clause end"""
+    words = WORD_PATTERN.findall(CLAUSE_END.split(segment, 1)[0])
+    # state: 'lead' skipping fillers, 'phrase' collecting, 'done' after a break word
+    phrases, current, state = [], [], 'lead'
+    for word in words:
+        if state == 'done':
+            break
+        if word in COORDINATORS:
+            if current:
+                phrases.append(current)
+            current, state = [], 'lead'
+        elif state == 'lead' and word in LEADING_FILLERS:
+            continue
+        elif word in BREAK_WORDS or len(current) == max_words:
+            if current:
+                phrases.append(current)
+            current, state = [], 'done'
+        else:
+            current.append(word)
+            state = 'phrase'
+    if current:
+        phrases.append(current)
+
+    result = []
+    for phrase in phrases[:2]:
+        while phrase and phrase[-1] in GENERIC_TAILS and len(phrase) > 1:
+            phrase = phrase[:-1]
+        if phrase and phrase[-1] not in GENERIC_TAILS:
+            result.append(phrase)
+    return result
+
+
+def extract_requests(text):
+    """(trigger, phrase, head) of every request in one review"""
+    lower = text.lower()
+    matches = list(TRIGGER_PATTERN.finditer(lower))
+    requests = []
+    for i, match in enumerate(matches):
+        end = matches[i + 1].start() if i + 1 < len(matches) else len(lower)
+        for phrase in _phrases(lower[match.end():end]):
+            requests.append((match.group(0), ' '.join(phrase), normalize_head(phrase[-1])))
+    return requests
+
+
+def mine_feature_requests(reviews, apps, top_n=20, top_apps=5, n_examples=2, max_chars=200,
+                          selector=None):
+    """
+    Feature requests of a review subset (e.g. the 3-star reviews), clustered
+    by normalized head term and ranked by the number of reviews asking.
+
+    One pass over the reviews: the triggers are a single compiled pattern,
+    and each hit's following span up to the next trigger or clause end is
+    cut into at most two phrases. Returns the top clusters with their
+    phrasings, triggers, apps, a Wilson interval on the share of reviews
+    asking, and representative examples picked by an ExampleSelector over
+    the reviews (selector, built from them when not given).
+    """
+    requests_by_head = defaultdict(Counter)
+    phrases = defaultdict(Counter)
+    triggers = defaultdict(Counter)
+    app_counts = defaultdict(Counter)
+
+    n_reviews = 0
+    for doc, (review, app) in enumerate(zip(reviews, apps)):
+        n_reviews += 1
+        if not isinstance(review, str):
+            continue
+        for trigger, phrase, head in extract_requests(review):
+            if doc not in requests_by_head[head]:
+                app_counts[head][str(app)] += 1
+            requests_by_head[head][doc] += 1
+            phrases[head][phrase] += 1
+            triggers[head][trigger] += 1
+
+    ranked = sorted(requests_by_head, key=lambda head: (-len(requests_by_head[head]), head))
+    top = ranked[:top_n]
+    counts = [len(requests_by_head[head]) for head in top]
+    low, high = wilson_interval(counts, n_reviews)
+
+    if top and selector is None:
+        from example_selection import ExampleSelector
+        from token_store import TokenStore
+        selector = ExampleSelector(TokenStore.build(r if isinstance(r, str) else '' for r in reviews))
+
+    def example(doc):
+        review = reviews[doc]
+        return {"app": str(apps[doc]),
+                "review": review[:max_chars] + "..." if len(review) > max_chars else review}
+
+    clusters = [{
+        "head": head,
+        "reviews": count,
+        "percentage": round(count / max(n_reviews, 1) * 100, 2),
+        "percentage_ci": as_percent_interval(lo, hi),
+        "phrases": dict(phrases[head].most_common(5)),
+        "triggers": dict(triggers[head].most_common(3)),
+        "apps": dict(app_counts[head].most_common(top_apps)),
+        "examples": [example(doc) for doc in selector.select(list(requests_by_head[head]),
+                                                              list(requests_by_head[head].values()),
+                                                              k=n_examples)]
+    } for head, count, lo, hi in zip(top, counts, low, high)]
+
+    by_app = defaultdict(list)
+    for head in ranked:
+        for app, count in app_counts[head].items():
+            by_app[app].append({"head": head, "reviews": count})
+    by_app = {app: sorted(heads, key=lambda h: -h["reviews"])[:5] for app, heads in sorted(by_app.items())}
+
+    return {"reviews_analyzed": n_reviews, "clusters": clusters, "by_app": by_app}
@@ -6,22 +6,49 @@ Keyword Discovery Tool
 import pandas as pd
 from collections import Counter
 import re
-from sklearn.feature_extraction.text import TfidfVectorizer
 import numpy as np
 
+from review_sources import load_reviews, DEFAULT_DATASET
+from token_store import TokenStore
+from segment_comparison import distinctive_terms
+from collocations import extract_collocations, top_collocations
+from aggregate_cube import AggregateCube
+
+
+# 구문 앞뒤에 와도 되는 부정어 ("not working", "never saved")
+NEGATION_WORDS = {'not', 'no', 'never', 'cant', 'dont', 'doesnt', 'didnt', 'wont', 'cannot'}
+
+# 빈도 분석에서 제외할 불용어
+STOP_WORDS = {
+    'the', 'and', 'for', 'with', 'this', 'that', 'from', 'have', 'has',
+    'was', 'were', 'are', 'app', 'one', 'can', 'but', 'not', 'get',
+    'use', 'like', 'would', 'even', 'just', 'really', 'also', 'much',
+    'make', 'very', 'still', 'more', 'its', 'been', 'had', 'will',
+    'all', 'you', 'your', 'only', 'need', 'want', 'than', 'way',
+    'could', 'when', 'there', 'what', 'which', 'their', 'they',
+    'some', 'out', 'into', 'about', 'then', 'than', 'over', 'back'
+}
+
 
 class KeywordDiscovery:
     def __init__(self, csv_path):
+        # csv_path: MHARD CSV 또는 scraper.js 결과 파일 (여러 개 가능)
         print("Loading dataset...")
-        self.df = pd.read_csv(csv_path)
+        self.df = load_reviews(csv_path)
 
         # Rating groups
+        self.df['rating_group'] = pd.Categorical(
+            np.select([self.df['rating'] <= 2, self.df['rating'] == 3], ['low', 'mid'], 'high'),
+            categories=['low', 'mid', 'high'])
         self.low_rating = self.df[self.df['rating'] <= 2]
         self.mid_rating = self.df[self.df['rating'] == 3]
         self.high_rating = self.df[self.df['rating'] >= 4]
+        self._tokens = None
 
         print(f"Loaded {len(self.df)} reviews")
         print(f"Low rating: {len(self.low_rating)}, Mid: {len(self.mid_rating)}, High: {len(self.high_rating)}")
+        for source, count in self.df['source'].value_counts().items():
+            print(f"  {source}: {count:,} reviews")
 
     def extract_frequent_words(self, rating_group, n=100):
         """
@@ -42,17 +69,7 @@ class KeywordDiscovery:
         words = re.findall(r'\b[a-z]{3,}\b', all_text.lower())
 
         # 불용어 제거
-        stop_words = {
-            'the', 'and', 'for', 'with', 'this', 'that', 'from', 'have', 'has',
-            'was', 'were', 'are', 'app', 'one', 'can', 'but', 'not', 'get',
-            'use', 'like', 'would', 'even', 'just', 'really', 'also', 'much',
-            'make', 'very', 'still', 'more', 'its', 'been', 'had', 'will',
-            'all', 'you', 'your', 'only', 'need', 'want', 'than', 'way',
-            'could', 'when', 'there', 'what', 'which', 'their', 'they',
-            'some', 'out', 'into', 'about', 'then', 'than', 'over', 'back'
-        }
-
-        word_freq = Counter([w for w in words if w not in stop_words])
+        word_freq = Counter([w for w in words if w not in STOP_WORDS])
 
         return dict(word_freq.most_common(n))
 
@@ -69,7 +86,9 @@ class KeywordDiscovery:
         documents = [low_text, mid_text, high_text]
         doc_names = ['low_rating', 'mid_rating', 'high_rating']
 
-        # TF-IDF 계산
+        # TF-IDF 계산 (scikit-learn은 이 메서드에서만 필요하므로 여기서 import)
+        from sklearn.feature_extraction.text import TfidfVectorizer
+
         vectorizer = TfidfVectorizer(
             max_features=200,
             stop_words='english',
@@ -115,33 +134,77 @@ class KeywordDiscovery:
 
         return dict(ngram_freq.most_common(top_k))
 
-    def compare_groups(self, top_n=30):
+    @property
+    def tokens(self):
+        """전체 코퍼스 토큰 저장소 (review_cleaned 기준, 한 번만 토큰화 + 축약형/오타 정규화)"""
+        if self._tokens is None:
+            self._tokens = TokenStore.build(self.df['review_cleaned'].fillna(''), normalize=True)
+        return self._tokens
+
+    def _keyword_term_mask(self):
+        # extract_frequent_words와 같은 기준: 3글자 이상, 불용어 제외
+        return np.array([len(t) >= 3 and t.isalpha() and t not in STOP_WORDS
+                         for t in self.tokens.vocab])
+
+    def extract_collocations(self, rating_group=None, top_k=50, min_count=10, rank_by='llr'):
         """
-        방법 4: 그룹 간 비교 분석
-        저평점에는 많고 고평점에는 적은 단어 찾기
+        방법 5: Collocation 분석
+        전체 bigram/trigram을 PMI, NPMI, log-likelihood로 한 번에 점수화
+        (빈도순 n-gram과 달리 "to the" 같은 기능어 조합이 상위에 오지 않음)
         """
-        low_words = self.extract_frequent_words('low', n=500)
-        high_words = self.extract_frequent_words('high', n=500)
-
-        # 저평점에서만 두드러지는 단어
-        distinctive_low = {}
-        for word, low_count in low_words.items():
-            high_count = high_words.get(word, 0)
-
-            # 저평점에서 훨씬 많이 나오는 단어
-            if low_count > 100 and (low_count / (high_count + 1)) > 2:
-                distinctive_low[word] = {
-                    'low_count': low_count,
-                    'high_count': high_count,
-                    'ratio': low_count / (high_count + 1)
-                }
+        doc_mask = None
+        if rating_group is not None:
+            doc_mask = (self.df['rating_group'] == rating_group).to_numpy()
+
+        edge_mask = self._keyword_term_mask() | np.array(
+            [t in NEGATION_WORDS for t in self.tokens.vocab])
+        tables = extract_collocations(self.tokens, doc_mask=doc_mask, min_count=min_count,
+                                      edge_mask=edge_mask)
+
+        return {
+            'bigrams': top_collocations(tables['bigrams'], self.tokens.vocab, rank_by, top_k),
+            'trigrams': top_collocations(tables['trigrams'], self.tokens.vocab, rank_by, top_k)
+        }
 
-        # 비율 순으로 정렬
-        sorted_words = dict(sorted(distinctive_low.items(),
-                                  key=lambda x: x[1]['ratio'],
-                                  reverse=True)[:top_n])
+    def compare_segments(self, column, value_a, value_b=None, top_n=30, min_count=5):
+        """
+        임의의 두 세그먼트 비교 (rating_group, app_name, source 등)
+        전체 어휘에 대해 informative Dirichlet prior를 쓴 weighted log-odds와 z-score 계산
+        value_b가 None이면 value_a를 제외한 나머지 전체와 비교
+        """
+        values = self.df[column].astype(str).to_numpy()
+        codes = np.full(len(values), -1)
+        if value_b is None:
+            codes[:] = 1
+        else:
+            codes[values == str(value_b)] = 1
+        codes[values == str(value_a)] = 0
+
+        counts = self.tokens.segment_counts(codes, n_segments=2)
+        # 전체 코퍼스 빈도를 prior로 사용
+        background = np.bincount(self.tokens.ids, minlength=self.tokens.n_terms)
 
-        return sorted_words
+        return distinctive_terms(self.tokens.vocab, counts[0], counts[1], top_n=top_n,
+                                 min_count=min_count, term_mask=self._keyword_term_mask(),
+                                 prior_counts=background)
+
+    def compare_groups(self, top_n=30):
+        """
+        방법 4: 그룹 간 비교 분석
+        저평점에는 많고 고평점에는 적은 단어 찾기 (전체 어휘 weighted log-odds)
+        """
+        result = self.compare_segments('rating_group', 'low', 'high', top_n=top_n)
+
+        # z-score 순으로 정렬된 저평점 특징 단어
+        return {
+            item['term']: {
+                'low_count': item['count_a'],
+                'high_count': item['count_b'],
+                'log_odds': item['log_odds'],
+                'z_score': item['z_score']
+            }
+            for item in result['a'] if item['z_score'] > 1.96
+        }
 
     def discover_pain_point_keywords(self):
         """
@@ -173,7 +236,14 @@ class KeywordDiscovery:
         print("\n4️⃣  Words More Common in Low vs High Ratings:")
         distinctive = self.compare_groups(top_n=20)
         for i, (word, data) in enumerate(list(distinctive.items())[:20], 1):
-            print(f"   {i:2d}. {word:20s} - Low: {data['low_count']:,}, High: {data['high_count']:,} (ratio: {data['ratio']:.1f}x)")
+            print(f"   {i:2d}. {word:20s} - Low: {data['low_count']:,}, High: {data['high_count']:,} "
+                  f"(log-odds: {data['log_odds']:.2f}, z: {data['z_score']:.1f})")
+
+        # 방법 5: Collocation
+        print("\n5️⃣  Collocations in Low Ratings (log-likelihood):")
+        collocations = self.extract_collocations('low', top_k=20)
+        for i, item in enumerate(collocations['bigrams'] + collocations['trigrams'][:10], 1):
+            print(f"   {i:2d}. '{item['phrase']}' ({item['count']:,}, NPMI: {item['npmi']:.2f}, LLR: {item['llr']:.0f})")
 
     def discover_success_factor_keywords(self):
         """
@@ -246,6 +316,23 @@ class KeywordDiscovery:
                 print(f"\n📦 {category.replace('_', ' ').title()}:")
                 print(f"   {', '.join(words[:10])}")
 
+    def category_by_source(self, keyword_groups, ratings=(1, 2)):
+        """
+        키워드 그룹의 카테고리별 소스별 언급 수와 비율 (해당 별점 구간 리뷰 대비)
+        AggregateCube 한 번 스캔 후 source 축으로 집계
+        """
+        cube = AggregateCube.build(self.df, keyword_groups)
+        reviews = cube.review_counts(keep=('source',), ratings=ratings)
+        by_source = {}
+        for group, categories in keyword_groups.items():
+            for category in categories:
+                mentions = cube.mentions(group, keep=('source',), ratings=ratings, categories=[category])
+                by_source.setdefault(group, {})[category] = {
+                    source: {'count': int(m), 'percentage': (int(m) / int(n) * 100) if n > 0 else 0}
+                    for source, m, n in zip(cube.sources, mentions, reviews)
+                }
+        return by_source
+
     def generate_keyword_config(self, output_path=None):
         """
         발견된 키워드를 설정 파일로 저장
@@ -256,8 +343,12 @@ class KeywordDiscovery:
             "sentiment_keywords": {}
         }
 
-        # Pain points (저평점에서 특징적인 단어들)
+        # Pain points (저평점에서 특징적인 단어들 + 구문)
         distinctive = self.compare_groups(top_n=100)
+        low_collocations = self.extract_collocations('low', top_k=100)
+        high_collocations = self.extract_collocations('high', top_k=100)
+        low_phrases = [item['phrase'] for item in
+                       low_collocations['bigrams'] + low_collocations['trigrams']]
 
         # 수동으로 카테고리 분류 (실제로는 클러스터링이나 LLM 사용 가능)
         pain_categories = {
@@ -268,7 +359,7 @@ class KeywordDiscovery:
             "account": []
         }
 
-        for word in distinctive.keys():
+        for word in list(distinctive.keys()) + low_phrases:
             if any(p in word for p in ['premium', 'paid', 'pay', 'subscription', 'price', 'cost']):
                 pain_categories['premium'].append(word)
             elif any(p in word for p in ['lost', 'delete', 'disappear', 'gone', 'missing', 'data']):
@@ -282,6 +373,16 @@ class KeywordDiscovery:
 
         config['pain_keywords'] = pain_categories
 
+        # 발견된 pain 카테고리가 소스별로 저평점 리뷰에 얼마나 등장하는지
+        config['by_source'] = self.category_by_source({'pain_keywords': pain_categories})
+
+        # Collocation 구문 (저평점/고평점)
+        config['phrase_keywords'] = {
+            'low': low_phrases,
+            'high': [item['phrase'] for item in
+                     high_collocations['bigrams'] + high_collocations['trigrams']]
+        }
+
         # 긍정/부정 키워드
         high_words = self.extract_frequent_words('high', n=50)
         low_words = self.extract_frequent_words('low', n=50)
@@ -303,10 +404,9 @@ class KeywordDiscovery:
         return config
 
 
-def main():
-    csv_path = '/Users/hunjunsin/Desktop/Jun/hcai/FinalProject/reflecta/review-scraping/data/MHARD_dataset.csv'
-
-    discoverer = KeywordDiscovery(csv_path)
+def discover_keywords(paths, config_path):
+    """키워드 발견 전체 흐름 실행 후 설정 파일 생성"""
+    discoverer = KeywordDiscovery(paths)
 
     # Pain point 키워드 발견
     discoverer.discover_pain_point_keywords()
@@ -318,9 +418,18 @@ def main():
     discoverer.suggest_keyword_groups()
 
     # 설정 파일 생성
-    config_path = '/Users/hunjunsin/Desktop/Jun/hcai/FinalProject/reflecta/review-scraping/data/discovered_keywords.json'
     discoverer.generate_keyword_config(config_path)
 
 
+def main():
+    """Usage: keyword_discovery.py [REVIEW_FILE...] (기본값: data/MHARD_dataset.csv)"""
+    import os
+    import sys
+
+    paths = sys.argv[1:] or [DEFAULT_DATASET]
+    config_path = os.path.join(os.path.dirname(os.path.abspath(paths[0])), 'discovered_keywords.json')
+    discover_keywords(paths, config_path)
+
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,238 @@
+"""
+Keyword Expansion
+Proposes synonyms and misspellings for seed keyword lists from corpus co-occurrence and term embeddings
+"""
+
+import json
+import os
+import tempfile
+
+import numpy as np
+
+from token_store import TokenStore
+from keyword_discovery import STOP_WORDS
+
+
+def load_keyword_config(path):
+    """{group: {category: [extra keywords]}} from a keyword config file ({} if missing)"""
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def merge_keyword_config(keyword_groups, path):
+    """
+    Append the config file's keywords to matching (group, category) lists in
+    place. Categories of other analyzers are skipped, so one file can hold the
+    expansions of both mhard_analyzer and reflecta_insights_analysis.
+    """
+    for group, categories in load_keyword_config(path).items():
+        for category, keywords in categories.items():
+            existing = keyword_groups.get(group, {}).get(category)
+            if existing is not None:
+                existing.extend(k for k in keywords if k not in existing)
+    return keyword_groups
+
+
+def write_expansions(path, group, category, keywords):
+    """Add accepted keywords to one category of a keyword config file (atomic write)"""
+    config = load_keyword_config(path)
+    current = config.setdefault(group, {}).setdefault(category, [])
+    added = [k for k in keywords if k not in current]
+    current.extend(added)
+
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        json.dump(config, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, path)
+    return added
+
+
+class KeywordExpander:
+    """
+    Term statistics computed once over the corpus so each expansion query is a
+    few sparse/dense matrix-vector products.
+
+    - presence: reviews x terms 0/1 matrix, for the reviews a keyword set
+      matches and how many more each candidate would add
+    - embeddings: unit term vectors from a truncated SVD of the positive PMI
+      of review-level co-occurrence, for "used in the same contexts" similarity
+      (synonyms, and misspellings that appear next to the same words)
+    """
+
+    def __init__(self, vocab, presence, embeddings):
+        from scipy.sparse import csc_matrix
+
+        self.vocab = list(vocab)
+        self.vocab_index = {term: i for i, term in enumerate(self.vocab)}
+        self.presence = csc_matrix(presence)
+        self.embeddings = embeddings
+        self.n_docs = self.presence.shape[0]
+        self.document_frequencies = np.diff(self.presence.indptr)
+        self.candidate_mask = np.array([len(t) >= 3 and t.isalpha() and t not in STOP_WORDS
+                                        for t in self.vocab])
+        self._word_cache = {}
+
+    @classmethod
+    def build(cls, texts, max_terms=20000, min_df=5, dim=100):
+        """
+        Tokenize reviews once and precompute the presence matrix and embeddings.
+        Embeddings cover the max_terms most frequent terms with at least min_df
+        reviews; rarer terms can still be seeds but are never proposed.
+        """
+        from scipy.sparse import csr_matrix, diags
+        from scipy.sparse.linalg import svds
+
+        store = texts if isinstance(texts, TokenStore) else TokenStore.build(texts)
+        presence = store.doc_term_matrix().copy()
+        presence.data[:] = 1
+        presence = presence.astype(np.float32)
+        n_docs = store.n_docs
+        df = np.diff(presence.tocsc().indptr)
+
+        order = np.argsort(-df, kind='stable')
+        kept = order[:max_terms][df[order[:max_terms]] >= min_df]
+        kept_presence = presence[:, kept]
+
+        # Positive PMI of review-level co-occurrence (diagonal dropped)
+        cooccurrence = (kept_presence.T @ kept_presence).tocoo()
+        off_diagonal = cooccurrence.row != cooccurrence.col
+        rows, cols = cooccurrence.row[off_diagonal], cooccurrence.col[off_diagonal]
+        kept_df = df[kept].astype(np.float64)
+        pmi = np.log(cooccurrence.data[off_diagonal] * n_docs / (kept_df[rows] * kept_df[cols]))
+        positive = pmi > 0
+        ppmi = csr_matrix((pmi[positive].astype(np.float32), (rows[positive], cols[positive])),
+                          shape=(len(kept), len(kept)))
+
+        embeddings = np.zeros((store.n_terms, dim), dtype=np.float32)
+        k = min(dim, len(kept) - 1)
+        if k > 0 and ppmi.nnz:
+            u, s, _ = svds(ppmi, k=k)
+            vectors = u * np.sqrt(s)
+            norms = np.linalg.norm(vectors, axis=1)
+            vectors = diags(1 / np.where(norms > 0, norms, 1)) @ vectors
+            embeddings[kept, :k] = vectors
+        return cls(store.vocab, presence, embeddings)
+
+    def _word_terms(self, word):
+        """Ids of vocabulary terms containing word (the analyzers' substring semantics)"""
+        if word not in self._word_cache:
+            self._word_cache[word] = [i for i, term in enumerate(self.vocab) if word in term]
+        return self._word_cache[word]
+
+    def seed_terms(self, seeds):
+        """
+        Vocabulary ids a seed list stands for: every term containing a
+        single-word seed ("crash" covers "crashes"), plus the content words of
+        multi-word seeds ("not working" -> "working").
+        """
+        terms = set()
+        for seed in seeds:
+            words = seed.lower().split()
+            if len(words) == 1:
+                terms.update(self._word_terms(words[0]))
+            else:
+                terms.update(i for i in (self.vocab_index.get(w) for w in words)
+                             if i is not None and self.candidate_mask[i])
+        return np.array(sorted(terms), dtype=np.int64)
+
+    def coverage(self, seeds):
+        """
+        Boolean mask of the reviews the seed keywords match. A multi-word
+        seed matches reviews containing all of its words.
+        """
+        covered = np.zeros(self.n_docs, dtype=bool)
+        for seed in seeds:
+            words = seed.lower().split()
+            if len(words) == 1:
+                columns = [self._word_terms(words[0])]
+            else:
+                columns = [[self.vocab_index[w]] if w in self.vocab_index else [] for w in words]
+            if all(columns):
+                matched = np.ones(self.n_docs, dtype=bool)
+                for ids in columns:
+                    matched &= np.asarray(self.presence[:, ids].sum(axis=1)).ravel() > 0
+                covered |= matched
+        return covered
+
+    def expand(self, seeds, top_k=20, min_df=5):
+        """
+        Ranked candidate keywords for a seed list.
+
+        Each candidate carries its embedding similarity to the seed centroid,
+        its review-level NPMI with the seed set, the number of reviews it
+        occurs in and the extra reviews (and relative recall gain) it would
+        add to what the seeds already match. Candidates are ranked by the mean
+        of similarity and (non-negative) NPMI.
+        """
+        seed_terms = self.seed_terms(seeds)
+        covered = self.coverage(seeds)
+        n_covered = int(covered.sum())
+        if n_covered == 0:
+            return []
+
+        df = self.document_frequencies
+        joint = self.presence.T @ covered.astype(np.float32)
+        extra = df - joint
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            p_joint = joint / self.n_docs
+            pmi = np.log(p_joint / ((df / self.n_docs) * (n_covered / self.n_docs)))
+            npmi = np.where(joint > 0, pmi / -np.log(p_joint), -1.0)
+
+        centroid = self.embeddings[seed_terms].sum(axis=0)
+        norm = np.linalg.norm(centroid)
+        similarity = self.embeddings @ (centroid / norm) if norm > 0 else np.zeros(len(self.vocab))
+
+        score = (similarity + np.clip(npmi, 0, None)) / 2
+        eligible = self.candidate_mask & (df >= min_df) & (extra > 0)
+        eligible[seed_terms] = False
+        candidates = np.flatnonzero(eligible)
+        if len(candidates) > top_k:
+            candidates = candidates[np.argpartition(-score[candidates], top_k - 1)[:top_k]]
+        candidates = candidates[np.argsort(-score[candidates], kind='stable')]
+
+        results = []
+        for i in candidates:
+            # As a keyword the candidate would also match longer words containing it
+            added = int((self.coverage([self.vocab[i]]) & ~covered).sum())
+            results.append({
+                "term": self.vocab[i],
+                "score": round(float(score[i]), 4),
+                "similarity": round(float(similarity[i]), 4),
+                "npmi": round(float(npmi[i]), 4),
+                "reviews": int(df[i]),
+                "extra_reviews": added,
+                "recall_gain": round(added / n_covered * 100, 2)
+            })
+        return results
+
+    def recall(self, seeds, accepted=()):
+        """Reviews matched by the seeds, and by seeds + accepted candidates together"""
+        base = int(self.coverage(seeds).sum())
+        expanded = int(self.coverage(list(seeds) + list(accepted)).sum())
+        return {"seed_reviews": base, "expanded_reviews": expanded,
+                "recall_gain": round((expanded - base) / max(base, 1) * 100, 2)}
+
+    # ------------------------------------------------------------------
+    # Persistence
+    # ------------------------------------------------------------------
+
+    def save(self, path):
+        presence = self.presence.tocsr()
+        np.savez_compressed(path, vocab=np.array(self.vocab, dtype=str), indptr=presence.indptr,
+                            indices=presence.indices, n_docs=self.n_docs, embeddings=self.embeddings)
+
+    @classmethod
+    def load(cls, path):
+        from scipy.sparse import csr_matrix
+
+        data = np.load(path)
+        vocab = data['vocab'].tolist()
+        indices = data['indices']
+        presence = csr_matrix((np.ones(len(indices), dtype=np.float32), indices, data['indptr']),
+                              shape=(int(data['n_docs']), len(vocab)))
+        return cls(vocab, presence, data['embeddings'])
@@ -10,18 +10,53 @@ import re
 import json
 from datetime import datetime
 
+import os
+import glob
 
-class MHARDAnalyzer:
-    def __init__(self, csv_path):
-        """Initialize analyzer with MHARD dataset"""
-        print("Loading MHARD dataset...")
-        self.df = pd.read_csv(csv_path)
-        print(f"Loaded {len(self.df)} reviews from {self.df['app_name'].nunique()} apps")
+from review_sources import load_reviews, DEFAULT_DATASET
+from result_cache import ResultCache, dataset_fingerprint, config_hash, code_version, file_digest
+from uncertainty import wilson_interval, bootstrap_share_intervals, as_percent_interval
+from token_store import TokenStore
+from example_selection import ExampleSelector
+from review_state import ReviewState
+from aggregate_cube import AggregateCube
+from trends import parse_dates, category_trends
+from keyword_expansion import merge_keyword_config
+from feature_requests import TRIGGERS, mine_feature_requests
 
-        # Define rating groups
-        self.low_rating = self.df[self.df['rating'] <= 2]
-        self.mid_rating = self.df[self.df['rating'] == 3]
-        self.high_rating = self.df[self.df['rating'] >= 4]
+
+# Words left out of the per-rating keyword lists
+KEYWORD_STOP_WORDS = {'the', 'and', 'for', 'with', 'this', 'that', 'from',
+                      'have', 'has', 'was', 'were', 'are', 'app'}
+
+
+class MHARDAnalyzer:
+    def __init__(self, csv_path, cache_dir=None, negation_aware=False, keyword_config=None):
+        """
+        Initialize analyzer with one or more review files (MHARD CSV or scraper.js output).
+
+        With cache_dir set, each analysis stage is snapshotted on disk and the
+        dataset is only loaded when some stage actually has to be recomputed.
+        With negation_aware set, mental health mentions inside a negation scope
+        ("never helped") are reported separately instead of counted as mentions.
+        keyword_config names a JSON file of extra keywords per group and category
+        (see keyword_expansion.py) appended to the built-in lists.
+        """
+        self.paths = [csv_path] if isinstance(csv_path, str) else list(csv_path)
+        self._df = None
+        self._cube = None
+        self._example_selector = None
+        self._negation_scan = {}
+        self.negation_aware = negation_aware
+        # Set by use_state(): results then come from persisted counts, not the dataset
+        self.state = None
+
+        self.cache = ResultCache(cache_dir) if cache_dir else None
+        if self.cache:
+            self.dataset_key = dataset_fingerprint(self.paths)
+            # Every analysis module next to this one: the stages import most of them
+            self.code_files = sorted(glob.glob(os.path.join(os.path.dirname(os.path.abspath(__file__)), '*.py')))
+            self.code_key = code_version(*self.code_files)
 
         # Mental health specific keywords
         self.mental_health_keywords = {
@@ -72,19 +107,236 @@ class MHARDAnalyzer:
             "disappointing", "frustrated", "annoying", "useless", "waste"
         ]
 
+        # Identifies the keyword config in the latest-stage links read by `cli.py query`
+        self.keyword_config_key = file_digest(keyword_config) if keyword_config else None
+        if keyword_config:
+            # The merged lists are part of each stage's config, so only stages
+            # reading a changed category are recomputed
+            merge_keyword_config(self._state_groups(), keyword_config)
+
+    def _load_dataset(self):
+        """Load review files and split them into rating groups"""
+        print("Loading MHARD dataset...")
+        self._df = load_reviews(self.paths)
+        print(f"Loaded {len(self._df)} reviews from {self._df['app_name'].nunique()} apps")
+        self._sources = list(self._df['source'].cat.categories)
+        if len(self._sources) > 1:
+            for source, count in self._df['source'].value_counts().items():
+                print(f"  {source}: {count:,} reviews")
+
+        self._example_selector = None
+        self._negation_scan = {}
+
+        # Define rating groups
+        self._low_rating = self._df[self._df['rating'] <= 2]
+        self._mid_rating = self._df[self._df['rating'] == 3]
+        self._high_rating = self._df[self._df['rating'] >= 4]
+
+    @property
+    def df(self):
+        if self._df is None:
+            self._load_dataset()
+        return self._df
+
+    @property
+    def sources(self):
+        self.df
+        return self._sources
+
+    @property
+    def low_rating(self):
+        self.df
+        return self._low_rating
+
+    @property
+    def mid_rating(self):
+        self.df
+        return self._mid_rating
+
+    @property
+    def high_rating(self):
+        self.df
+        return self._high_rating
+
+    @property
+    def cube(self):
+        """
+        Rating x app x category x source mention counts of all keyword groups.
+        Built in one pass over the reviews and, with a cache, persisted (with
+        its match lists) next to the stage snapshots, so later runs answer
+        count questions and pick example candidates without rescanning the text.
+        """
+        if self._cube is None:
+            path = self._cube_path()
+            if path and os.path.exists(path):
+                self._cube = AggregateCube.load(path)
+            else:
+                self._build_cube()
+        return self._cube
+
+    @property
+    def _cube_backend(self):
+        # Negation-aware runs match with NegationMatcher, so the mention counts
+        # and the affirmed/negated counts come from the same scan
+        return 'negation' if self.negation_aware else 'python'
+
+    def _cube_path(self):
+        if not self.cache:
+            return None
+        key = self._stage_key('cube', [self._state_groups(), self._cube_backend])
+        return os.path.join(self.cache.cache_dir, f"cube_{key}.npz")
+
+    def _build_cube(self):
+        self._cube = AggregateCube.build(self.df, self._state_groups(), keep_matches=True,
+                                         backend=self._cube_backend)
+        path = self._cube_path()
+        if path:
+            self._cube.save(path)
+
+    def _category_matches(self, group, category, ratings=None):
+        """Matched review positions and hit counts of a category (for example selection)"""
+        if self.cube.matches is None:
+            # Only a cube saved without match lists; rebuilding costs the same one pass
+            self._build_cube()
+        return self._cube.matched(group, category, ratings)
+
+    @property
+    def example_selector(self):
+        """ExampleSelector over the tokenized review column (built on first use)"""
+        if self._example_selector is None:
+            self._example_selector = ExampleSelector(TokenStore.build(self.df['review'].fillna('')))
+        return self._example_selector
+
+    def _format_example(self, doc, text_key="review", max_chars=200):
+        row = self.df.iloc[doc]
+        return self._example(row['app_name'], row['rating'], row['review'], text_key, max_chars)
+
+    @staticmethod
+    def _example(app, rating, review, text_key="review", max_chars=200):
+        return {
+            "app": str(app),
+            "rating": int(rating),
+            text_key: review[:max_chars] + "..." if len(str(review)) > max_chars else review
+        }
+
+    def _select_examples(self, doc_ids, keyword_hits, k, text_key="review", max_chars=200):
+        """Representative examples overall and one per app for a category's matches"""
+        selector = self.example_selector
+        apps = self.df['app_name'].to_numpy()[doc_ids] if doc_ids else []
+        examples = [self._format_example(doc, text_key, max_chars)
+                    for doc in selector.select(doc_ids, keyword_hits, k=k)]
+        examples_by_app = {
+            str(app): [self._format_example(doc, text_key, max_chars) for doc in docs]
+            for app, docs in selector.select_by_group(doc_ids, keyword_hits, apps, k=1).items()
+        }
+        return examples, examples_by_app
+
+    def _state_examples(self, group, category, buckets, k, text_key="review", max_chars=200):
+        """Representative examples overall and per app, picked from the state's reservoirs"""
+        overall, by_app = self.state.example_pool(group, category, buckets)
+        items = overall + [item for app in sorted(by_app) for item in by_app[app]]
+        if not items:
+            return [], {}
+
+        store = TokenStore.build(item['review'] for item in items)
+        selector = ExampleSelector(store, idf=self.state.idf(store.vocab))
+        hits = [item['hits'] for item in items]
+        n = len(overall)
+
+        def example(i):
+            item = items[i]
+            return self._example(item['app'], item['rating'], item['review'], text_key, max_chars)
+
+        examples = [example(i) for i in selector.select(list(range(n)), hits[:n], k=k)]
+        picks = selector.select_by_group(list(range(n, len(items))), hits[n:],
+                                         [item['app'] for item in items[n:]], k=1)
+        examples_by_app = {str(app): [example(i) for i in docs] for app, docs in picks.items()}
+        return examples, examples_by_app
+
+    def _state_groups(self):
+        return {
+            "pain": self.pain_keywords,
+            "features": self.feature_keywords,
+            "mental_health": self.mental_health_keywords
+        }
+
+    def use_state(self, state):
+        """Answer every analysis from an aggregate ReviewState instead of the review files"""
+        self.state = state
+        if self.cache:
+            self.dataset_key = state.key
+
+    def append(self, paths, state_path, output_path=None, use_intervals=False):
+        """
+        Fold new review files into the persisted aggregate state and regenerate
+        the report from it. Only rows the state has not seen yet are analyzed,
+        so the cost of an update scales with the new reviews, not the corpus.
+        Appending to a missing state file builds it from the given files.
+        """
+        state = ReviewState.open(state_path, self._state_groups(), negation=self.negation_aware)
+        n_new = state.ingest(paths)
+        print(f"Appended {n_new:,} new reviews ({state.n_reviews:,} in state)")
+        if n_new or not os.path.exists(state_path):
+            state.save(state_path)
+
+        self.use_state(state)
+        self.generate_report(output_path=output_path, use_intervals=use_intervals)
+
+    def _stage_key(self, stage, config=None):
+        """Content address of a stage: dataset, code version and the config it reads"""
+        return ResultCache.key(stage, self.dataset_key, self.code_key, config_hash(config))
+
+    def _cached(self, stage, config, compute):
+        """Run compute() through the result cache when one is configured"""
+        if not self.cache:
+            return compute()
+        key = self._stage_key(stage, config)
+        value = self.cache.get_or_compute(key, compute)
+        # Lets `cli.py query` find the snapshot without loading the analyzer
+        self.cache.link(self.dataset_key, stage, key, self.code_key, self.code_files,
+                        self.keyword_config_key)
+        return value
+
     def get_rating_distribution(self):
         """Get overall rating distribution"""
+        if self.state:
+            return self._cached("overview", None, self._state_rating_distribution)
+        return self._cached("overview", None, self._compute_rating_distribution)
+
+    def _compute_rating_distribution(self):
+        cube = self.cube
+        return self._distribution(cube.review_counts(keep=('rating',)),
+                                  dict(zip(cube.sources, cube.review_counts(keep=('source',)))))
+
+    def _state_rating_distribution(self):
+        by_source = {source: int(self.state.ratings(source).sum()) for source in self.state.sources}
+        return self._distribution(self.state.ratings(), by_source)
+
+    @staticmethod
+    def _distribution(ratings, by_source):
+        """Overview section from review counts per star rating and per source"""
+        total = int(ratings.sum())
+        by_source = {source: int(count) for source, count in by_source.items()}
         return {
-            "total_reviews": len(self.df),
-            "rating_distribution": self.df['rating'].value_counts().sort_index().to_dict(),
-            "average_rating": self.df['rating'].mean(),
-            "low_rating_count": len(self.low_rating),
-            "mid_rating_count": len(self.mid_rating),
-            "high_rating_count": len(self.high_rating)
+            "total_reviews": total,
+            "rating_distribution": {rating: int(count) for rating, count in enumerate(ratings, 1) if count},
+            "average_rating": float((ratings * np.arange(1, 6)).sum() / total) if total else 0,
+            "low_rating_count": int(ratings[:2].sum()),
+            "mid_rating_count": int(ratings[2]),
+            "high_rating_count": int(ratings[3:].sum()),
+            "source_distribution": dict(sorted(by_source.items(), key=lambda x: x[1], reverse=True))
         }
 
     def extract_keywords_by_rating(self, rating_group_name):
         """Extract most common keywords from a rating group"""
+        if self.state:
+            return self._cached(f"keywords_{rating_group_name}", None,
+                                lambda: dict(self.state.top_words(rating_group_name, 50,
+                                                                  KEYWORD_STOP_WORDS)))
+        return self._cached(f"keywords_{rating_group_name}", None,
+                            lambda: self._compute_keywords_by_rating(rating_group_name))
+
+    def _compute_keywords_by_rating(self, rating_group_name):
         if rating_group_name == "low":
             df_subset = self.low_rating
         elif rating_group_name == "mid":
@@ -102,115 +354,516 @@ class MHARDAnalyzer:
         word_freq = Counter(words)
 
         # Remove common stop words
-        stop_words = {'the', 'and', 'for', 'with', 'this', 'that', 'from',
-                     'have', 'has', 'was', 'were', 'are', 'app'}
-        word_freq = {k: v for k, v in word_freq.items() if k not in stop_words}
+        for stop_word in KEYWORD_STOP_WORDS:
+            word_freq.pop(stop_word, None)
 
         return dict(word_freq.most_common(50))
 
     def analyze_pain_points(self):
         """Analyze pain points from low-rated reviews"""
+        if self.state:
+            return self._cached("pain_points", self.pain_keywords, self._state_pain_points)
+        return self._cached("pain_points", self.pain_keywords, self._compute_pain_points)
+
+    def _compute_pain_points(self):
         results = {}
 
-        for pain_type, keywords in self.pain_keywords.items():
-            mentions = 0
-            examples = []
-
-            for _, row in self.low_rating.iterrows():
-                review = str(row['review']).lower()
-
-                for keyword in keywords:
-                    if keyword in review:
-                        mentions += 1
-                        if len(examples) < 3:
-                            examples.append({
-                                "app": row['app_name'],
-                                "rating": row['rating'],
-                                "review": row['review'][:200] + "..." if len(str(row['review'])) > 200 else row['review']
-                            })
-                        break
-
-            results[pain_type] = {
-                "mentions": mentions,
-                "percentage": (mentions / len(self.low_rating) * 100) if len(self.low_rating) > 0 else 0,
-                "examples": examples
-            }
+        cube = self.cube
+        low = (1, 2)
+        low_by_source = Counter(dict(zip(cube.sources, cube.review_counts(keep=('source',), ratings=low).tolist())))
+
+        for pain_type in self.pain_keywords:
+            counts = cube.mentions("pain", keep=('source',), ratings=low, categories=[pain_type])
+            mentions_by_source = Counter(dict(zip(cube.sources, counts.tolist())))
+
+            matched_docs, keyword_hits = self._category_matches("pain", pain_type, ratings=low)
+            examples, examples_by_app = self._select_examples(matched_docs, keyword_hits, k=3)
+            results[pain_type] = self._pain_point_entry(mentions_by_source, low_by_source, cube.sources,
+                                                        examples, examples_by_app)
+
+        return self._finish_pain_points(results, low_by_source, cube.sources)
+
+    def _state_pain_points(self):
+        sources = self.state.sources
+        low_by_source = Counter({source: int(self.state.ratings(source)[:2].sum()) for source in sources})
+
+        results = {}
+        for pain_type in self.pain_keywords:
+            mentions_by_source = Counter({
+                source: int(self.state.category_counts("pain", pain_type, source)[:2].sum())
+                for source in sources
+            })
+            examples, examples_by_app = self._state_examples("pain", pain_type, ("low",), k=3)
+            results[pain_type] = self._pain_point_entry(mentions_by_source, low_by_source, sources,
+                                                        examples, examples_by_app)
+
+        return self._finish_pain_points(results, low_by_source, sources)
+
+    @staticmethod
+    def _pain_point_entry(mentions_by_source, low_by_source, sources, examples, examples_by_app):
+        mentions = sum(mentions_by_source.values())
+        n_low = sum(low_by_source.values())
+        return {
+            "mentions": mentions,
+            "percentage": (mentions / n_low * 100) if n_low > 0 else 0,
+            "by_source": {
+                source: {
+                    "mentions": mentions_by_source[source],
+                    "percentage": (mentions_by_source[source] / low_by_source[source] * 100) if low_by_source[source] > 0 else 0
+                }
+                for source in sources
+            },
+            "examples": examples,
+            "examples_by_app": examples_by_app
+        }
+
+    def _finish_pain_points(self, results, low_by_source, sources):
+        self._add_pain_intervals(results, low_by_source, sources)
 
         # Sort by mentions
         results = dict(sorted(results.items(), key=lambda x: x[1]['mentions'], reverse=True))
         return results
 
+    def _add_pain_intervals(self, results, low_by_source, sources):
+        """Attach Wilson intervals to every pain point percentage, overall and per source"""
+        mentions = np.array([data['mentions'] for data in results.values()])
+        low, high = wilson_interval(mentions, sum(low_by_source[source] for source in sources))
+        for data, lo, hi in zip(results.values(), low, high):
+            data['percentage_ci'] = as_percent_interval(lo, hi)
+
+        for source in sources:
+            source_mentions = np.array([data['by_source'][source]['mentions'] for data in results.values()])
+            low, high = wilson_interval(source_mentions, low_by_source[source])
+            for data, lo, hi in zip(results.values(), low, high):
+                data['by_source'][source]['percentage_ci'] = as_percent_interval(lo, hi)
+
     def analyze_features(self):
         """Analyze feature mentions across different rating groups"""
+        if self.state:
+            return self._cached("features", self.feature_keywords, self._state_features)
+        return self._cached("features", self.feature_keywords, self._compute_features)
+
+    def _compute_features(self):
+        results = {}
+        cube = self.cube
+
+        for feature in self.feature_keywords:
+            # (rating, source) counts rolled up into low / mid / high per source
+            counts = cube.mentions("features", keep=('rating', 'source'), categories=[feature])
+            mentions_by_source = {
+                source: Counter(low=int(counts[:2, i].sum()), mid=int(counts[2, i]),
+                                high=int(counts[3:, i].sum()))
+                for i, source in enumerate(cube.sources)
+            }
+            results[feature] = self._feature_entry(mentions_by_source, cube.sources)
+
+        return self._finish_features(results)
+
+    def _state_features(self):
+        sources = self.state.sources
         results = {}
 
-        for feature, keywords in self.feature_keywords.items():
-            low_mentions = 0
-            mid_mentions = 0
-            high_mentions = 0
-
-            for _, row in self.df.iterrows():
-                review = str(row['review']).lower()
-
-                # Check if any keyword is mentioned
-                if any(keyword in review for keyword in keywords):
-                    rating = row['rating']
-                    if rating <= 2:
-                        low_mentions += 1
-                    elif rating == 3:
-                        mid_mentions += 1
-                    else:
-                        high_mentions += 1
-
-            total_mentions = low_mentions + mid_mentions + high_mentions
-
-            results[feature] = {
-                "total_mentions": total_mentions,
-                "low_rating_mentions": low_mentions,
-                "mid_rating_mentions": mid_mentions,
-                "high_rating_mentions": high_mentions,
-                "satisfaction_ratio": (high_mentions / total_mentions * 100) if total_mentions > 0 else 0
+        for feature in self.feature_keywords:
+            mentions_by_source = {}
+            for source in sources:
+                counts = self.state.category_counts("features", feature, source)
+                mentions_by_source[source] = Counter(low=int(counts[:2].sum()), mid=int(counts[2]),
+                                                     high=int(counts[3:].sum()))
+            results[feature] = self._feature_entry(mentions_by_source, sources)
+
+        return self._finish_features(results)
+
+    def _feature_entry(self, mentions_by_source, sources):
+        """Overall and per-source low/mid/high mention counts of one feature"""
+        low_mentions = sum(mentions_by_source[source]["low"] for source in sources)
+        mid_mentions = sum(mentions_by_source[source]["mid"] for source in sources)
+        high_mentions = sum(mentions_by_source[source]["high"] for source in sources)
+        total_mentions = low_mentions + mid_mentions + high_mentions
+
+        return {
+            "total_mentions": total_mentions,
+            "low_rating_mentions": low_mentions,
+            "mid_rating_mentions": mid_mentions,
+            "high_rating_mentions": high_mentions,
+            "satisfaction_ratio": (high_mentions / total_mentions * 100) if total_mentions > 0 else 0,
+            "by_source": {
+                source: self._source_feature_stats(mentions_by_source[source])
+                for source in sources
             }
+        }
+
+    def _finish_features(self, results):
+        self._add_feature_intervals(results)
 
         # Sort by total mentions
         results = dict(sorted(results.items(), key=lambda x: x[1]['total_mentions'], reverse=True))
         return results
 
+    def _add_feature_intervals(self, results, n_resamples=10000):
+        """Attach bootstrap intervals to every feature satisfaction ratio"""
+        counts = np.array([[data['low_rating_mentions'], data['mid_rating_mentions'],
+                            data['high_rating_mentions']] for data in results.values()])
+        low, high = bootstrap_share_intervals(counts, numerator=[2], n_resamples=n_resamples)
+        for data, lo, hi in zip(results.values(), low, high):
+            data['satisfaction_ci'] = as_percent_interval(lo, hi)
+
+    def _source_feature_stats(self, group_counts):
+        """Summarize low/mid/high mention counts of a feature within one source"""
+        total = sum(group_counts.values())
+        low, high = wilson_interval(group_counts["high"], total)
+        return {
+            "total_mentions": total,
+            "low_rating_mentions": group_counts["low"],
+            "mid_rating_mentions": group_counts["mid"],
+            "high_rating_mentions": group_counts["high"],
+            "satisfaction_ratio": (group_counts["high"] / total * 100) if total > 0 else 0,
+            "satisfaction_ci": as_percent_interval(low, high)
+        }
+
     def analyze_mental_health_impact(self):
         """Analyze mental health related mentions"""
+        if self.state:
+            stage = "mental_health_negation_aware" if self.negation_aware else "mental_health"
+            return self._cached(stage, self.mental_health_keywords, self._state_mental_health_impact)
+        if self.negation_aware:
+            return self._cached("mental_health_negation_aware", self.mental_health_keywords,
+                                self._compute_mental_health_impact_negation_aware)
+        return self._cached("mental_health", self.mental_health_keywords,
+                            self._compute_mental_health_impact)
+
+    def _keyword_group(self, group):
+        return {
+            "mental_health": self.mental_health_keywords,
+            "features": self.feature_keywords,
+            "pain": self.pain_keywords
+        }[group]
+
+    def _scan_negation(self, group):
+        """
+        Per-category rating counts and affirmed review ids of one keyword group.
+
+        Read from the cube's match arrays: negation-aware runs build the cube
+        with NegationMatcher, so every section's mentions, affirmed and negated
+        counts come from one scan over the reviews.
+        """
+        if group not in self._negation_scan:
+            scan = self._compute_negation_scan(group)
+            self._negation_scan[group] = scan
+        return self._negation_scan[group]
+
+    def _compute_negation_scan(self, group):
+        if self.cube.matches is None or self._cube.negated_hits is None:
+            # A cube built without the negation scan; rebuilding it is the one pass
+            self._build_cube()
+        categories, affirmed_by_rating, negated_by_rating, affirmed_docs = [], [], [], []
+        for category, docs, affirmed, negated in self._cube.negation_counts(group):
+            categories.append(category)
+            affirmed_by_rating.append(Counter({str(r): int(c) for r, c in enumerate(affirmed, 1)}))
+            negated_by_rating.append(Counter({str(r): int(c) for r, c in enumerate(negated, 1)}))
+            affirmed_docs.append(docs.tolist())
+        return categories, affirmed_by_rating, negated_by_rating, affirmed_docs
+
+    def analyze_negation(self, group="mental_health"):
+        """
+        Affirmed vs negated mention counts per category and rating for a keyword
+        group ("mental_health", "features" or "pain"), e.g. "really helped" vs
+        "never helped" for the improvement category.
+        """
+        keywords = self._keyword_group(group)
+        if self.state:
+            return self._cached(f"negation_{group}", keywords, lambda: self._state_negation(group))
+        return self._cached(f"negation_{group}", keywords,
+                            lambda: self._compute_negation(group))
+
+    def _require_negation_state(self):
+        if not self.state.negation:
+            raise ValueError("Review state was built without negation scanning; "
+                             "rebuild it with negation_aware=True")
+
+    def _state_negation(self, group):
+        self._require_negation_state()
         results = {}
+        for category in self._keyword_group(group):
+            affirmed = self.state.category_counts(group, category, table='affirmed')
+            negated = self.state.category_counts(group, category, table='negated')
+            total = int(affirmed.sum() + negated.sum())
+            results[category] = {
+                "affirmed_mentions": int(affirmed.sum()),
+                "negated_mentions": int(negated.sum()),
+                "negated_share": (int(negated.sum()) / total * 100) if total > 0 else 0,
+                "affirmed_by_rating": {str(r): int(c) for r, c in enumerate(affirmed, 1)},
+                "negated_by_rating": {str(r): int(c) for r, c in enumerate(negated, 1)}
+            }
+        return self._add_negation_intervals(results)
+
+    @staticmethod
+    def _add_negation_intervals(results):
+        """Attach a Wilson interval to every category's negated share of its mentions"""
+        negated = np.array([data['negated_mentions'] for data in results.values()])
+        totals = np.array([data['affirmed_mentions'] + data['negated_mentions'] for data in results.values()])
+        low, high = wilson_interval(negated, totals)
+        for data, lo, hi in zip(results.values(), low, high):
+            data['negated_share_ci'] = as_percent_interval(lo, hi)
+        return results
 
-        for category, keywords in self.mental_health_keywords.items():
-            mentions_by_rating = {"1": 0, "2": 0, "3": 0, "4": 0, "5": 0}
-            examples = []
+    def _state_mental_health_impact(self):
+        if self.negation_aware:
+            self._require_negation_state()
+        table = 'affirmed' if self.negation_aware else 'mentions'
 
-            for _, row in self.df.iterrows():
-                review = str(row['review']).lower()
+        results = {}
+        for category in self.mental_health_keywords:
+            by_rating = self.state.category_counts("mental_health", category, table=table)
+            examples, examples_by_app = self._state_examples("mental_health", category,
+                                                             ("low", "mid", "high"), k=5,
+                                                             text_key="snippet", max_chars=150)
+            results[category] = {
+                "total_mentions": int(by_rating.sum()),
+                "by_rating": {str(r): int(c) for r, c in enumerate(by_rating, 1)},
+                "by_source": {
+                    source: int(self.state.category_counts("mental_health", category, source, table).sum())
+                    for source in self.state.sources
+                }
+            }
+            if self.negation_aware:
+                negated = self.state.category_counts("mental_health", category, table='negated')
+                results[category]["negated_mentions"] = int(negated.sum())
+                results[category]["negated_by_rating"] = {str(r): int(c) for r, c in enumerate(negated, 1)}
+            results[category]["examples"] = examples
+            results[category]["examples_by_app"] = examples_by_app
+        return results
 
-                if any(keyword in review for keyword in keywords):
-                    rating_str = str(int(row['rating']))
-                    mentions_by_rating[rating_str] = mentions_by_rating.get(rating_str, 0) + 1
+    def _compute_negation(self, group):
+        categories, affirmed_by_rating, negated_by_rating, _ = self._scan_negation(group)
+        results = {}
+        for cat_id, category in enumerate(categories):
+            affirmed = sum(affirmed_by_rating[cat_id].values())
+            negated = sum(negated_by_rating[cat_id].values())
+            results[category] = {
+                "affirmed_mentions": affirmed,
+                "negated_mentions": negated,
+                "negated_share": (negated / (affirmed + negated) * 100) if affirmed + negated > 0 else 0,
+                "affirmed_by_rating": {r: affirmed_by_rating[cat_id][r] for r in "12345"},
+                "negated_by_rating": {r: negated_by_rating[cat_id][r] for r in "12345"}
+            }
+        return self._add_negation_intervals(results)
 
-                    if len(examples) < 5:
-                        examples.append({
-                            "app": row['app_name'],
-                            "rating": row['rating'],
-                            "snippet": row['review'][:150] + "..." if len(str(row['review'])) > 150 else row['review']
-                        })
+    def _compute_mental_health_impact_negation_aware(self):
+        categories, affirmed_by_rating, negated_by_rating, affirmed_docs = \
+            self._scan_negation("mental_health")
+        sources = self.df['source'].to_numpy()
 
+        results = {}
+        for cat_id, category in enumerate(categories):
+            docs = affirmed_docs[cat_id]
+            examples, examples_by_app = self._select_examples(docs, [1] * len(docs), k=5,
+                                                              text_key="snippet", max_chars=150)
+            mentions_by_source = Counter(sources[docs]) if docs else Counter()
             results[category] = {
-                "total_mentions": sum(mentions_by_rating.values()),
-                "by_rating": mentions_by_rating,
-                "examples": examples
+                "total_mentions": len(docs),
+                "by_rating": {r: affirmed_by_rating[cat_id][r] for r in "12345"},
+                "by_source": {source: mentions_by_source[source] for source in self.sources},
+                "negated_mentions": sum(negated_by_rating[cat_id].values()),
+                "negated_by_rating": {r: negated_by_rating[cat_id][r] for r in "12345"},
+                "examples": examples,
+                "examples_by_app": examples_by_app
+            }
+        return results
+
+    def _compute_mental_health_impact(self):
+        results = {}
+        cube = self.cube
+
+        for category in self.mental_health_keywords:
+            by_rating = cube.mentions("mental_health", keep=('rating',), categories=[category])
+            by_source = cube.mentions("mental_health", keep=('source',), categories=[category])
+
+            matched_docs, keyword_hits = self._category_matches("mental_health", category)
+            examples, examples_by_app = self._select_examples(matched_docs, keyword_hits, k=5,
+                                                              text_key="snippet", max_chars=150)
+
+            results[category] = {
+                "total_mentions": int(by_rating.sum()),
+                "by_rating": {str(r): int(c) for r, c in enumerate(by_rating, 1)},
+                "by_source": {source: int(c) for source, c in zip(cube.sources, by_source)},
+                "examples": examples,
+                "examples_by_app": examples_by_app
             }
 
         return results
 
+    def category_profile(self, group="pain", top_n=10, ratings=(1, 2)):
+        """
+        Percentage of each top app's reviews (within the given star ratings) that
+        mention each category of a keyword group, e.g. the pain profile of the 10
+        most reviewed apps, with Wilson intervals. Answered from the cube without
+        touching review text.
+        """
+        return self._cached(f"profile_{group}", [self._keyword_group(group), top_n, list(ratings)],
+                            lambda: self._compute_category_profile(group, top_n, ratings))
+
+    def _compute_category_profile(self, group, top_n, ratings):
+        cube = self.cube
+        apps = cube.top_apps(top_n)
+        shares = cube.frame(group, index='app', ratings=ratings, apps=apps, share=True).round(2)
+        mentions = cube.mentions(group, keep=('app', 'category'), ratings=ratings, apps=apps)
+        reviews = cube.review_counts(keep=('app',), ratings=ratings, apps=apps)
+        low, high = wilson_interval(mentions, reviews[:, None])
+        return {
+            app: {
+                "reviews": int(n),
+                "shares": shares.loc[app].to_dict(),
+                "shares_ci": {category: as_percent_interval(lo, hi)
+                              for category, lo, hi in zip(shares.columns, low[i], high[i])}
+            }
+            for i, (app, n) in enumerate(zip(apps, reviews))
+        }
+
+    def analyze_trends(self, group="pain", freq="M", window=3, top_n=10):
+        """
+        Monthly ('M') or weekly ('W') share of each top app's reviews that
+        mention each category of a keyword group, with rolling shares over
+        `window` buckets and the change points where a share jumped or dropped.
+        """
+        config = [self._keyword_group(group), freq, window, top_n]
+        return self._cached(f"trends_{group}", config,
+                            lambda: self._compute_trends(group, freq, window, top_n))
+
+    def _compute_trends(self, group, freq, window, top_n):
+        dates = parse_dates(self.df['date'])
+        if dates.isna().all():
+            # scraper.js dates are relative ("2 weeks ago") and undated MHARD files have none
+            return {"freq": freq, "window": window, "periods": [], "apps": {}}
+
+        cube = self.cube
+        if cube.matches is None:
+            self._build_cube()
+            cube = self._cube
+        docs, category_ids, _, _ = cube.matches
+        wanted = np.array(cube.category_ids(group))
+        keep = np.isin(category_ids, wanted)
+        categories = [cube.categories[i][1] for i in wanted]
+
+        apps = pd.Categorical(self.df['app_name'].astype(str), categories=cube.apps)
+        trends = category_trends(dates, apps.codes, len(cube.apps),
+                                 docs[keep], np.searchsorted(wanted, category_ids[keep]),
+                                 len(categories), freq=freq, window=window)
+
+        def series(values):
+            return [None if np.isnan(v) else round(float(v) * 100, 2) for v in values]
+
+        results = {"freq": freq, "window": window, "periods": trends["periods"], "apps": {}}
+        for app in cube.top_apps(top_n):
+            i = cube.apps.index(app)
+            results["apps"][app] = {
+                "reviews": trends["reviews"][i].tolist(),
+                "share": {c: series(trends["share"][i, :, j]) for j, c in enumerate(categories)},
+                "rolling_share": {c: series(trends["rolling_share"][i, :, j])
+                                  for j, c in enumerate(categories)},
+                "change_points": [
+                    dict(point, category=categories[point["category"]], app=app,
+                         share_before=round(point["share_before"] * 100, 2),
+                         share_after=round(point["share_after"] * 100, 2),
+                         z_score=round(point["z_score"], 2))
+                    for point in trends["change_points"] if point["app"] == i
+                ]
+            }
+        return results
+
+    def analyze_rating_drivers(self, top_n=10, epochs=2, chunk_size=10000):
+        """
+        Terms and keyword categories with the largest positive and negative
+        effect on the star rating, overall and per app, from a hashed linear
+        model trained chunk by chunk on the review files (bounded memory).
+        """
+        config = [self._state_groups(), top_n, epochs]
+        return self._cached("rating_drivers", config,
+                            lambda: self._compute_rating_drivers(top_n, epochs, chunk_size))
+
+    def _compute_rating_drivers(self, top_n, epochs, chunk_size):
+        from rating_drivers import RatingDriverModel
+
+        model = RatingDriverModel(self._state_groups())
+        model.fit(self.paths, epochs=epochs, chunk_size=chunk_size)
+        return model.effects(top_n=top_n)
+
+    def analyze_feature_requests(self, top_n=20):
+        """
+        Missing features asked for in 3-star reviews ("I wish it had more
+        themes", "please add cloud sync"), clustered by head term and ranked by
+        the number of reviews asking, overall and per app.
+        """
+        if self.state:
+            raise ValueError("Feature requests need the review text; not available from a state file")
+        return self._cached("feature_requests", [TRIGGERS, top_n],
+                            lambda: mine_feature_requests(self.mid_rating['review'].to_numpy(),
+                                                          self.mid_rating['app_name'].astype(str).to_numpy(),
+                                                          top_n=top_n))
+
+    def spelling_variants(self):
+        """
+        Misspellings of the keywords that occur in the reviews ("subscripton",
+        "notifcation"), per group and category, found with a corpus spelling
+        normalizer. Write them to the keyword config to have them matched.
+        """
+        from spelling import corpus_normalizer, keyword_misspellings
+
+        normalizer, vocabulary = corpus_normalizer(self.df['review'].fillna(''))
+        return keyword_misspellings(self._state_groups(), normalizer, vocabulary)
+
+    def export_annotations(self, output_path, chunk_size=10000, compression=None):
+        """
+        Stream per-review annotations (matched categories, sentiment, negation
+        flags, token count) of the review files to NDJSON, chunk by chunk,
+        without loading the whole dataset.
+        """
+        from annotation_export import ReviewAnnotator, export_annotations
+
+        annotator = ReviewAnnotator(self._state_groups(), self.positive_keywords, self.negative_keywords)
+        return export_annotations(self.paths, output_path, annotator,
+                                  chunk_size=chunk_size, compression=compression)
+
+    def build_similarity_index(self, index_dir):
+        """
+        Build the similar-review index, or open an existing one whose rows are
+        still the first reviews of this dataset (appending any new reviews);
+        an index built from other data is rebuilt.
+        """
+        from similar_reviews import SimilarReviewIndex, META_FILE, texts_digest
+
+        texts = self.df['review'].fillna('').astype(str).tolist()
+        index = None
+        if os.path.exists(os.path.join(index_dir, META_FILE)):
+            index = SimilarReviewIndex(index_dir)
+            n = len(index)
+            if n > len(texts) or index.meta.get('digest') != texts_digest(texts[:n]):
+                index = None
+            elif n < len(texts):
+                # New reviews arrived since the index was built
+                index.add(texts[n:], digest=texts_digest(texts))
+        if index is None:
+            index = SimilarReviewIndex.build(texts, index_dir)
+        self.similarity_index = index
+        return index
+
+    def find_similar_reviews(self, query, k=50, nprobe=8):
+        """
+        Reviews most similar to a complaint, given as a review row number or free text.
+        Requires build_similarity_index() first.
+        """
+        if isinstance(query, str):
+            matches = self.similarity_index.search_text(query, k=k, nprobe=nprobe)
+        else:
+            matches = self.similarity_index.more_like_this(query, k=k, nprobe=nprobe)
+        return [dict(self._format_example(doc), row=doc, similarity=round(score, 4))
+                for doc, score in matches]
+
     def extract_top_insights(self, n=10):
         """Extract top insights for each rating category"""
         insights = {
             "critical_issues": [],  # From 1-2 star
             "improvement_areas": [],  # From 3 star
+            "feature_requests": [],  # From 3 star
             "success_factors": []  # From 4-5 star
         }
 
@@ -232,6 +885,17 @@ class MHARDAnalyzer:
                 "mentions": count
             })
 
+        # Requests phrased in mid ratings ("wish", "please add", "no option")
+        if not self.state:
+            for cluster in self.analyze_feature_requests()["clusters"][:n]:
+                insights["feature_requests"].append({
+                    "request": cluster["head"],
+                    "reviews": cluster["reviews"],
+                    "percentage": cluster["percentage"],
+                    "phrases": list(cluster["phrases"])[:3],
+                    "example": cluster["examples"][0] if cluster["examples"] else None
+                })
+
         # Analyze high ratings for success factors
         high_keywords = self.extract_keywords_by_rating("high")
         for word, count in list(high_keywords.items())[:n]:
@@ -242,11 +906,23 @@ class MHARDAnalyzer:
 
         return insights
 
-    def generate_reflecta_recommendations(self):
-        """Generate specific recommendations for Reflecta based on analysis"""
+    def generate_reflecta_recommendations(self, use_intervals=False):
+        """
+        Generate specific recommendations for Reflecta based on analysis.
+
+        With use_intervals=True the thresholds are applied to confidence bounds
+        instead of point estimates: a feature is must-have only if even the lower
+        bound of its satisfaction ratio clears 70%, and so on. Features near a
+        threshold then stop flipping between runs and datasets.
+        """
         pain_points = self.analyze_pain_points()
         features = self.analyze_features()
 
+        def bounds(data, value_key, ci_key):
+            if use_intervals:
+                return data[ci_key]
+            return data[value_key], data[value_key]
+
         recommendations = {
             "must_have_features": [],
             "must_avoid_problems": [],
@@ -255,24 +931,30 @@ class MHARDAnalyzer:
 
         # Must-have features (high satisfaction ratio and mentions)
         for feature, data in features.items():
-            if data['satisfaction_ratio'] > 70 and data['total_mentions'] > 100:
+            low, _ = bounds(data, 'satisfaction_ratio', 'satisfaction_ci')
+            if low > 70 and data['total_mentions'] > 100:
+                ci_low, ci_high = data['satisfaction_ci']
                 recommendations["must_have_features"].append({
                     "feature": feature,
-                    "reason": f"{data['satisfaction_ratio']:.1f}% satisfaction ratio with {data['total_mentions']} mentions"
+                    "reason": f"{data['satisfaction_ratio']:.1f}% satisfaction ratio "
+                              f"(95% CI {ci_low:.1f}-{ci_high:.1f}%) with {data['total_mentions']} mentions"
                 })
 
         # Must-avoid problems (high pain point mentions)
         for pain_type, data in pain_points.items():
-            if data['percentage'] > 10:
+            low, _ = bounds(data, 'percentage', 'percentage_ci')
+            if low > 10:
+                ci_low, ci_high = data['percentage_ci']
                 recommendations["must_avoid_problems"].append({
                     "problem": pain_type,
-                    "severity": f"{data['percentage']:.1f}% of negative reviews",
+                    "severity": f"{data['percentage']:.1f}% of negative reviews (95% CI {ci_low:.1f}-{ci_high:.1f}%)",
                     "action": self._get_mitigation_strategy(pain_type)
                 })
 
         # Differentiation opportunities (mentioned but low satisfaction)
         for feature, data in features.items():
-            if 30 < data['satisfaction_ratio'] < 60 and data['total_mentions'] > 50:
+            low, high = bounds(data, 'satisfaction_ratio', 'satisfaction_ci')
+            if 30 < low and high < 60 and data['total_mentions'] > 50:
                 recommendations["differentiation_opportunities"].append({
                     "feature": feature,
                     "current_gap": f"Only {data['satisfaction_ratio']:.1f}% satisfaction",
@@ -293,7 +975,7 @@ class MHARDAnalyzer:
         }
         return strategies.get(pain_type, "Address this issue in design")
 
-    def generate_report(self, output_path=None):
+    def generate_report(self, output_path=None, use_intervals=False):
         """Generate comprehensive analysis report"""
         print("\n" + "="*80)
         print("MHARD DATASET ANALYSIS - REFLECTA INSIGHTS")
@@ -311,11 +993,12 @@ class MHARDAnalyzer:
             print(f"  {rating}★: {bar} {count:,} ({percentage:.1f}%)")
 
         # Pain Points
-        print(f"\n🚨 CRITICAL PAIN POINTS (from {len(self.low_rating):,} low-rated reviews)")
+        print(f"\n🚨 CRITICAL PAIN POINTS (from {dist['low_rating_count']:,} low-rated reviews)")
         pain_points = self.analyze_pain_points()
         for i, (pain_type, data) in enumerate(list(pain_points.items())[:5], 1):
             print(f"\n{i}. {pain_type.replace('_', ' ').title()}")
-            print(f"   Mentions: {data['mentions']} ({data['percentage']:.1f}%)")
+            print(f"   Mentions: {data['mentions']} ({data['percentage']:.1f}%, "
+                  f"95% CI {data['percentage_ci'][0]:.1f}-{data['percentage_ci'][1]:.1f}%)")
             if data['examples']:
                 print(f"   Example: \"{data['examples'][0]['review'][:100]}...\"")
 
@@ -328,19 +1011,22 @@ class MHARDAnalyzer:
                                 reverse=True)
         for i, (feature, data) in enumerate(list(sorted_features)[:5], 1):
             print(f"{i}. {feature.replace('_', ' ').title()}")
-            print(f"   Satisfaction: {data['satisfaction_ratio']:.1f}% ({data['total_mentions']} mentions)")
+            print(f"   Satisfaction: {data['satisfaction_ratio']:.1f}% "
+                  f"[{data['satisfaction_ci'][0]:.1f}-{data['satisfaction_ci'][1]:.1f}%] ({data['total_mentions']} mentions)")
 
         # Mental Health Impact
         print(f"\n💚 MENTAL HEALTH CONTEXT")
         mh_analysis = self.analyze_mental_health_impact()
         for category, data in mh_analysis.items():
             print(f"\n{category.replace('_', ' ').title()}: {data['total_mentions']} mentions")
+            if 'negated_mentions' in data:
+                print(f"   Negated (e.g. \"never helped\"): {data['negated_mentions']} mentions")
             if data['examples']:
                 print(f"   Example: \"{data['examples'][0]['snippet']}\"")
 
         # Recommendations
         print(f"\n🎯 RECOMMENDATIONS FOR REFLECTA")
-        recs = self.generate_reflecta_recommendations()
+        recs = self.generate_reflecta_recommendations(use_intervals=use_intervals)
 
         print("\n✅ Must-Have Features:")
         for i, rec in enumerate(recs['must_have_features'][:5], 1):
@@ -361,6 +1047,11 @@ class MHARDAnalyzer:
 
         # Save to JSON if output path provided
         if output_path:
+            report_key = self._report_key(use_intervals)
+            if report_key and self._report_is_current(output_path, report_key):
+                print(f"\n📄 Report unchanged, keeping: {output_path}")
+                return
+
             full_report = {
                 "generated_at": datetime.now().isoformat(),
                 "overview": dist,
@@ -369,27 +1060,63 @@ class MHARDAnalyzer:
                 "mental_health_analysis": mh_analysis,
                 "recommendations": recs
             }
+            if not self.state:
+                full_report["pain_profile_by_app"] = self.category_profile("pain")
+                full_report["pain_trends"] = self.analyze_trends("pain")
+                full_report["feature_requests"] = self.analyze_feature_requests()
+            if self.negation_aware:
+                full_report["negation"] = {
+                    "mental_health": self.analyze_negation("mental_health"),
+                    "features": self.analyze_negation("features")
+                }
+            if report_key:
+                full_report["cache_key"] = report_key
 
             with open(output_path, 'w') as f:
                 json.dump(full_report, f, indent=2)
 
             print(f"\n📄 Full report saved to: {output_path}")
 
+    def _report_key(self, use_intervals):
+        """Content address of the full report, or None when caching is off"""
+        if not self.cache:
+            return None
+        return self._stage_key("report", [self.pain_keywords, self.feature_keywords,
+                                          self.mental_health_keywords, use_intervals,
+                                          self.negation_aware])
+
+    @staticmethod
+    def _report_is_current(output_path, report_key):
+        """Whether output_path already holds the report for report_key"""
+        try:
+            with open(output_path) as f:
+                return json.load(f).get("cache_key") == report_key
+        except (FileNotFoundError, json.JSONDecodeError):
+            return False
+
 
 def main():
-    """Main execution"""
+    """Main execution (see also `cli.py report`)"""
     import sys
 
-    csv_path = '/Users/hunjunsin/Desktop/Jun/hcai/FinalProject/reflecta/review-scraping/data/MHARD_dataset.csv'
+    # Incremental update: mhard_analyzer.py --append STATE_FILE NEW_FILE...
+    if len(sys.argv) > 2 and sys.argv[1] == '--append':
+        state_path, paths = sys.argv[2], sys.argv[3:]
+        analyzer = MHARDAnalyzer(paths, negation_aware=True)
+        output_json = re.sub(r'(\.json)?(\.gz)?$', '', state_path) + '_insights.json'
+        analyzer.append(paths, state_path, output_path=output_json, use_intervals=True)
+        return
 
-    if len(sys.argv) > 1:
-        csv_path = sys.argv[1]
+    # Extra arguments may add scraper.js review files (JSON/CSV) to the analysis
+    paths = sys.argv[1:] if len(sys.argv) > 1 else [DEFAULT_DATASET]
+    csv_path = paths[0]
 
-    analyzer = MHARDAnalyzer(csv_path)
+    cache_dir = os.path.join(os.path.dirname(os.path.abspath(csv_path)), '.analysis_cache')
+    analyzer = MHARDAnalyzer(paths, cache_dir=cache_dir, negation_aware=True)
 
     # Generate report
     output_json = csv_path.replace('.csv', '_insights.json')
-    analyzer.generate_report(output_path=output_json)
+    analyzer.generate_report(output_path=output_json, use_intervals=True)
 
 
 if __name__ == "__main__":
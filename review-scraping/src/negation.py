@@ -0,0 +1,100 @@
+"""
+Negation-Aware Keyword Matching
+Marks negation scopes during the same token scan that matches keywords
+"""
+
+import re
+
+
+# Tokens that open a negation scope ("never helped", "doesn't work")
+NEGATION_CUES = {
+    'not', 'no', 'never', 'nothing', 'none', 'nobody', 'nowhere', 'neither', 'nor',
+    'without', 'hardly', 'barely', 'cannot',
+    "can't", "don't", "doesn't", "didn't", "won't", "isn't", "wasn't", "aren't",
+    "weren't", "couldn't", "wouldn't", "shouldn't", "haven't", "hasn't", "hadn't",
+    'cant', 'dont', 'doesnt', 'didnt', 'wont', 'isnt', 'wasnt', 'arent',
+    'couldnt', 'wouldnt', 'shouldnt', 'havent', 'hasnt'
+}
+
+# Tokens that close a scope early ("not great but it helped")
+SCOPE_BREAKERS = {'but', 'however', 'although', 'though', 'yet', 'except'}
+
+# Words and clause punctuation, scanned left to right
+SCAN_PATTERN = re.compile(r"[a-z]+(?:'[a-z]+)?|[.!?,;:]")
+
+PUNCTUATION = set('.!?,;:')
+
+
+class NegationMatcher:
+    """
+    Keyword matcher that also tracks negation scope.
+
+    A scope opens at a negation cue and covers the next `window` words, or
+    less if punctuation or a contrastive conjunction comes first. Keywords are
+    matched as token prefixes ("crash" matches "crashed"), multi-word keywords
+    token by token. scan() returns, per category, whether the review mentions
+    it affirmatively and/or inside a negation scope.
+    """
+
+    def __init__(self, categories, window=4):
+        self.categories = list(categories)
+        self.window = window
+        self._phrases = []
+        for cat_id, keywords in enumerate(categories.values()):
+            for keyword in keywords:
+                self._phrases.append((tuple(keyword.lower().split()), cat_id))
+        # Phrases whose first word prefixes a given token, memoized per unique token
+        self._candidates = {}
+
+    def _phrases_for(self, token):
+        found = self._candidates.get(token)
+        if found is None:
+            found = [(words, cat_id) for words, cat_id in self._phrases
+                     if token.startswith(words[0])]
+            self._candidates[token] = found
+        return found
+
+    def _matches(self, tokens):
+        """Yield (category id, inside a negation scope) for every keyword match"""
+        scope_left = 0
+
+        for i, token in enumerate(tokens):
+            if token in PUNCTUATION or token in SCOPE_BREAKERS:
+                scope_left = 0
+                continue
+
+            # Phrases are matched before a cue opens its scope, so a keyword that
+            # starts with a cue ("not working") is not negated by its own cue
+            for words, cat_id in self._phrases_for(token):
+                if len(words) == 1 or all(
+                        i + j < len(tokens) and tokens[i + j].startswith(w)
+                        for j, w in enumerate(words[1:], 1)):
+                    yield cat_id, scope_left > 0
+
+            if token in NEGATION_CUES:
+                scope_left = self.window
+            elif scope_left > 0:
+                scope_left -= 1
+
+    def scan(self, text):
+        """Return (affirmed, negated) sets of category ids mentioned in text"""
+        affirmed, negated = set(), set()
+        for cat_id, in_scope in self._matches(SCAN_PATTERN.findall(str(text).lower())):
+            (negated if in_scope else affirmed).add(cat_id)
+        return affirmed, negated
+
+    def count(self, text):
+        """
+        Return (affirmed, negated, n_words): per-category lists of match counts
+        outside / inside negation scopes and the number of word tokens.
+        """
+        tokens = SCAN_PATTERN.findall(str(text).lower())
+        affirmed = [0] * len(self.categories)
+        negated = [0] * len(self.categories)
+        for cat_id, in_scope in self._matches(tokens):
+            if in_scope:
+                negated[cat_id] += 1
+            else:
+                affirmed[cat_id] += 1
+        n_words = sum(token not in PUNCTUATION for token in tokens)
+        return affirmed, negated, n_words
@@ -0,0 +1,170 @@
+"""
+Rating Drivers
+Out-of-core linear model of star ratings on review terms and keyword categories, per app
+"""
+
+import re
+from collections import Counter
+
+import numpy as np
+
+from review_sources import iter_reviews
+from aggregate_cube import AggregateCube
+from keyword_discovery import STOP_WORDS
+
+
+# Hash space of the model: 2^20 weights (8 MB) however large the corpus and vocabulary
+N_FEATURES = 2 ** 20
+
+TERM_PATTERN = re.compile(r"\b[a-z]{3,}\b")
+
+# Term names kept for reporting (the most frequent ones; weights cover every term via hashing)
+MAX_TERMS = 50000
+
+# Feature name prefixes
+CATEGORY_PREFIX = 'cat='
+APP_SEPARATOR = '|'
+
+
+class RatingDriverModel:
+    """
+    Linear regression of the star rating on binary review features, trained
+    with SGD partial_fit one chunk at a time so memory does not grow with
+    the corpus.
+
+    Every review contributes its terms and matched keyword categories
+    ("cat=pain.bugs"), each both as a global feature and crossed with the app
+    ("calm|crash"). All features are hashed into N_FEATURES weights, so an
+    app's effect of a term is the global weight plus its app weight: the
+    change in stars when the term is present, holding the other features
+    fixed. Per-app document frequencies of the hashed base features are
+    accumulated alongside (as a sparse apps x hash matrix) to report only
+    terms an app's reviews actually use. Term names are only needed to label
+    the report: a counter of them is pruned to the max_terms most frequent
+    after every chunk, so it stays bounded like the rest of the model.
+    """
+
+    def __init__(self, keyword_groups, n_features=N_FEATURES, alpha=1e-5, seed=0, max_terms=MAX_TERMS):
+        from sklearn.feature_extraction import FeatureHasher
+        from sklearn.linear_model import SGDRegressor
+
+        self.keyword_groups = keyword_groups
+        self.categories = [f"{group}.{category}" for group, cats in keyword_groups.items() for category in cats]
+        self.n_features = n_features
+        self.hasher = FeatureHasher(n_features=n_features, input_type='string', alternate_sign=False)
+        # Averaged SGD is robust to the app-sorted order of the review files
+        self.model = SGDRegressor(alpha=alpha, learning_rate='adaptive', eta0=0.01,
+                                  average=True, random_state=seed)
+        self.offset = None
+        self.rng = np.random.default_rng(seed)
+        self.apps = {}
+        self.max_terms = max_terms
+        self.term_counts = Counter()
+        self._app_df = None
+        self.n_reviews = 0
+
+    def _features(self, chunk):
+        """Base features per review, and the same features crossed with the review's app"""
+        cube = AggregateCube.build(chunk, self.keyword_groups, keep_matches=True)
+        docs, category_ids, _, _ = cube.matches
+        matched = [[] for _ in range(len(chunk))]
+        for doc, category_id in zip(docs, category_ids):
+            matched[doc].append(CATEGORY_PREFIX + self.categories[category_id])
+
+        base, crossed = [], []
+        for review, app, categories in zip(chunk['review_cleaned'].fillna('').to_numpy(),
+                                           chunk['app_name'].astype(str).to_numpy(), matched):
+            features = set(TERM_PATTERN.findall(review)) - STOP_WORDS
+            features.update(categories)
+            base.append(features)
+            crossed.append([app + APP_SEPARATOR + f for f in features])
+        return base, crossed
+
+    def partial_fit(self, chunk, track=True):
+        """One SGD pass over a chunk of normalized review rows (shuffled within the chunk)"""
+        if len(chunk) == 0:
+            return
+        chunk = chunk.iloc[self.rng.permutation(len(chunk))].reset_index(drop=True)
+        base, crossed = self._features(chunk)
+        X_base = self.hasher.transform(base)
+        X = X_base + self.hasher.transform(crossed)
+        ratings = chunk['rating'].to_numpy(dtype=np.float64)
+        if self.offset is None:
+            # Center on the first chunk's mean so term weights don't soak up the baseline
+            self.offset = float(ratings.mean())
+        self.model.partial_fit(X, ratings - self.offset)
+
+        if track:
+            self._track(chunk['app_name'].astype(str).to_numpy(), base, X_base)
+            self.n_reviews += len(chunk)
+
+    def _track(self, apps, base, X_base):
+        """Accumulate the most frequent term names and per-app document frequencies of base features"""
+        from scipy.sparse import csr_matrix
+
+        for features in base:
+            self.term_counts.update(f for f in features if not f.startswith(CATEGORY_PREFIX))
+        if len(self.term_counts) > self.max_terms:
+            self.term_counts = Counter(dict(self.term_counts.most_common(self.max_terms)))
+        codes = np.array([self.apps.setdefault(app, len(self.apps)) for app in apps])
+        onehot = csr_matrix((np.ones(len(codes)), (codes, np.arange(len(codes)))),
+                            shape=(len(self.apps), len(codes)))
+        counts = (onehot @ X_base).tocsr()
+        if self._app_df is None:
+            self._app_df = counts
+        else:
+            self._app_df.resize((len(self.apps), self.n_features))
+            self._app_df = (self._app_df + counts).tocsr()
+
+    def fit(self, paths, epochs=2, chunk_size=10000):
+        """Stream the review files `epochs` times; counts are gathered on the first pass"""
+        for epoch in range(epochs):
+            for chunk in iter_reviews(paths, chunk_size=chunk_size):
+                self.partial_fit(chunk, track=epoch == 0)
+        return self
+
+    def _hash(self, names):
+        return self.hasher.transform([[name] for name in names]).indices
+
+    def effects(self, top_n=10, min_reviews=20):
+        """
+        Terms and categories with the largest positive and negative effects on
+        the rating, overall and per app (features an app uses in at least
+        min_reviews reviews).
+        """
+        weights = self.model.coef_
+        app_df = self._app_df.tocsr()
+        overall_df = np.asarray(app_df.sum(axis=0)).ravel()
+        names = sorted(self.term_counts) + [CATEGORY_PREFIX + category for category in self.categories]
+        hashes = self._hash(names)
+        frequent = overall_df[hashes] >= min_reviews
+        names = [name for name, keep in zip(names, frequent) if keep]
+        hashes = hashes[frequent]
+        is_category = np.array([name.startswith(CATEGORY_PREFIX) for name in names], dtype=bool)
+
+        def ranked(effect, reviews, mask):
+            keep = np.flatnonzero(mask & (reviews >= min_reviews))
+            order = keep[np.argsort(-effect[keep], kind='stable')]
+            entry = lambda i: {"feature": names[i].removeprefix(CATEGORY_PREFIX),
+                               "effect": round(float(effect[i]), 3), "reviews": int(reviews[i])}
+            return {
+                "positive": [entry(i) for i in order[:top_n] if effect[i] > 0],
+                "negative": [entry(i) for i in order[::-1][:top_n] if effect[i] < 0]
+            }
+
+        def summary(effect, reviews):
+            return {"terms": ranked(effect, reviews, ~is_category),
+                    "categories": ranked(effect, reviews, is_category)}
+
+        global_effect = weights[hashes]
+        results = {
+            "reviews": self.n_reviews,
+            "intercept": round(float(self.model.intercept_[0]) + self.offset, 3),
+            "overall": summary(global_effect, overall_df[hashes]),
+            "by_app": {}
+        }
+        for app, code in sorted(self.apps.items()):
+            app_effect = global_effect + weights[self._hash(app + APP_SEPARATOR + name for name in names)]
+            reviews = app_df[code].toarray().ravel()[hashes]
+            results["by_app"][app] = summary(app_effect, reviews)
+        return results
@@ -11,6 +11,8 @@ Mental health app review 분석을 통한 실질적인 개발 인사이트 추
 5. 실행 가능한 권장사항
 """
 
+import os
+import sys
 import pandas as pd
 import numpy as np
 import re
@@ -18,14 +20,102 @@ from collections import Counter, defaultdict
 import json
 from datetime import datetime
 
+from review_sources import load_reviews, DATA_DIR, DEFAULT_DATASET
+from token_store import TokenStore
+from example_selection import ExampleSelector
+from review_state import ReviewState
+from aggregate_cube import AggregateCube
+from keyword_expansion import merge_keyword_config
+from app_profiles import AppProfiles
+
+# ============================================================================
+# 키워드 카테고리
+# ============================================================================
+
+# 주요 불만 카테고리
+PAIN_CATEGORIES = {
+    '💰 Monetization Issues (수익화 문제)': [
+        'subscription', 'pay', 'paid', 'money', 'free', 'trial',
+        'charge', 'expensive', 'cost', 'price', 'cancel', 'refund'
+    ],
+    '🐛 Technical Issues (기술적 문제)': [
+        'crash', 'bug', 'broken', 'error', 'glitch', 'freeze',
+        'lag', 'slow', 'load', 'work', 'fix'
+    ],
+    '🔐 Account/Access Issues (계정/접근 문제)': [
+        'login', 'account', 'password', 'sign', 'access', 'unlock',
+        'lock', 'restore', 'sync'
+    ],
+    '📱 Device/Platform Issues (기기/플랫폼 문제)': [
+        'phone', 'android', 'ios', 'iphone', 'device', 'update',
+        'version', 'compatibility'
+    ],
+    '😤 UX/Usability Issues (사용성 문제)': [
+        'confusing', 'complicated', 'difficult', 'hard', 'understand',
+        'navigate', 'find', 'interface', 'design'
+    ],
+    '📢 Ads Issues (광고 문제)': [
+        'ads', 'advertisement', 'pop', 'banner', 'commercial'
+    ]
+}
+
+# 성공 요인 카테고리
+SUCCESS_CATEGORIES = {
+    '🎯 Core Features (핵심 기능)': {
+        'keywords': ['track', 'mood', 'journal', 'diary', 'log', 'record', 'habit'],
+        'importance': 'CRITICAL'
+    },
+    '🧘 Mental Health Features (정신 건강 기능)': {
+        'keywords': ['anxiety', 'stress', 'meditation', 'mindfulness', 'calm',
+                    'relax', 'therapy', 'mental', 'emotion', 'feeling'],
+        'importance': 'CRITICAL'
+    },
+    '📊 Analytics & Insights (분석 및 인사이트)': {
+        'keywords': ['insight', 'pattern', 'trend', 'report', 'chart', 'graph',
+                    'statistics', 'analysis', 'summary'],
+        'importance': 'HIGH'
+    },
+    '💡 Ease of Use (사용 편의성)': {
+        'keywords': ['easy', 'simple', 'intuitive', 'straightforward', 'user friendly',
+                    'convenient', 'quick'],
+        'importance': 'CRITICAL'
+    },
+    '🎨 Design & UI (디자인 및 UI)': {
+        'keywords': ['beautiful', 'clean', 'design', 'aesthetic', 'interface',
+                    'layout', 'pretty'],
+        'importance': 'MEDIUM'
+    },
+    '🆓 Free Features (무료 기능)': {
+        'keywords': ['free', 'no cost', 'without paying', 'complimentary'],
+        'importance': 'HIGH'
+    },
+    '🔔 Reminders & Notifications (알림)': {
+        'keywords': ['reminder', 'notification', 'alert', 'prompt', 'notify'],
+        'importance': 'MEDIUM'
+    },
+    '🔒 Privacy & Security (프라이버시 및 보안)': {
+        'keywords': ['privacy', 'private', 'secure', 'safe', 'confidential',
+                    'anonymous', 'password'],
+        'importance': 'HIGH'
+    }
+}
+
+# 구독 관련 키워드
+SUBSCRIPTION_KEYWORDS = ['subscription', 'premium', 'pro', 'paid', 'upgrade']
+
+# Rating group별 별점
+LOW_STARS = (1, 2)
+HIGH_STARS = (4, 5)
+
+
 # ============================================================================
 # 1. 데이터 로드
 # ============================================================================
 
-def load_data(csv_path='../data/MHARD_dataset.csv'):
-    """데이터 로드 및 기본 전처리"""
+def load_data(csv_path=DEFAULT_DATASET):
+    """데이터 로드 및 기본 전처리 (MHARD CSV 및 scraper.js 결과 파일 지원)"""
     print("📂 Loading data...")
-    df = pd.read_csv(csv_path)
+    df = load_reviews(csv_path)
 
     # Rating groups 생성
     df['rating_group'] = pd.cut(df['rating'],
@@ -36,64 +126,128 @@ def load_data(csv_path='../data/MHARD_dataset.csv'):
     return df
 
 
+def _representative_examples(reviews, selector, matched, hits, k=3):
+    """매칭된 리뷰 중 대표 예시 k개 (키워드 밀도 + TF-IDF centroid 유사도 + MMR 다양성)"""
+    texts = reviews.to_numpy()
+    return [str(texts[i])[:150] for i in selector.select(matched, hits, k=k)]
+
+
+def build_cube(df, backend='python'):
+    """
+    별점 x 앱 x 카테고리 x 소스 언급 수 cube를 리뷰 한 번 스캔으로 생성
+    backend='arrow': pyarrow 멀티스레드 compute 커널로 키워드 매칭 (결과 동일, pyarrow 필요)
+    """
+    print(f"🧊 Building rating x app x category x source cube ({backend})...")
+    return AggregateCube.build(df, _state_groups(), keep_matches=True, backend=backend)
+
+
+def _subset_positions(df, stars, docs):
+    """전체 테이블 기준 리뷰 위치를 해당 별점 subset 내 위치로 변환"""
+    positions = np.flatnonzero(df['rating'].isin(stars).to_numpy())
+    return np.searchsorted(positions, docs).tolist()
+
+
+def _by_source(mentions, reviews, sources):
+    """소스별 언급 수와 해당 소스 리뷰 대비 비율"""
+    return {
+        source: {'count': int(m), 'percentage': (int(m) / int(n) * 100) if n > 0 else 0}
+        for source, m, n in zip(sources, mentions, reviews)
+    }
+
+
+def _cube_by_source(cube, group, category, stars):
+    """cube의 source 축으로 별점 구간 내 카테고리 언급 수를 소스별로 집계"""
+    mentions = cube.mentions(group, keep=('source',), ratings=stars, categories=[category])
+    return _by_source(mentions, cube.review_counts(keep=('source',), ratings=stars), cube.sources)
+
+
+def _state_by_source(state, group, category, star_slice):
+    """집계 상태의 소스별 카운트로 같은 by_source 구성"""
+    sources = state.sources
+    mentions = [state.category_counts(group, category, source)[star_slice].sum() for source in sources]
+    reviews = [state.ratings(source)[star_slice].sum() for source in sources]
+    return _by_source(mentions, reviews, sources)
+
+
+def _state_groups():
+    """증분 집계 상태(ReviewState)가 추적하는 키워드 그룹"""
+    return {
+        'pain': PAIN_CATEGORIES,
+        'success': {category: info['keywords'] for category, info in SUCCESS_CATEGORIES.items()},
+        'subscription': {'subscription': SUBSCRIPTION_KEYWORDS}
+    }
+
+
+def apply_keyword_config(path):
+    """키워드 설정 파일(keyword_expansion으로 승인한 확장 키워드)을 기본 카테고리 목록에 추가"""
+    merge_keyword_config(_state_groups(), path)
+
+
+def _state_examples(state, group, category, buckets, k=3):
+    """집계 상태의 reservoir 샘플에서 대표 예시 선택 (IDF는 전체 코퍼스 기준)"""
+    items, _ = state.example_pool(group, category, buckets)
+    if not items:
+        return []
+    store = TokenStore.build(item['review'] for item in items)
+    selector = ExampleSelector(store, idf=state.idf(store.vocab))
+    picks = selector.select(list(range(len(items))), [item['hits'] for item in items], k=k)
+    return [items[i]['review'][:150] for i in picks]
+
+
 # ============================================================================
 # 2. Pain Points 분석 (피해야 할 것)
 # ============================================================================
 
-def analyze_pain_points(df):
-    """Low rating 리뷰에서 주요 불만사항 추출"""
-    print("\n" + "="*80)
-    print("😞 PAIN POINTS ANALYSIS - 피해야 할 것들")
-    print("="*80)
-
+def analyze_pain_points(df, cube=None, backend='python'):
+    """Low rating 리뷰에서 주요 불만사항 추출 (카운트는 cube에서)"""
+    if cube is None:
+        cube = build_cube(df, backend)
     low_reviews = df[df['rating_group'] == 'Low (1-2⭐)']['review'].fillna('')
 
-    # 주요 불만 카테고리
-    pain_categories = {
-        '💰 Monetization Issues (수익화 문제)': [
-            'subscription', 'pay', 'paid', 'money', 'free', 'trial',
-            'charge', 'expensive', 'cost', 'price', 'cancel', 'refund'
-        ],
-        '🐛 Technical Issues (기술적 문제)': [
-            'crash', 'bug', 'broken', 'error', 'glitch', 'freeze',
-            'lag', 'slow', 'load', 'work', 'fix'
-        ],
-        '🔐 Account/Access Issues (계정/접근 문제)': [
-            'login', 'account', 'password', 'sign', 'access', 'unlock',
-            'lock', 'restore', 'sync'
-        ],
-        '📱 Device/Platform Issues (기기/플랫폼 문제)': [
-            'phone', 'android', 'ios', 'iphone', 'device', 'update',
-            'version', 'compatibility'
-        ],
-        '😤 UX/Usability Issues (사용성 문제)': [
-            'confusing', 'complicated', 'difficult', 'hard', 'understand',
-            'navigate', 'find', 'interface', 'design'
-        ],
-        '📢 Ads Issues (광고 문제)': [
-            'ads', 'advertisement', 'pop', 'banner', 'commercial'
-        ]
-    }
+    # 대표 예시 선택용 (한 번만 토큰화)
+    selector = ExampleSelector(TokenStore.build(low_reviews))
 
     results = {}
-    for category, keywords in pain_categories.items():
-        count = 0
-        examples = []
-
-        for review in low_reviews:
-            review_lower = str(review).lower()
-            if any(keyword in review_lower for keyword in keywords):
-                count += 1
-                if len(examples) < 3:
-                    examples.append(review[:150])
+    for category in PAIN_CATEGORIES:
+        count = int(cube.mentions('pain', keep=(), ratings=LOW_STARS, categories=[category]))
+        docs, hits = cube.matched('pain', category, ratings=LOW_STARS)
+        matched = _subset_positions(df, LOW_STARS, docs)
 
         percentage = (count / len(low_reviews)) * 100
         results[category] = {
             'count': count,
             'percentage': percentage,
-            'examples': examples
+            'by_source': _cube_by_source(cube, 'pain', category, LOW_STARS),
+            'examples': _representative_examples(low_reviews, selector, matched, hits)
         }
 
+    _print_pain_points(results)
+    return results
+
+
+def pain_points_from_state(state):
+    """집계 상태에서 Pain Points 결과 재구성 (리뷰 재스캔 없음)"""
+    n_low = int(state.ratings()[:2].sum())
+
+    results = {}
+    for category in PAIN_CATEGORIES:
+        count = int(state.category_counts('pain', category)[:2].sum())
+        results[category] = {
+            'count': count,
+            'percentage': (count / n_low) * 100,
+            'by_source': _state_by_source(state, 'pain', category, slice(None, 2)),
+            'examples': _state_examples(state, 'pain', category, ('low',))
+        }
+
+    _print_pain_points(results)
+    return results
+
+
+def _print_pain_points(results):
+    print("\n" + "="*80)
+    print("😞 PAIN POINTS ANALYSIS - 피해야 할 것들")
+    print("="*80)
+
     # 결과 출력
     for category, data in sorted(results.items(),
                                  key=lambda x: x[1]['percentage'],
@@ -105,82 +259,63 @@ def analyze_pain_points(df):
             for ex in data['examples'][:2]:
                 print(f"     - {ex}...")
 
-    return results
-
 
 # ============================================================================
 # 3. Success Factors 분석 (반드시 포함해야 할 것)
 # ============================================================================
 
-def analyze_success_factors(df):
-    """High rating 리뷰에서 핵심 성공 요인 추출"""
-    print("\n" + "="*80)
-    print("😊 SUCCESS FACTORS - 반드시 포함해야 할 것들")
-    print("="*80)
-
+def analyze_success_factors(df, cube=None, backend='python'):
+    """High rating 리뷰에서 핵심 성공 요인 추출 (카운트는 cube에서)"""
+    if cube is None:
+        cube = build_cube(df, backend)
     high_reviews = df[df['rating_group'] == 'High (4-5⭐)']['review'].fillna('')
 
-    # 성공 요인 카테고리
-    success_categories = {
-        '🎯 Core Features (핵심 기능)': {
-            'keywords': ['track', 'mood', 'journal', 'diary', 'log', 'record', 'habit'],
-            'importance': 'CRITICAL'
-        },
-        '🧘 Mental Health Features (정신 건강 기능)': {
-            'keywords': ['anxiety', 'stress', 'meditation', 'mindfulness', 'calm',
-                        'relax', 'therapy', 'mental', 'emotion', 'feeling'],
-            'importance': 'CRITICAL'
-        },
-        '📊 Analytics & Insights (분석 및 인사이트)': {
-            'keywords': ['insight', 'pattern', 'trend', 'report', 'chart', 'graph',
-                        'statistics', 'analysis', 'summary'],
-            'importance': 'HIGH'
-        },
-        '💡 Ease of Use (사용 편의성)': {
-            'keywords': ['easy', 'simple', 'intuitive', 'straightforward', 'user friendly',
-                        'convenient', 'quick'],
-            'importance': 'CRITICAL'
-        },
-        '🎨 Design & UI (디자인 및 UI)': {
-            'keywords': ['beautiful', 'clean', 'design', 'aesthetic', 'interface',
-                        'layout', 'pretty'],
-            'importance': 'MEDIUM'
-        },
-        '🆓 Free Features (무료 기능)': {
-            'keywords': ['free', 'no cost', 'without paying', 'complimentary'],
-            'importance': 'HIGH'
-        },
-        '🔔 Reminders & Notifications (알림)': {
-            'keywords': ['reminder', 'notification', 'alert', 'prompt', 'notify'],
-            'importance': 'MEDIUM'
-        },
-        '🔒 Privacy & Security (프라이버시 및 보안)': {
-            'keywords': ['privacy', 'private', 'secure', 'safe', 'confidential',
-                        'anonymous', 'password'],
-            'importance': 'HIGH'
-        }
-    }
+    # 대표 예시 선택용 (한 번만 토큰화)
+    selector = ExampleSelector(TokenStore.build(high_reviews))
 
     results = {}
-    for category, info in success_categories.items():
-        count = 0
-        examples = []
-
-        for review in high_reviews:
-            review_lower = str(review).lower()
-            if any(keyword in review_lower for keyword in info['keywords']):
-                count += 1
-                if len(examples) < 3:
-                    examples.append(review[:150])
+    for category, info in SUCCESS_CATEGORIES.items():
+        count = int(cube.mentions('success', keep=(), ratings=HIGH_STARS, categories=[category]))
+        docs, hits = cube.matched('success', category, ratings=HIGH_STARS)
+        matched = _subset_positions(df, HIGH_STARS, docs)
 
         percentage = (count / len(high_reviews)) * 100
         results[category] = {
             'count': count,
             'percentage': percentage,
             'importance': info['importance'],
-            'examples': examples
+            'by_source': _cube_by_source(cube, 'success', category, HIGH_STARS),
+            'examples': _representative_examples(high_reviews, selector, matched, hits)
         }
 
+    _print_success_factors(results)
+    return results
+
+
+def success_factors_from_state(state):
+    """집계 상태에서 Success Factors 결과 재구성 (리뷰 재스캔 없음)"""
+    n_high = int(state.ratings()[3:].sum())
+
+    results = {}
+    for category, info in SUCCESS_CATEGORIES.items():
+        count = int(state.category_counts('success', category)[3:].sum())
+        results[category] = {
+            'count': count,
+            'percentage': (count / n_high) * 100,
+            'importance': info['importance'],
+            'by_source': _state_by_source(state, 'success', category, slice(3, None)),
+            'examples': _state_examples(state, 'success', category, ('high',))
+        }
+
+    _print_success_factors(results)
+    return results
+
+
+def _print_success_factors(results):
+    print("\n" + "="*80)
+    print("😊 SUCCESS FACTORS - 반드시 포함해야 할 것들")
+    print("="*80)
+
     # 결과 출력
     print("\n🔥 CRITICAL Features (필수):")
     for category, data in sorted(results.items(),
@@ -200,32 +335,39 @@ def analyze_success_factors(df):
             print(f"\n  {category}")
             print(f"    📊 Mentioned in {data['count']:,} reviews ({data['percentage']:.1f}%)")
 
-    return results
-
 
 # ============================================================================
 # 4. 수익화 전략 분석
 # ============================================================================
 
-def analyze_monetization_strategy(df):
-    """수익화 전략 분석"""
-    print("\n" + "="*80)
-    print("💰 MONETIZATION STRATEGY - 수익화 전략 분석")
-    print("="*80)
+def analyze_monetization_strategy(df, cube=None, backend='python'):
+    """수익화 전략 분석 (cube에서 바로 조회, 리뷰 재스캔 없음)"""
+    if cube is None:
+        cube = build_cube(df, backend)
 
     # Subscription 언급 분석
-    sub_low = df[df['rating_group'] == 'Low (1-2⭐)']['review'].fillna('')
-    sub_high = df[df['rating_group'] == 'High (4-5⭐)']['review'].fillna('')
+    low_sub_mentions = int(cube.mentions('subscription', keep=(), ratings=LOW_STARS))
+    high_sub_mentions = int(cube.mentions('subscription', keep=(), ratings=HIGH_STARS))
 
-    sub_keywords = ['subscription', 'premium', 'pro', 'paid', 'upgrade']
+    _print_monetization_strategy(low_sub_mentions, int(cube.review_counts(ratings=LOW_STARS)),
+                                 high_sub_mentions, int(cube.review_counts(ratings=HIGH_STARS)))
 
-    low_sub_mentions = sum(any(kw in str(review).lower() for kw in sub_keywords)
-                           for review in sub_low)
-    high_sub_mentions = sum(any(kw in str(review).lower() for kw in sub_keywords)
-                            for review in sub_high)
 
-    low_pct = (low_sub_mentions / len(sub_low)) * 100
-    high_pct = (high_sub_mentions / len(sub_high)) * 100
+def monetization_strategy_from_state(state):
+    """집계 상태에서 수익화 전략 분석 (리뷰 재스캔 없음)"""
+    ratings = state.ratings()
+    mentions = state.category_counts('subscription', 'subscription')
+    _print_monetization_strategy(int(mentions[:2].sum()), int(ratings[:2].sum()),
+                                 int(mentions[3:].sum()), int(ratings[3:].sum()))
+
+
+def _print_monetization_strategy(low_sub_mentions, n_low, high_sub_mentions, n_high):
+    print("\n" + "="*80)
+    print("💰 MONETIZATION STRATEGY - 수익화 전략 분석")
+    print("="*80)
+
+    low_pct = (low_sub_mentions / n_low) * 100
+    high_pct = (high_sub_mentions / n_high) * 100
 
     print(f"\n📊 Subscription Mentions:")
     print(f"  ❌ In Low Ratings: {low_sub_mentions:,} mentions ({low_pct:.1f}%)")
@@ -259,18 +401,75 @@ def analyze_monetization_strategy(df):
 # 5. 앱별 비교 분석
 # ============================================================================
 
-def analyze_by_app(df):
-    """앱별 강점/약점 분석"""
+def analyze_by_app(df, cube=None, backend='python'):
+    """앱별 강점/약점 분석 (앱별 별점 분포는 cube에서) + 리뷰 프로필 기반 경쟁 앱 클러스터"""
+    if cube is None:
+        cube = build_cube(df, backend)
+
+    # 앱별 평균 평점
+    app_ratings = cube.app_rating_stats().round(2)
+    _print_app_comparison(app_ratings)
+    analyze_pain_profile_by_app(cube)
+    return analyze_app_clusters(df, cube)
+
+
+def analyze_app_clusters(df, cube, n_clusters=None, min_reviews=20):
+    """
+    앱 x 단어 / 앱 x 카테고리 프로필 (희소 행렬 곱 한 번으로 집계)로 앱 간 유사도와
+    계층적 클러스터 계산. 클러스터별 특징 단어와 평균 대비 많이 언급되는 카테고리 출력
+    """
+    profiles = AppProfiles.build(df, cube, min_reviews=min_reviews)
+    if len(profiles.apps) < 2:
+        print(f"\n\n🧭 App clustering skipped: fewer than 2 apps with {min_reviews}+ reviews")
+        return None
+    summary = profiles.summary(n_clusters)
+
+    print(f"\n\n🧭 App Clusters ({summary['apps']} apps, similar term + category profiles):")
+    for idx, cluster in enumerate(summary['clusters'], 1):
+        apps = ', '.join(cluster['apps'][:8]) + (' ...' if len(cluster['apps']) > 8 else '')
+        print(f"\n  {idx}. {apps}")
+        print(f"     {cluster['reviews']:,} reviews, {cluster['avg_rating']:.2f}⭐")
+        print(f"     특징 단어: {', '.join(cluster['distinctive_terms'][:8])}")
+        for category in cluster['overrepresented_categories'][:3]:
+            print(f"     ↑ {category['category'].split(' (')[0]}: {category['share']:.1f}% "
+                  f"(+{category['vs_average']:.1f}%p)")
+    return summary
+
+
+def analyze_pain_profile_by_app(cube, top_n=10):
+    """리뷰 수 상위 앱들의 Pain Point 프로필 (Low rating 중 카테고리별 언급 비율, cube slice)"""
+    apps = cube.top_apps(top_n)
+    profile = cube.frame('pain', index='app', ratings=LOW_STARS, apps=apps, share=True)
+
+    print(f"\n\n🩺 Pain Profile of Top {len(apps)} Apps (% of low ratings):")
+    for app, shares in profile.iterrows():
+        top = shares.sort_values(ascending=False).head(3)
+        summary = ', '.join(f"{category.split(' (')[0]} {share:.1f}%" for category, share in top.items())
+        print(f"  {app:20s}: {summary}")
+    return profile
+
+
+def analyze_by_app_from_state(state):
+    """집계 상태의 앱별 별점 분포에서 평균/표준편차 계산 (리뷰 재스캔 없음)"""
+    stars = np.arange(1, 6)
+    rows = {}
+    for app, counts in state.app_rating_counts.items():
+        counts = np.array(counts)
+        n = counts.sum()
+        mean = (counts * stars).sum() / n
+        # pandas std와 동일하게 표본 표준편차 (ddof=1)
+        std = np.sqrt((counts * (stars - mean) ** 2).sum() / (n - 1)) if n > 1 else np.nan
+        rows[app] = {'avg_rating': mean, 'review_count': n, 'std_dev': std}
+
+    app_ratings = pd.DataFrame.from_dict(rows, orient='index').round(2)
+    _print_app_comparison(app_ratings)
+
+
+def _print_app_comparison(app_ratings):
     print("\n" + "="*80)
     print("📱 APP COMPARISON - 경쟁 앱 분석")
     print("="*80)
 
-    # 앱별 평균 평점
-    app_ratings = df.groupby('app_name').agg({
-        'rating': ['mean', 'count', 'std']
-    }).round(2)
-
-    app_ratings.columns = ['avg_rating', 'review_count', 'std_dev']
     app_ratings = app_ratings.sort_values('avg_rating', ascending=False)
 
     print("\n📊 Top Rated Mental Health Apps:")
@@ -346,7 +545,8 @@ def generate_actionable_recommendations(pain_points, success_factors):
 # 7. 결과 저장
 # ============================================================================
 
-def save_results(pain_points, success_factors, recommendations, output_path='../data/reflecta_insights.json'):
+def save_results(pain_points, success_factors, recommendations, output_path=os.path.join(DATA_DIR, 'reflecta_insights.json'),
+                 app_clusters=None):
     """결과를 JSON으로 저장"""
     results = {
         'timestamp': datetime.now().isoformat(),
@@ -355,44 +555,77 @@ def save_results(pain_points, success_factors, recommendations, output_path='../
         'success_factors': success_factors,
         'recommendations': recommendations
     }
+    if app_clusters:
+        results['app_clusters'] = app_clusters
 
+    # 기본 경로(data/)가 아직 없는 체크아웃에서도 저장되도록
+    os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
     with open(output_path, 'w', encoding='utf-8') as f:
         json.dump(results, f, indent=2, ensure_ascii=False)
 
     print(f"\n\n💾 Results saved to: {output_path}")
 
 
+# ============================================================================
+# 8. 증분 업데이트 (새 리뷰만 반영)
+# ============================================================================
+
+def append_reviews(paths, state_path, output_path=os.path.join(DATA_DIR, 'reflecta_insights.json')):
+    """
+    새 리뷰 파일(또는 기존 파일에 추가된 행)만 집계 상태에 반영하고 리포트 재생성.
+    카테고리별/별점별 카운트, 앱별 별점 분포, 예시 reservoir를 그대로 병합하므로
+    비용은 전체 코퍼스가 아니라 새 리뷰 수에 비례합니다.
+    """
+    state = ReviewState.open(state_path, _state_groups())
+    n_new = state.ingest(paths)
+    print(f"📥 Appended {n_new:,} new reviews ({state.n_reviews:,} in state)")
+    if n_new or not os.path.exists(state_path):
+        state.save(state_path)
+
+    pain_points = pain_points_from_state(state)
+    success_factors = success_factors_from_state(state)
+    monetization_strategy_from_state(state)
+    analyze_by_app_from_state(state)
+    recommendations = generate_actionable_recommendations(pain_points, success_factors)
+    save_results(pain_points, success_factors, recommendations, output_path)
+
+
 # ============================================================================
 # MAIN
 # ============================================================================
 
-def main():
-    """메인 실행 함수"""
+def run_insights(paths=DEFAULT_DATASET, output_path=os.path.join(DATA_DIR, 'reflecta_insights.json'),
+                 cube_path=os.path.join(DATA_DIR, 'reflecta_cube.npz'), backend='python'):
+    """전체 인사이트 분석 실행 (리뷰 파일 경로는 인자로 전달, backend: 'python' 또는 'arrow')"""
     print("="*80)
     print("🚀 REFLECTA APP DEVELOPMENT INSIGHTS")
     print("="*80)
     print("\nAnalyzing 200K+ mental health app reviews to guide Reflecta development...\n")
 
-    # 1. 데이터 로드
-    df = load_data()
+    # 1. 데이터 로드 + 집계 cube (리뷰 텍스트 스캔은 여기서 한 번만)
+    df = load_data(paths)
+    cube = build_cube(df, backend)
+    if cube_path:
+        os.makedirs(os.path.dirname(os.path.abspath(cube_path)), exist_ok=True)
+        cube.save(cube_path)
 
     # 2. Pain Points 분석
-    pain_points = analyze_pain_points(df)
+    pain_points = analyze_pain_points(df, cube)
 
     # 3. Success Factors 분석
-    success_factors = analyze_success_factors(df)
+    success_factors = analyze_success_factors(df, cube)
 
     # 4. 수익화 전략
-    analyze_monetization_strategy(df)
+    analyze_monetization_strategy(df, cube)
 
-    # 5. 앱별 비교
-    analyze_by_app(df)
+    # 5. 앱별 비교 + 경쟁 앱 클러스터
+    app_clusters = analyze_by_app(df, cube)
 
     # 6. 실행 가능한 권장사항
     recommendations = generate_actionable_recommendations(pain_points, success_factors)
 
     # 7. 결과 저장
-    save_results(pain_points, success_factors, recommendations)
+    save_results(pain_points, success_factors, recommendations, output_path, app_clusters)
 
     print("\n" + "="*80)
     print("✅ ANALYSIS COMPLETE!")
@@ -406,5 +639,16 @@ def main():
     print("\n💡 Key Takeaway: Focus on simplicity, privacy, and core value BEFORE monetization\n")
 
 
+def main():
+    """메인 실행 함수 (cli.py insights 와 동일)"""
+    # 증분 업데이트: reflecta_insights_analysis.py --append STATE_FILE NEW_FILE...
+    if len(sys.argv) > 2 and sys.argv[1] == '--append':
+        append_reviews(sys.argv[3:], sys.argv[2])
+        return
+
+    # 리뷰 파일을 인자로 지정 가능 (기본값: data/MHARD_dataset.csv)
+    run_insights(sys.argv[1:] or DEFAULT_DATASET)
+
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,169 @@
+"""
+Result Cache
+Content-addressed on-disk snapshots of analysis stage outputs
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+
+
+# Bytes hashed from the start, middle and end of each dataset file
+SAMPLE_BLOCK_SIZE = 64 * 1024
+
+
+def dataset_fingerprint(paths):
+    """Fingerprint review files by size, mtime and a sampled content hash"""
+    if isinstance(paths, str):
+        paths = [paths]
+
+    digest = hashlib.sha1()
+    for path in paths:
+        stat = os.stat(path)
+        digest.update(f"{os.path.abspath(path)}|{stat.st_size}|{stat.st_mtime_ns}".encode())
+        _update_sampled(digest, path, stat.st_size)
+    return digest.hexdigest()
+
+
+def file_digest(path):
+    """SHA-1 of a small file's content (e.g. a keyword config), or None when it does not exist"""
+    try:
+        with open(path, 'rb') as f:
+            return hashlib.sha1(f.read()).hexdigest()
+    except FileNotFoundError:
+        return None
+
+
+def prefix_fingerprint(path, length):
+    """
+    Sampled content hash of the first `length` bytes of a file. It stays the
+    same when rows are appended and changes when the file is rewritten.
+    """
+    digest = hashlib.sha1(str(length).encode())
+    _update_sampled(digest, path, length)
+    return digest.hexdigest()
+
+
+def _update_sampled(digest, path, length):
+    """Hash the start, middle and end blocks of the first `length` bytes"""
+    with open(path, 'rb') as f:
+        for offset in (0, length // 2, max(length - SAMPLE_BLOCK_SIZE, 0)):
+            f.seek(offset)
+            digest.update(f.read(min(SAMPLE_BLOCK_SIZE, length - offset)))
+
+
+def config_hash(config):
+    """Stable hash of a JSON-serializable config (e.g. a keyword dict)"""
+    payload = json.dumps(config, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+def code_version(*source_files):
+    """Hash of the source files whose logic produces the cached results"""
+    digest = hashlib.sha1()
+    for path in source_files:
+        with open(path, 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+def to_json_compatible(value):
+    """Round-trip a result through JSON so cached and fresh results look identical"""
+    return json.loads(json.dumps(value, default=_json_default))
+
+
+def _json_default(obj):
+    # numpy scalars expose .item(); anything else is stored by its string form
+    if hasattr(obj, 'item'):
+        return obj.item()
+    return str(obj)
+
+
+class ResultCache:
+    """Directory of JSON snapshots addressed by the hash of their inputs"""
+
+    def __init__(self, cache_dir):
+        self.cache_dir = cache_dir
+        os.makedirs(cache_dir, exist_ok=True)
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(*parts):
+        """Combine input hashes and stage names into one content address"""
+        return hashlib.sha1('|'.join(str(p) for p in parts).encode('utf-8')).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key[:2], f"{key}.json")
+
+    def load(self, key):
+        """Return the snapshot stored under key, or None"""
+        try:
+            with open(self._path(key), encoding='utf-8') as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def store(self, key, value):
+        """Atomically write a snapshot so an interrupted run never leaves a torn file"""
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(value, f, ensure_ascii=False, default=_json_default)
+        os.replace(tmp_path, path)
+
+    def get_or_compute(self, key, compute):
+        """Load the snapshot for key, computing and storing it on a miss"""
+        value = self.load(key)
+        if value is not None:
+            self.hits += 1
+            return value
+
+        self.misses += 1
+        value = to_json_compatible(compute())
+        self.store(key, value)
+        return value
+
+    # ------------------------------------------------------------------
+    # Latest-stage links (lets a light client read results without the analyzer)
+    # ------------------------------------------------------------------
+
+    def _link_path(self, dataset_key, stage):
+        return os.path.join(self.cache_dir, 'latest', dataset_key, f"{stage}.json")
+
+    def link(self, dataset_key, stage, key, code_key, code_files, config_key=None):
+        """
+        Record key as the latest snapshot of a stage for a dataset, with the code
+        and the keyword config (config_key, e.g. file_digest of it) that produced it.
+        """
+        path = self._link_path(dataset_key, stage)
+        link = {"key": key, "code_key": code_key, "code_files": [os.path.abspath(p) for p in code_files],
+                "config_key": config_key}
+        try:
+            with open(path, encoding='utf-8') as f:
+                if json.load(f) == link:
+                    return
+        except (FileNotFoundError, json.JSONDecodeError):
+            pass
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(link, f)
+        os.replace(tmp_path, path)
+
+    def latest(self, dataset_key, stage, config_key=None):
+        """
+        Latest snapshot of a stage for a dataset, or None when there is none,
+        the code that produced it has changed since, or it was computed with
+        a different keyword config than config_key.
+        """
+        try:
+            with open(self._link_path(dataset_key, stage), encoding='utf-8') as f:
+                link = json.load(f)
+            if link["config_key"] != config_key or code_version(*link["code_files"]) != link["code_key"]:
+                return None
+        except (OSError, json.JSONDecodeError, KeyError):
+            return None
+        return self.load(link["key"])
@@ -0,0 +1,177 @@
+"""
+Review Source Adapters
+Normalizes MHARD CSV dumps and scraper.js review files into one compact table
+"""
+
+import io
+import json
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+
+# review-scraping/data, where the scripts read and write by default
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data')
+DEFAULT_DATASET = os.path.join(DATA_DIR, 'MHARD_dataset.csv')
+
+# Columns every adapter produces, in order
+NORMALIZED_COLUMNS = ['source', 'app_name', 'rating', 'date', 'review', 'review_cleaned']
+
+# Header written by GoogleMapsReviewScraper.saveToCSV
+GOOGLE_MAPS_CSV_COLUMNS = {
+    'Review ID': 'review_id',
+    'Reviewer Name': 'reviewer',
+    'Rating': 'rating',
+    'Date': 'date',
+    'Review Text': 'review',
+    'Text Length': 'text_length'
+}
+
+
+def clean_review_text(text):
+    """Lowercase and strip non-letters, matching the MHARD review_cleaned column"""
+    text = re.sub(r'[^a-z\s]', ' ', str(text).lower())
+    return re.sub(r'\s+', ' ', text).strip()
+
+
+def load_mhard_csv(path):
+    """Load an MHARD-style CSV (app_name, rating, date, review, review_cleaned)"""
+    return _normalize_mhard(pd.read_csv(path))
+
+
+def _normalize_mhard(df):
+    if 'review_cleaned' not in df.columns:
+        df['review_cleaned'] = df['review'].fillna('').map(clean_review_text)
+    if 'date' not in df.columns:
+        df['date'] = None
+    df['source'] = 'mhard'
+    return df[NORMALIZED_COLUMNS]
+
+
+def load_google_maps_json(path):
+    """Load a scraper.js JSON file ({location, reviews: [{text, rating, ...}]})"""
+    with open(path, encoding='utf-8') as f:
+        data = json.load(f)
+
+    location = data.get('location') or {}
+    df = pd.DataFrame(data.get('reviews', []), columns=['rating', 'date', 'text'])
+    df = df.rename(columns={'text': 'review'})
+    df['app_name'] = location.get('name') or _file_stem(path)
+    df['review_cleaned'] = df['review'].fillna('').map(clean_review_text)
+    df['source'] = 'google_maps'
+    return df[NORMALIZED_COLUMNS]
+
+
+def load_google_maps_csv(path):
+    """Load a scraper.js CSV file (Review ID, Rating, Date, Review Text, ...)"""
+    return _normalize_google_maps_csv(pd.read_csv(path), path)
+
+
+def _normalize_google_maps_csv(df, path):
+    df = df.rename(columns=GOOGLE_MAPS_CSV_COLUMNS)
+    # The CSV export carries no location info, so the file name stands in for the place
+    df['app_name'] = _file_stem(path)
+    df['review_cleaned'] = df['review'].fillna('').map(clean_review_text)
+    df['source'] = 'google_maps'
+    return df[NORMALIZED_COLUMNS]
+
+
+ADAPTERS = {
+    'mhard': load_mhard_csv,
+    'google_maps_json': load_google_maps_json,
+    'google_maps_csv': load_google_maps_csv
+}
+
+
+# CSV formats: rows can be parsed from any record boundary with the file's header
+CSV_NORMALIZERS = {
+    'mhard': lambda df, path: _normalize_mhard(df),
+    'google_maps_csv': _normalize_google_maps_csv
+}
+
+
+def load_reviews_tail(path, offset):
+    """
+    Normalized rows of a CSV review file from byte offset on, e.g. the file's
+    size when it was last read, so an appended file is parsed only for its new
+    rows. Returns None for formats that cannot be read from an offset (JSON).
+    """
+    file_format = detect_format(path)
+    if file_format not in CSV_NORMALIZERS:
+        return None
+    header = list(pd.read_csv(path, nrows=0).columns)
+    with open(path, 'rb') as f:
+        f.seek(offset)
+        tail = f.read()
+    if tail.strip():
+        df = pd.read_csv(io.BytesIO(tail), header=None, names=header)
+    else:
+        df = pd.DataFrame(columns=header)
+    return compact(CSV_NORMALIZERS[file_format](df, path))
+
+
+def detect_format(path):
+    """Guess which adapter understands a review file"""
+    if path.endswith('.json'):
+        return 'google_maps_json'
+
+    header = pd.read_csv(path, nrows=0).columns
+    if 'Review Text' in header:
+        return 'google_maps_csv'
+    if 'review' in header and 'rating' in header:
+        return 'mhard'
+    raise ValueError(f"Unrecognized review file format: {path}")
+
+
+def load_reviews(paths, max_workers=None):
+    """
+    Load review files of any supported format concurrently into one table.
+
+    Returns a DataFrame with NORMALIZED_COLUMNS, where `source` and `app_name`
+    are categoricals and `rating` is an integer star value (1-5).
+    """
+    if isinstance(paths, str):
+        paths = [paths]
+
+    def load(path):
+        return ADAPTERS[detect_format(path)](path)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        frames = list(executor.map(load, paths))
+
+    return compact(pd.concat(frames, ignore_index=True))
+
+
+def iter_reviews(paths, chunk_size=10000):
+    """
+    Yield the normalized review table in chunks of at most chunk_size rows,
+    in the same row order as load_reviews(). MHARD CSVs are streamed with
+    pandas' chunked reader, so memory stays bounded by the chunk size.
+    """
+    if isinstance(paths, str):
+        paths = [paths]
+
+    for path in paths:
+        if detect_format(path) == 'mhard':
+            for chunk in pd.read_csv(path, chunksize=chunk_size):
+                yield compact(_normalize_mhard(chunk))
+        else:
+            # scraper.js files are small; load whole and slice
+            df = compact(ADAPTERS[detect_format(path)](path))
+            for start in range(0, len(df), chunk_size):
+                yield df.iloc[start:start + chunk_size].reset_index(drop=True)
+
+
+def compact(df):
+    """Drop unrated reviews and shrink dtypes of the normalized table"""
+    df = df[pd.to_numeric(df['rating'], errors='coerce').notna()].copy()
+    df['rating'] = pd.to_numeric(df['rating']).round().clip(1, 5).astype('int8')
+    df['source'] = df['source'].astype('category')
+    df['app_name'] = df['app_name'].astype('category')
+    return df.reset_index(drop=True)
+
+
+def _file_stem(path):
+    return os.path.splitext(os.path.basename(path))[0]
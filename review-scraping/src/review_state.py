@@ -0,0 +1,306 @@
+"""
+Review State
+Mergeable aggregate counts of an analyzed corpus, persisted for incremental appends
+"""
+
+import gzip
+import json
+import os
+import re
+import tempfile
+from collections import Counter
+
+import numpy as np
+
+from review_sources import load_reviews, load_reviews_tail, detect_format, CSV_NORMALIZERS
+from result_cache import ResultCache, config_hash, prefix_fingerprint
+from token_store import TOKEN_PATTERN
+from negation import NegationMatcher
+
+
+RATING_BUCKETS = {1: 'low', 2: 'low', 3: 'mid', 4: 'high', 5: 'high'}
+
+# Same tokenization as MHARDAnalyzer.extract_keywords_by_rating
+WORD_PATTERN = re.compile(r'\b[a-z]{3,}\b')
+
+# 2: files are tracked with byte size and a content fingerprint
+# 3: negation states count mentions from the NegationMatcher scan
+# 4: bigram counts dropped (no report read them)
+STATE_VERSION = 4
+
+
+def _empty_ratings():
+    return [0, 0, 0, 0, 0]
+
+
+def _rows_digest(df):
+    """Hash of the ratings and texts of normalized rows (JSON files: dates are relative and drift)"""
+    return config_hash([df['rating'].astype(int).tolist(), df['review'].fillna('').astype(str).tolist()])
+
+
+class ReviewState:
+    """
+    Everything the reports need, kept as counts that merge with new reviews.
+
+    For every keyword group (e.g. pain points) and category the state holds
+    mention counts per source and star rating, plus reservoir samples of the
+    matching reviews per rating bucket, overall and per app, to pick examples
+    from. Word counts per rating bucket and the document
+    frequencies behind TF-IDF are kept alongside. update() only reads the
+    rows it is given, so an append costs time proportional to the new rows.
+
+    With negation=True every group is matched by NegationMatcher instead of
+    substring search, in one scan that gives the mention counts and the
+    affirmed / negated counts; only affirmed matches are sampled.
+    """
+
+    def __init__(self, keyword_groups, negation=False, reservoir_size=100,
+                 app_reservoir_size=5, seed=0):
+        self.keyword_groups = keyword_groups
+        self.negation = negation
+        self.reservoir_size = reservoir_size
+        self.app_reservoir_size = app_reservoir_size
+        self.config_key = self.config_key_for(keyword_groups, negation)
+        self.rng = np.random.default_rng(seed)
+
+        self.n_reviews = 0
+        self.ingested = {}
+        self.rating_counts = {}
+        self.app_rating_counts = {}
+        self.mentions = self._category_tables()
+        self.affirmed = self._category_tables() if negation else None
+        self.negated = self._category_tables() if negation else None
+        self.reservoirs = self._category_tables()
+        self.app_reservoirs = self._category_tables()
+        self.word_counts = {bucket: Counter() for bucket in ('low', 'mid', 'high')}
+        self.document_frequencies = Counter()
+
+    def _category_tables(self):
+        return {group: {category: {} for category in categories}
+                for group, categories in self.keyword_groups.items()}
+
+    @staticmethod
+    def config_key_for(keyword_groups, negation):
+        """Hash of the keyword config a state was built with"""
+        return config_hash([keyword_groups, negation])
+
+    # ------------------------------------------------------------------
+    # Updating
+    # ------------------------------------------------------------------
+
+    def ingest(self, paths):
+        """
+        Fold the rows of review files that are not in the state yet.
+
+        Files are tracked by path, row count, byte size and a fingerprint of
+        what was ingested. A new file is read in full; a CSV that grew (e.g. a
+        scraper CSV that was appended to) is parsed only from where the last
+        ingest stopped. JSON files are re-parsed and skip their known rows,
+        whose content is checked instead. A file that was rewritten rather
+        than appended is rejected. Returns the number of new rows.
+        """
+        if isinstance(paths, str):
+            paths = [paths]
+
+        n_new = 0
+        for path in paths:
+            key = os.path.abspath(path)
+            size = os.path.getsize(path)
+            seen = self.ingested.get(key)
+            known_rows = seen["rows"] if seen else 0
+
+            if detect_format(path) in CSV_NORMALIZERS:
+                if seen is None:
+                    new_rows = load_reviews(path)
+                else:
+                    if size < seen["bytes"] or prefix_fingerprint(path, seen["bytes"]) != seen["digest"]:
+                        raise ValueError(f"{path} was rewritten since it was ingested; rebuild the state")
+                    new_rows = load_reviews_tail(path, seen["bytes"])
+                digest = prefix_fingerprint(path, size)
+            else:
+                df = load_reviews(path)
+                if seen is not None and _rows_digest(df.iloc[:known_rows]) != seen["digest"]:
+                    raise ValueError(f"{path} was rewritten since it was ingested; rebuild the state")
+                new_rows = df.iloc[known_rows:]
+                digest = _rows_digest(df)
+
+            if len(new_rows):
+                self.update(new_rows)
+                n_new += len(new_rows)
+            self.ingested[key] = {"rows": known_rows + len(new_rows), "bytes": size, "digest": digest}
+        return n_new
+
+    def update(self, df):
+        """Merge a batch of normalized review rows into the counts"""
+        matchers = ({group: NegationMatcher(categories)
+                     for group, categories in self.keyword_groups.items()}
+                    if self.negation else {})
+        groups = [(group, list(categories.items())) for group, categories in self.keyword_groups.items()]
+
+        rows = zip(df['source'].astype(str), df['app_name'].astype(str), df['rating'].astype(int),
+                   df['review'], df['review_cleaned'])
+        for source, app, rating, review, cleaned in rows:
+            review = review if isinstance(review, str) else ''
+            cleaned = cleaned if isinstance(cleaned, str) else ''
+            lower = review.lower()
+            r = rating - 1
+            bucket = RATING_BUCKETS[rating]
+
+            self.n_reviews += 1
+            self.rating_counts.setdefault(source, _empty_ratings())[r] += 1
+            self.app_rating_counts.setdefault(app, _empty_ratings())[r] += 1
+
+            for group, categories in groups:
+                if self.negation:
+                    affirmed, negated, _ = matchers[group].count(lower)
+                for cat_id, (category, keywords) in enumerate(categories):
+                    if self.negation:
+                        hits = affirmed[cat_id] + negated[cat_id]
+                    else:
+                        hits = sum(keyword in lower for keyword in keywords)
+                    if hits:
+                        self.mentions[group][category].setdefault(source, _empty_ratings())[r] += 1
+
+                    if self.negation:
+                        if negated[cat_id]:
+                            self.negated[group][category].setdefault(source, _empty_ratings())[r] += 1
+                        if not affirmed[cat_id]:
+                            continue
+                        self.affirmed[group][category].setdefault(source, _empty_ratings())[r] += 1
+                    elif not hits:
+                        continue
+
+                    item = {"app": app, "rating": rating, "source": source,
+                            "review": review, "hits": max(hits, 1)}
+                    self._sample(self.reservoirs[group][category].setdefault(bucket, {}),
+                                 item, self.reservoir_size)
+                    app_reservoirs = self.app_reservoirs[group][category].setdefault(bucket, {})
+                    self._sample(app_reservoirs.setdefault(app, {}), item, self.app_reservoir_size)
+
+            self.document_frequencies.update(set(TOKEN_PATTERN.findall(lower)))
+            cleaned = cleaned.lower()
+            self.word_counts[bucket].update(WORD_PATTERN.findall(cleaned))
+
+    def _sample(self, reservoir, item, size):
+        """Reservoir sampling (Algorithm R): every match so far is kept with equal probability"""
+        reservoir["seen"] = reservoir.get("seen", 0) + 1
+        items = reservoir.setdefault("items", [])
+        if len(items) < size:
+            items.append(item)
+        else:
+            j = int(self.rng.integers(reservoir["seen"]))
+            if j < size:
+                items[j] = item
+
+    # ------------------------------------------------------------------
+    # Reading
+    # ------------------------------------------------------------------
+
+    @property
+    def sources(self):
+        return sorted(self.rating_counts)
+
+    @property
+    def key(self):
+        """Content address of the state: config plus exactly which rows it covers"""
+        return ResultCache.key("review_state", self.config_key,
+                               json.dumps(self.ingested, sort_keys=True))
+
+    def ratings(self, source=None):
+        """Review counts per star rating (index 0 = 1 star), overall or for one source"""
+        if source is not None:
+            return np.array(self.rating_counts.get(source, _empty_ratings()))
+        return np.sum([_empty_ratings()] + list(self.rating_counts.values()), axis=0, dtype=np.int64)
+
+    def category_counts(self, group, category, source=None, table='mentions'):
+        """
+        Matching reviews per star rating for one category.
+        table is 'mentions' (substring match), 'affirmed' or 'negated'.
+        """
+        by_source = getattr(self, table)[group][category]
+        if source is not None:
+            return np.array(by_source.get(source, _empty_ratings()))
+        return np.sum([_empty_ratings()] + list(by_source.values()), axis=0, dtype=np.int64)
+
+    def example_pool(self, group, category, buckets=('low', 'mid', 'high')):
+        """Sampled matching reviews of the given rating buckets, overall and per app"""
+        overall = []
+        by_app = {}
+        for bucket in buckets:
+            overall.extend(self.reservoirs[group][category].get(bucket, {}).get("items", []))
+            for app, reservoir in self.app_reservoirs[group][category].get(bucket, {}).items():
+                by_app.setdefault(app, []).extend(reservoir["items"])
+        return overall, by_app
+
+    def idf(self, vocab):
+        """Corpus-wide smooth idf for the given terms (as in TokenStore.tfidf_matrix)"""
+        df = np.array([self.document_frequencies.get(term, 0) for term in vocab], dtype=np.float64)
+        return np.log((1 + self.n_reviews) / (1 + df)) + 1
+
+    def top_words(self, bucket, n=50, stop_words=()):
+        counts = self.word_counts[bucket]
+        return [(w, c) for w, c in counts.most_common(n + len(stop_words)) if w not in stop_words][:n]
+
+    # ------------------------------------------------------------------
+    # Persistence
+    # ------------------------------------------------------------------
+
+    def save(self, path):
+        """Atomically write the state as gzipped JSON"""
+        payload = {
+            "version": STATE_VERSION,
+            "keyword_groups": self.keyword_groups,
+            "negation": self.negation,
+            "reservoir_size": self.reservoir_size,
+            "app_reservoir_size": self.app_reservoir_size,
+            "rng": self.rng.bit_generator.state,
+            "n_reviews": self.n_reviews,
+            "ingested": self.ingested,
+            "rating_counts": self.rating_counts,
+            "app_rating_counts": self.app_rating_counts,
+            "mentions": self.mentions,
+            "affirmed": self.affirmed,
+            "negated": self.negated,
+            "reservoirs": self.reservoirs,
+            "app_reservoirs": self.app_reservoirs,
+            "word_counts": {bucket: dict(c) for bucket, c in self.word_counts.items()},
+            "document_frequencies": dict(self.document_frequencies)
+        }
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        with gzip.open(os.fdopen(fd, 'wb'), 'wt', encoding='utf-8') as f:
+            json.dump(payload, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            payload = json.load(f)
+        if payload.get("version") != STATE_VERSION:
+            raise ValueError(f"Unsupported review state version in {path}; rebuild the state")
+
+        state = cls(payload["keyword_groups"], negation=payload["negation"],
+                    reservoir_size=payload["reservoir_size"],
+                    app_reservoir_size=payload["app_reservoir_size"])
+        state.rng.bit_generator.state = payload["rng"]
+        for name in ("n_reviews", "ingested", "rating_counts", "app_rating_counts", "mentions",
+                     "affirmed", "negated", "reservoirs", "app_reservoirs"):
+            setattr(state, name, payload[name])
+        state.word_counts = {bucket: Counter(c) for bucket, c in payload["word_counts"].items()}
+        state.document_frequencies = Counter(payload["document_frequencies"])
+        return state
+
+    @classmethod
+    def open(cls, path, keyword_groups, negation=False):
+        """
+        Load the state at path, or start an empty one if there is none yet.
+        A state built with different keywords cannot be extended and is rejected.
+        """
+        if not os.path.exists(path):
+            return cls(keyword_groups, negation=negation)
+        state = cls.load(path)
+        if state.config_key != cls.config_key_for(keyword_groups, negation):
+            raise ValueError(f"{path} was built with a different keyword config; "
+                             "delete it to rebuild from all review files")
+        return state
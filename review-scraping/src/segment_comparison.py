@@ -0,0 +1,66 @@
+"""
+Segment Comparison
+Weighted log-odds with an informative Dirichlet prior (Monroe et al., 2008)
+"""
+
+import numpy as np
+
+
+def weighted_log_odds(counts_a, counts_b, prior_counts=None, prior_strength=None):
+    """
+    Log-odds ratio of every term between two segments, shrunk toward a prior.
+
+    counts_a / counts_b are term-count vectors over the same vocabulary.
+    The prior defaults to the pooled counts of both segments, scaled so its
+    total equals prior_strength (default: the mean segment size). Returns
+    (delta, z): delta > 0 means the term is more typical of segment A, and z
+    is delta divided by its estimated standard deviation.
+    """
+    y_a = np.asarray(counts_a, dtype=np.float64)
+    y_b = np.asarray(counts_b, dtype=np.float64)
+    if prior_counts is None:
+        prior_counts = y_a + y_b
+    prior = np.asarray(prior_counts, dtype=np.float64)
+
+    n_a, n_b = y_a.sum(), y_b.sum()
+    if prior_strength is None:
+        prior_strength = (n_a + n_b) / 2
+    alpha = prior / max(prior.sum(), 1.0) * prior_strength
+    # Terms missing from the prior still need a positive pseudo-count
+    alpha = np.maximum(alpha, 1e-3)
+    alpha_0 = alpha.sum()
+
+    delta = (np.log(y_a + alpha) - np.log(n_a + alpha_0 - y_a - alpha)
+             - np.log(y_b + alpha) + np.log(n_b + alpha_0 - y_b - alpha))
+    variance = 1.0 / (y_a + alpha) + 1.0 / (y_b + alpha)
+    return delta, delta / np.sqrt(variance)
+
+
+def distinctive_terms(vocab, counts_a, counts_b, top_n=30, min_count=1, term_mask=None, **prior):
+    """
+    Rank the most distinctive terms of each side by z-score.
+
+    term_mask optionally excludes vocabulary entries (e.g. stop words) from
+    the ranking; they still count toward segment totals. Returns
+    {"a": [...], "b": [...]} with one dict per term.
+    """
+    counts_a = np.asarray(counts_a)
+    counts_b = np.asarray(counts_b)
+    delta, z = weighted_log_odds(counts_a, counts_b, **prior)
+
+    eligible = (counts_a + counts_b) >= min_count
+    if term_mask is not None:
+        eligible &= term_mask
+
+    def ranked(order):
+        return [{
+            "term": vocab[i],
+            "count_a": int(counts_a[i]),
+            "count_b": int(counts_b[i]),
+            "log_odds": round(float(delta[i]), 4),
+            "z_score": round(float(z[i]), 3)
+        } for i in order[:top_n]]
+
+    candidates = np.flatnonzero(eligible)
+    by_z = candidates[np.argsort(z[candidates], kind='stable')]
+    return {"a": ranked(by_z[::-1]), "b": ranked(by_z)}
@@ -0,0 +1,173 @@
+"""
+Similar Review Search
+LSA embeddings in a float16 memory-mapped array with an IVF nearest-neighbor index
+"""
+
+import hashlib
+import json
+import os
+import pickle
+
+import numpy as np
+
+
+EMBEDDINGS_FILE = 'embeddings.f16'
+ASSIGNMENTS_FILE = 'assignments.i32'
+CENTROIDS_FILE = 'centroids.npy'
+MODEL_FILE = 'model.pkl'
+META_FILE = 'meta.json'
+
+
+def texts_digest(texts):
+    """Content fingerprint of the indexed texts, in order (stored in the index metadata)"""
+    digest = hashlib.sha1()
+    for text in texts:
+        digest.update(str(text).encode('utf-8'))
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+def _normalize_rows(matrix):
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1
+    return matrix / norms
+
+
+class SimilarReviewIndex:
+    """
+    "More like this" search over review texts, CPU only.
+
+    Reviews are embedded with TF-IDF + TruncatedSVD (LSA) and stored as unit
+    vectors in a float16 memmap. An inverted-file (IVF) index clusters the
+    vectors with k-means; a query only scores the members of its `nprobe`
+    closest clusters. Rows are numbered in insertion order, so row i is the
+    i-th review passed to build() / add(); the metadata keeps a digest of
+    those texts so a caller can tell whether the index still matches its data.
+    """
+
+    def __init__(self, index_dir):
+        self.index_dir = index_dir
+        with open(os.path.join(index_dir, META_FILE)) as f:
+            self.meta = json.load(f)
+        with open(os.path.join(index_dir, MODEL_FILE), 'rb') as f:
+            self.vectorizer, self.svd = pickle.load(f)
+        self.centroids = np.load(os.path.join(index_dir, CENTROIDS_FILE))
+        self._open_arrays()
+
+    def _open_arrays(self):
+        n, dim = self.meta['n_reviews'], self.meta['dim']
+        if n == 0:
+            # np.memmap cannot map an empty file
+            self.embeddings = np.zeros((0, dim), dtype=np.float16)
+        else:
+            self.embeddings = np.memmap(os.path.join(self.index_dir, EMBEDDINGS_FILE),
+                                        dtype=np.float16, mode='r', shape=(n, dim))
+        assignments = np.fromfile(os.path.join(self.index_dir, ASSIGNMENTS_FILE), dtype=np.int32)
+
+        # Inverted lists as CSR: members of list c are list_members[list_offsets[c]:list_offsets[c+1]]
+        self.list_members = np.argsort(assignments, kind='stable').astype(np.int32)
+        counts = np.bincount(assignments, minlength=len(self.centroids))
+        self.list_offsets = np.zeros(len(self.centroids) + 1, dtype=np.int64)
+        np.cumsum(counts, out=self.list_offsets[1:])
+
+    def __len__(self):
+        return self.meta['n_reviews']
+
+    @classmethod
+    def build(cls, texts, index_dir, n_components=128, n_lists=None,
+              train_size=50000, batch_size=20000, seed=0):
+        """Fit TF-IDF, LSA and the IVF clustering, then index all texts"""
+        from sklearn.feature_extraction.text import TfidfVectorizer
+        from sklearn.decomposition import TruncatedSVD
+        from sklearn.cluster import MiniBatchKMeans
+
+        texts = [str(t) for t in texts]
+        os.makedirs(index_dir, exist_ok=True)
+
+        vectorizer = TfidfVectorizer(stop_words='english', min_df=2, max_df=0.5,
+                                     sublinear_tf=True, dtype=np.float32)
+        tfidf = vectorizer.fit_transform(texts)
+        n_components = min(n_components, tfidf.shape[1] - 1)
+        svd = TruncatedSVD(n_components=n_components, random_state=seed).fit(tfidf)
+
+        rng = np.random.default_rng(seed)
+        sample = rng.choice(len(texts), size=min(train_size, len(texts)), replace=False)
+        sample_vectors = _normalize_rows(svd.transform(tfidf[sample]))
+        if n_lists is None:
+            n_lists = max(1, int(np.sqrt(len(texts))))
+        n_lists = min(n_lists, len(sample))
+        kmeans = MiniBatchKMeans(n_clusters=n_lists, random_state=seed, n_init=3,
+                                 batch_size=4096).fit(sample_vectors)
+        centroids = _normalize_rows(kmeans.cluster_centers_).astype(np.float32)
+
+        with open(os.path.join(index_dir, MODEL_FILE), 'wb') as f:
+            pickle.dump((vectorizer, svd), f)
+        np.save(os.path.join(index_dir, CENTROIDS_FILE), centroids)
+        for name in (EMBEDDINGS_FILE, ASSIGNMENTS_FILE):
+            open(os.path.join(index_dir, name), 'wb').close()
+        with open(os.path.join(index_dir, META_FILE), 'w') as f:
+            json.dump({'n_reviews': 0, 'dim': int(n_components), 'n_lists': int(n_lists)}, f)
+
+        index = cls(index_dir)
+        index.add(texts, batch_size=batch_size, _tfidf=tfidf, digest=texts_digest(texts))
+        return index
+
+    def embed(self, texts=None, _tfidf=None):
+        """Unit-length LSA vectors for new texts (float32)"""
+        tfidf = _tfidf if _tfidf is not None else self.vectorizer.transform([str(t) for t in texts])
+        return _normalize_rows(self.svd.transform(tfidf)).astype(np.float32)
+
+    def add(self, texts, batch_size=20000, _tfidf=None, digest=None):
+        """
+        Append new reviews without refitting: embed them with the frozen model,
+        assign each to its nearest IVF list and append to the on-disk arrays.
+        digest is the texts_digest() of every indexed text after the append.
+        """
+        n_new = _tfidf.shape[0] if _tfidf is not None else len(texts)
+        with open(os.path.join(self.index_dir, EMBEDDINGS_FILE), 'ab') as emb_file, \
+                open(os.path.join(self.index_dir, ASSIGNMENTS_FILE), 'ab') as assign_file:
+            for start in range(0, n_new, batch_size):
+                stop = min(start + batch_size, n_new)
+                if _tfidf is not None:
+                    vectors = self.embed(_tfidf=_tfidf[start:stop])
+                else:
+                    vectors = self.embed(texts[start:stop])
+                assignments = np.argmax(vectors @ self.centroids.T, axis=1).astype(np.int32)
+                emb_file.write(vectors.astype(np.float16).tobytes())
+                assign_file.write(assignments.tobytes())
+
+        self.meta['n_reviews'] += n_new
+        self.meta['digest'] = digest
+        with open(os.path.join(self.index_dir, META_FILE), 'w') as f:
+            json.dump(self.meta, f)
+        self._open_arrays()
+
+    def search(self, vector, k=50, nprobe=8, exclude=None):
+        """Approximate top-k rows by cosine similarity to a unit query vector"""
+        vector = np.asarray(vector, dtype=np.float32).ravel()
+        centroid_scores = self.centroids @ vector
+        nprobe = min(nprobe, len(self.centroids))
+        probe = np.argpartition(-centroid_scores, nprobe - 1)[:nprobe]
+
+        candidates = np.concatenate([
+            self.list_members[self.list_offsets[c]:self.list_offsets[c + 1]] for c in probe
+        ])
+        if exclude is not None:
+            candidates = candidates[candidates != exclude]
+        if len(candidates) == 0:
+            return []
+
+        scores = self.embeddings[candidates].astype(np.float32) @ vector
+        k = min(k, len(candidates))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind='stable')]
+        return [(int(candidates[i]), float(scores[i])) for i in top]
+
+    def more_like_this(self, row, k=50, nprobe=8):
+        """Reviews most similar to an already-indexed review"""
+        vector = self.embeddings[row].astype(np.float32)
+        return self.search(vector, k=k, nprobe=nprobe, exclude=row)
+
+    def search_text(self, text, k=50, nprobe=8):
+        """Reviews most similar to a free-text complaint"""
+        return self.search(self.embed([text])[0], k=k, nprobe=nprobe)
@@ -0,0 +1,143 @@
+"""
+Spelling Normalization
+SymSpell-style correction of misspelled review tokens against the corpus' own frequent vocabulary
+"""
+
+from collections import defaultdict
+
+
+# Contractions mapped to the apostrophe-free spelling most reviews (and our keyword lists) use
+CONTRACTIONS = {
+    "can't": 'cant', "don't": 'dont', "doesn't": 'doesnt', "didn't": 'didnt', "won't": 'wont',
+    "isn't": 'isnt', "wasn't": 'wasnt', "aren't": 'arent', "weren't": 'werent',
+    "couldn't": 'couldnt', "wouldn't": 'wouldnt', "shouldn't": 'shouldnt',
+    "haven't": 'havent', "hasn't": 'hasnt', "hadn't": 'hadnt', "i'm": 'im', "i've": 'ive',
+    "it's": 'its', "that's": 'thats', "there's": 'theres', "you're": 'youre', "they're": 'theyre'
+}
+
+# review_cleaned drops apostrophes: "doesn't" -> "doesn t"
+SPLIT_CONTRACTIONS = {tuple(c.split("'")): canonical for c, canonical in CONTRACTIONS.items()}
+
+
+def _deletes(word, max_distance):
+    """Every string reachable from word by deleting up to max_distance characters"""
+    result = {word}
+    frontier = {word}
+    for _ in range(max_distance):
+        frontier = {w[:i] + w[i + 1:] for w in frontier if len(w) > 1 for i in range(len(w))}
+        result |= frontier
+    return result
+
+
+def edit_distance(a, b, limit):
+    """Optimal string alignment distance (adjacent swaps count as one edit), capped at limit + 1"""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous2, previous = None, list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = a[i - 1] != b[j - 1]
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if (previous2 is not None and i > 1 and j > 1
+                    and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]):
+                current[j] = min(current[j], previous2[j - 2] + 1)
+        if min(current) > limit:
+            return limit + 1
+        previous2, previous = previous, current
+    return previous[-1]
+
+
+class SpellingNormalizer:
+    """
+    Corrects rare tokens to frequent corpus words within a small edit distance.
+
+    Words seen in at least min_count reviews form the dictionary. Every
+    dictionary word's deletions (up to max_distance, on its first
+    prefix_length characters) are indexed once, so looking a token up only
+    generates the token's own few deletions and checks the words sharing
+    them; no scan over the vocabulary. A token is corrected when it is rare,
+    alphabetic and at least min_length long, and the best candidate (fewest
+    edits, then most frequent) is ratio times more frequent. Results are
+    memoized per token.
+    """
+
+    def __init__(self, counts, min_count=20, max_distance=2, min_length=4, ratio=10, prefix_length=7):
+        self.counts = counts
+        self.min_count = min_count
+        self.max_distance = max_distance
+        self.min_length = min_length
+        self.ratio = ratio
+        self.prefix_length = prefix_length
+        self.memo = dict(CONTRACTIONS)
+
+        self.index = defaultdict(list)
+        for word, count in counts.items():
+            if count >= min_count and word.isalpha():
+                for key in _deletes(word[:prefix_length], max_distance):
+                    self.index[key].append(word)
+
+    def correct(self, token):
+        """Canonical spelling of one token (the token itself when nothing better is found)"""
+        corrected = self.memo.get(token)
+        if corrected is None:
+            corrected = self.memo[token] = self._lookup(token)
+        return corrected
+
+    def _lookup(self, token):
+        count = self.counts.get(token, 0)
+        if count >= self.min_count or len(token) < self.min_length or not token.isalpha():
+            return token
+        # Short words get one edit: "bug" -> "bag" style corrections are too risky
+        limit = 1 if len(token) <= 5 else self.max_distance
+
+        best, best_key = token, None
+        for key in _deletes(token[:self.prefix_length], limit):
+            for word in self.index.get(key, ()):
+                if self.counts[word] < self.ratio * max(count, 1):
+                    continue
+                distance = edit_distance(token, word, limit)
+                if distance <= limit:
+                    candidate_key = (distance, -self.counts[word], word)
+                    if best_key is None or candidate_key < best_key:
+                        best, best_key = word, candidate_key
+        return best
+
+    def misspellings(self, vocabulary):
+        """{word: [tokens of vocabulary that correct to it]} (a word's corpus misspellings)"""
+        result = defaultdict(list)
+        for token in vocabulary:
+            corrected = self.correct(token)
+            if corrected != token:
+                result[corrected].append(token)
+        return dict(result)
+
+
+def corpus_normalizer(texts):
+    """SpellingNormalizer over the token counts of a review corpus, plus its vocabulary"""
+    import numpy as np
+    from token_store import TokenStore
+
+    store = TokenStore.build(texts)
+    counts = np.bincount(store.ids, minlength=store.n_terms)
+    return SpellingNormalizer(dict(zip(store.vocab, counts.tolist()))), store.vocab
+
+
+def keyword_misspellings(keyword_groups, normalizer, vocabulary):
+    """
+    {group: {category: [misspelled variants]}} of single-word keywords: corpus
+    tokens that correct to a word containing the keyword ("subscripton" ->
+    "subscription") but do not contain it themselves, so substring matching
+    misses them.
+    """
+    misspellings = normalizer.misspellings(vocabulary)
+    result = {}
+    for group, categories in keyword_groups.items():
+        for category, keywords in categories.items():
+            variants = sorted({variant
+                               for keyword in keywords if ' ' not in keyword
+                               for word, tokens in misspellings.items() if keyword in word
+                               for variant in tokens if keyword not in variant})
+            if variants:
+                result.setdefault(group, {})[category] = variants
+    return result
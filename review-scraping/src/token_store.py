@@ -0,0 +1,172 @@
+"""
+Token Store
+Tokenizes the review corpus once into compact token-id arrays
+"""
+
+import re
+
+import numpy as np
+
+
+# Words with an optional contraction suffix ("doesn't", "can't")
+TOKEN_PATTERN = re.compile(r"[a-z]+(?:'[a-z]+)?")
+
+
+class TokenStore:
+    """
+    The corpus as one flat int32 array of token ids plus per-review offsets.
+
+    Review i spans ids[offsets[i]:offsets[i + 1]]; vocab[id] is the token text.
+    Every analysis that needs counts, n-grams or a document-term matrix reads
+    from here instead of re-tokenizing review text.
+    """
+
+    def __init__(self, ids, offsets, vocab):
+        self.ids = ids
+        self.offsets = offsets
+        self.vocab = vocab
+        self.vocab_index = {token: i for i, token in enumerate(vocab)}
+        self._doc_term = None
+        self._tfidf = None
+
+    @classmethod
+    def build(cls, texts, normalize=False):
+        """
+        Tokenize an iterable of review texts. With normalize, contractions and
+        misspellings are mapped to their canonical corpus spelling (see
+        spelling.py) once per unique token, not per review.
+        """
+        vocab_index = {}
+        chunks = []
+        lengths = []
+
+        for text in texts:
+            tokens = TOKEN_PATTERN.findall(str(text).lower())
+            chunks.append([vocab_index.setdefault(t, len(vocab_index)) for t in tokens])
+            lengths.append(len(tokens))
+
+        ids = np.fromiter((i for chunk in chunks for i in chunk), dtype=np.int32,
+                          count=sum(lengths))
+        offsets = np.zeros(len(lengths) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+        store = cls(ids, offsets, list(vocab_index))
+        if normalize:
+            from spelling import SpellingNormalizer
+
+            store = store._merge_split_contractions()
+            counts = np.bincount(store.ids, minlength=store.n_terms)
+            store = store.normalized(SpellingNormalizer(dict(zip(store.vocab, counts.tolist()))))
+        return store
+
+    def _merge_split_contractions(self):
+        """Rejoin contractions split by apostrophe stripping ("doesn t" -> "doesnt")"""
+        from spelling import SPLIT_CONTRACTIONS
+
+        ids, vocab = self.ids.copy(), list(self.vocab)
+        vocab_index = dict(self.vocab_index)
+        drop = np.zeros(len(ids), dtype=bool)
+        doc_index = self.doc_index()
+        for (stem, suffix), canonical in SPLIT_CONTRACTIONS.items():
+            if stem not in vocab_index or suffix not in vocab_index:
+                continue
+            first = np.flatnonzero((ids[:-1] == vocab_index[stem]) & (ids[1:] == vocab_index[suffix])
+                                   & (doc_index[:-1] == doc_index[1:]))
+            if len(first):
+                ids[first] = vocab_index.setdefault(canonical, len(vocab))
+                if len(vocab) < len(vocab_index):
+                    vocab.append(canonical)
+                drop[first + 1] = True
+        if not drop.any():
+            return self
+        lengths = self.doc_lengths() - np.bincount(doc_index[drop], minlength=self.n_docs)
+        offsets = np.zeros(self.n_docs + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+        return TokenStore(ids[~drop], offsets, vocab)
+
+    def normalized(self, normalizer):
+        """Copy with every vocabulary entry replaced by normalizer.correct(entry)"""
+        vocab_index = {}
+        mapping = np.array([vocab_index.setdefault(normalizer.correct(token), len(vocab_index))
+                            for token in self.vocab], dtype=np.int32)
+        return TokenStore(mapping[self.ids] if len(self.ids) else self.ids, self.offsets, list(vocab_index))
+
+    @property
+    def n_docs(self):
+        return len(self.offsets) - 1
+
+    @property
+    def n_terms(self):
+        return len(self.vocab)
+
+    def doc_lengths(self):
+        return np.diff(self.offsets)
+
+    def doc_index(self):
+        """Review index of every token position"""
+        return np.repeat(np.arange(self.n_docs, dtype=np.int32), self.doc_lengths())
+
+    def tokens(self, doc):
+        """Token strings of one review"""
+        return [self.vocab[i] for i in self.ids[self.offsets[doc]:self.offsets[doc + 1]]]
+
+    def doc_term_matrix(self):
+        """Sparse reviews x vocabulary count matrix (built once and reused)"""
+        if self._doc_term is None:
+            from scipy.sparse import csr_matrix
+
+            matrix = csr_matrix((np.ones(len(self.ids), dtype=np.int32), self.ids, self.offsets),
+                                shape=(self.n_docs, self.n_terms))
+            matrix.sum_duplicates()
+            self._doc_term = matrix
+        return self._doc_term
+
+    def document_frequencies(self):
+        """Number of reviews containing each term"""
+        return np.bincount(self.doc_term_matrix().indices, minlength=self.n_terms)
+
+    def tfidf_matrix(self, idf=None):
+        """
+        L2-normalized TF-IDF rows (smooth idf, as in sklearn's TfidfTransformer).
+        idf may supply per-vocabulary weights from a larger corpus instead.
+        """
+        if self._tfidf is None:
+            from scipy.sparse import diags
+
+            if idf is None:
+                idf = np.log((1 + self.n_docs) / (1 + self.document_frequencies())) + 1
+            matrix = self.doc_term_matrix().astype(np.float32) @ diags(idf.astype(np.float32))
+            norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+            norms[norms == 0] = 1
+            self._tfidf = (diags(1 / norms) @ matrix).tocsr()
+        return self._tfidf
+
+    def segment_counts(self, segment_codes, n_segments=None):
+        """
+        Term counts for every segment in one sparse product.
+
+        segment_codes assigns each review an integer segment (-1 to skip it);
+        returns an (n_segments, n_terms) array.
+        """
+        from scipy.sparse import csr_matrix
+
+        segment_codes = np.asarray(segment_codes)
+        if n_segments is None:
+            n_segments = int(segment_codes.max()) + 1
+        keep = segment_codes >= 0
+        rows = np.flatnonzero(keep)
+        onehot = csr_matrix((np.ones(len(rows), dtype=np.int32), (segment_codes[keep], rows)),
+                            shape=(n_segments, self.n_docs))
+        return np.asarray((onehot @ self.doc_term_matrix()).todense())
+
+    def term_ids(self, terms):
+        """Ids of the given terms that occur in the vocabulary"""
+        return [self.vocab_index[t] for t in terms if t in self.vocab_index]
+
+    def save(self, path):
+        np.savez(path, ids=self.ids, offsets=self.offsets,
+                 vocab=np.array(self.vocab, dtype=object))
+
+    @classmethod
+    def load(cls, path):
+        data = np.load(path, allow_pickle=True)
+        return cls(data['ids'], data['offsets'], data['vocab'].tolist())
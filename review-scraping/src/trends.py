@@ -0,0 +1,148 @@
+"""
+Trend Analysis
+Category-share time series per app with rolling windows and change-point flags
+"""
+
+import numpy as np
+import pandas as pd
+
+
+# MHARD dates look like "August 17, 2020"
+MHARD_DATE_FORMAT = '%B %d, %Y'
+
+
+def parse_dates(values):
+    """Parse review dates (MHARD format first, anything else pandas understands second)"""
+    values = pd.Series(values)
+    dates = pd.to_datetime(values, format=MHARD_DATE_FORMAT, errors='coerce')
+    missing = dates.isna() & values.notna()
+    if missing.any():
+        dates[missing] = pd.to_datetime(values[missing], errors='coerce', format='mixed')
+    return dates
+
+
+def _rolling_sum(values, window):
+    """Sum over the last `window` buckets along axis 1 (cumulative-sum difference)"""
+    cumulative = np.cumsum(values, axis=1)
+    rolled = cumulative.copy()
+    rolled[:, window:] -= cumulative[:, :-window]
+    return rolled
+
+
+def _shifted(values, shift):
+    """values[:, t - shift] at position t (zeros before the start)"""
+    result = np.zeros_like(values)
+    result[:, shift:] = values[:, :-shift]
+    return result
+
+
+def category_trends(dates, app_codes, n_apps, match_docs, match_categories, n_categories,
+                    freq='M', window=3, z_threshold=3.0, min_reviews=30):
+    """
+    Per-app category shares over time buckets.
+
+    dates / app_codes describe every review; match_docs / match_categories
+    list every (review, category) mention, e.g. AggregateCube.matches.
+    Reviews are bucketed by week ('W') or month ('M') and every series comes
+    out of one pass: each mention gets the integer key (app, bucket,
+    category) and one bincount fills the dense mentions array, so there is
+    no groupby per app or category. Rolling shares pool the last `window`
+    buckets (cumulative-sum differences along the time axis); dates that do
+    not parse are left out.
+
+    A change point is flagged at bucket t when the share in the window
+    ending at t differs from the share in the window before it by more than
+    z_threshold standard errors (two-proportion z-test, both windows with at
+    least min_reviews reviews), keeping only the peak of each flagged run.
+    """
+    dates = pd.Series(dates).reset_index(drop=True)
+    valid = dates.notna().to_numpy()
+    if not valid.any():
+        raise ValueError("No parseable review dates to bucket")
+
+    periods = dates[valid].dt.to_period(freq).array
+    ordinals = periods.asi8
+    first = ordinals.min()
+    n_buckets = int(ordinals.max() - first + 1)
+    buckets = np.full(len(dates), -1, dtype=np.int64)
+    buckets[valid] = ordinals - first
+    # Every bucket between the first and last review, empty ones included
+    labels = [str(p) for p in pd.period_range(start=periods.min(), periods=n_buckets, freq=periods.freq)]
+
+    # Dense (app, bucket) review totals and (app, bucket, category) mentions
+    app_codes = np.asarray(app_codes, dtype=np.int64)
+    cells = app_codes * n_buckets + buckets
+    reviews = np.bincount(cells[valid], minlength=n_apps * n_buckets).reshape(n_apps, n_buckets)
+
+    match_docs = np.asarray(match_docs, dtype=np.int64)
+    match_categories = np.asarray(match_categories, dtype=np.int64)
+    dated = valid[match_docs]
+    keys = cells[match_docs[dated]] * n_categories + match_categories[dated]
+    mentions = np.bincount(keys, minlength=n_apps * n_buckets * n_categories)
+    mentions = mentions.reshape(n_apps, n_buckets, n_categories)
+
+    # Rolling windows for every app and category at once; categories folded into rows
+    window = max(1, min(window, n_buckets))
+    rolled_reviews = _rolling_sum(reviews, window)
+    rolled_mentions = _rolling_sum(mentions.transpose(0, 2, 1).reshape(n_apps * n_categories, n_buckets),
+                                   window).reshape(n_apps, n_categories, n_buckets)
+    after_n = rolled_reviews[:, None, :]
+    before_n = _shifted(rolled_reviews, window)[:, None, :]
+    after_k = rolled_mentions
+    before_k = _shifted(rolled_mentions.reshape(n_apps * n_categories, n_buckets),
+                        window).reshape(n_apps, n_categories, n_buckets)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        after_p = after_k / after_n
+        before_p = before_k / before_n
+        pooled = (after_k + before_k) / (after_n + before_n)
+        se = np.sqrt(pooled * (1 - pooled) * (1 / after_n + 1 / before_n))
+        z = np.where(se > 0, (after_p - before_p) / se, 0.0)
+
+    enough = (after_n >= min_reviews) & (before_n >= min_reviews)
+    z = np.where(enough, z, 0.0)
+    flagged = np.abs(z) >= z_threshold
+    # Peak of each run: |z| at least as large as both neighbours
+    magnitude = np.abs(z)
+    left = np.concatenate([np.zeros_like(magnitude[..., :1]), magnitude[..., :-1]], axis=-1)
+    right = np.concatenate([magnitude[..., 1:], np.zeros_like(magnitude[..., :1])], axis=-1)
+    peaks = flagged & (magnitude >= left) & (magnitude >= right)
+
+    change_points = [{
+        "app": int(app), "category": int(category), "period": labels[t],
+        "direction": "up" if z[app, category, t] > 0 else "down",
+        "share_before": float(before_p[app, category, t]),
+        "share_after": float(after_p[app, category, t]),
+        "z_score": float(z[app, category, t])
+    } for app, category, t in zip(*np.nonzero(peaks))]
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        share = np.where(reviews[:, :, None] > 0, mentions / reviews[:, :, None], np.nan)
+        rolling_share = np.where(after_n > 0, after_k / after_n, np.nan).transpose(0, 2, 1)
+
+    return {
+        "periods": labels,
+        "reviews": reviews,
+        "mentions": mentions,
+        "share": share,
+        "rolling_share": rolling_share,
+        "change_points": change_points
+    }
+
+
+def main():
+    """Usage: trends.py REVIEW_FILE... (prints the monthly pain change points of the top apps)"""
+    import sys
+    from mhard_analyzer import MHARDAnalyzer
+
+    trends = MHARDAnalyzer(sys.argv[1:]).analyze_trends("pain")
+    print(f"📈 {len(trends['periods'])} monthly buckets ({trends['periods'][0]} - {trends['periods'][-1]})")
+    for app, data in trends["apps"].items():
+        for point in data["change_points"]:
+            arrow = "↑" if point["direction"] == "up" else "↓"
+            print(f"  {app} / {point['category']} {point['period']}: {arrow} "
+                  f"{point['share_before']:.1f}% -> {point['share_after']:.1f}% (z={point['z_score']:.1f})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Uncertainty Estimation
+Wilson and multinomial bootstrap confidence intervals for report percentages
+"""
+
+from statistics import NormalDist
+
+import numpy as np
+
+
+def _z_score(confidence):
+    return NormalDist().inv_cdf(0.5 + confidence / 2)
+
+
+def wilson_interval(successes, totals, confidence=0.95):
+    """
+    Wilson score interval for binomial proportions.
+
+    Accepts scalars or arrays; returns (low, high) as proportions in [0, 1].
+    Empty groups (total 0) get the uninformative interval (0, 1).
+    """
+    successes = np.asarray(successes, dtype=float)
+    totals = np.asarray(totals, dtype=float)
+    z = _z_score(confidence)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        p = successes / totals
+        denom = 1 + z ** 2 / totals
+        center = (p + z ** 2 / (2 * totals)) / denom
+        margin = z * np.sqrt(p * (1 - p) / totals + z ** 2 / (4 * totals ** 2)) / denom
+
+    low = np.where(totals > 0, center - margin, 0.0)
+    high = np.where(totals > 0, center + margin, 1.0)
+    return np.clip(low, 0, 1), np.clip(high, 0, 1)
+
+
+def bootstrap_share_intervals(counts, numerator, n_resamples=10000, confidence=0.95, seed=0):
+    """
+    Percentile bootstrap interval for the share of `numerator` columns in count vectors.
+
+    counts has shape (categories, groups), e.g. low/mid/high mentions per feature.
+    Every category is resampled at once with multinomial draws of its own total,
+    so no review text is touched. Returns (low, high) proportions per category.
+    """
+    counts = np.asarray(counts, dtype=np.int64)
+    totals = counts.sum(axis=1)
+    safe_totals = np.maximum(totals, 1)
+    pvals = counts / safe_totals[:, None]
+    pvals[totals == 0] = 1.0 / counts.shape[1]
+
+    rng = np.random.default_rng(seed)
+    draws = rng.multinomial(totals, pvals, size=(n_resamples, len(counts)))
+    shares = draws[..., numerator].reshape(n_resamples, len(counts), -1).sum(axis=2) / safe_totals
+
+    alpha = (1 - confidence) / 2
+    low, high = np.quantile(shares, [alpha, 1 - alpha], axis=0)
+    low = np.where(totals > 0, low, 0.0)
+    high = np.where(totals > 0, high, 1.0)
+    return low, high
+
+
+def as_percent_interval(low, high, ndigits=2):
+    """Convert proportion bounds into a JSON-friendly [low%, high%] list"""
+    return [round(float(low) * 100, ndigits), round(float(high) * 100, ndigits)]
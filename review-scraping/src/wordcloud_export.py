@@ -0,0 +1,218 @@
+"""
+Word Cloud Export
+Precomputes top-k word and phrase frequencies per review segment as compressed JSON shards
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import re
+from datetime import datetime
+
+import numpy as np
+
+from token_store import TokenStore
+from collocations import extract_collocations
+from keyword_discovery import STOP_WORDS
+
+
+MANIFEST_FILE = 'manifest.json'
+
+# Shard file suffix per compression
+EXTENSIONS = {'gzip': '.json.gz', 'brotli': '.json.br'}
+
+
+def _slug(text):
+    return re.sub(r'[^a-z0-9]+', '-', str(text).lower()).strip('-') or 'unnamed'
+
+
+def _compress(data, compression):
+    if compression == 'brotli':
+        import brotli
+        return brotli.compress(data, quality=11)
+    # mtime=0 keeps the bytes identical for identical content
+    return gzip.compress(data, compresslevel=9, mtime=0)
+
+
+def _segments(analyzer):
+    """
+    (key, label, review positions) of every segment: rating bucket, app and
+    keyword category. Category membership comes from the analyzer's cube pass.
+    """
+    df = analyzer.df
+    ratings = df['rating'].to_numpy()
+    segments = [
+        ("rating/low", "1-2 stars", np.flatnonzero(ratings <= 2)),
+        ("rating/mid", "3 stars", np.flatnonzero(ratings == 3)),
+        ("rating/high", "4-5 stars", np.flatnonzero(ratings >= 4))
+    ]
+
+    app_codes = df['app_name'].cat.codes.to_numpy()
+    for code, app in enumerate(df['app_name'].cat.categories):
+        segments.append((f"app/{_slug(app)}", str(app), np.flatnonzero(app_codes == code)))
+
+    for group, categories in analyzer._state_groups().items():
+        for category in categories:
+            docs, _ = analyzer._category_matches(group, category)
+            segments.append((f"category/{group}/{_slug(category)}", category, np.asarray(docs)))
+    return segments
+
+
+def _membership(segments, n_docs):
+    """Sparse segments x reviews 0/1 matrix (a review can be in many segments)"""
+    from scipy.sparse import csr_matrix
+
+    rows = np.concatenate([np.full(len(docs), i) for i, (_, _, docs) in enumerate(segments)])
+    cols = np.concatenate([docs for _, _, docs in segments]).astype(np.int64)
+    return csr_matrix((np.ones(len(rows), dtype=np.int32), (rows, cols)),
+                      shape=(len(segments), n_docs))
+
+
+def _phrase_matrix(store, word_mask, max_phrases=2000, min_count=10):
+    """
+    Reviews x phrases count matrix for the corpus' strongest collocations
+    (by log-likelihood), plus the phrase texts.
+    """
+    from scipy.sparse import csr_matrix
+
+    tables = extract_collocations(store, min_count=min_count, edge_mask=word_mask)
+    ids = store.ids.astype(np.int64)
+    doc_index = store.doc_index()
+    n_terms = store.n_terms
+    rows, cols, texts = [], [], []
+
+    for table in (tables["bigrams"], tables["trigrams"]):
+        length = table["ids"].shape[1]
+        order = np.argsort(-table["llr"], kind='stable')[:max_phrases]
+        phrase_ids = table["ids"][order].astype(np.int64)
+        if len(phrase_ids) == 0 or len(ids) < length:
+            continue
+
+        # Encode each n-gram as one integer key and look corpus positions up by binary search
+        keys = np.zeros(len(phrase_ids), dtype=np.int64)
+        for j in range(length):
+            keys = keys * n_terms + phrase_ids[:, j]
+        sort = np.argsort(keys)
+        keys = keys[sort]
+
+        starts = np.arange(len(ids) - length + 1)
+        starts = starts[doc_index[starts] == doc_index[starts + length - 1]]
+        position_keys = np.zeros(len(starts), dtype=np.int64)
+        for j in range(length):
+            position_keys = position_keys * n_terms + ids[starts + j]
+        rank = np.minimum(np.searchsorted(keys, position_keys), len(keys) - 1)
+        found = keys[rank] == position_keys
+
+        rows.append(doc_index[starts[found]])
+        cols.append(len(texts) + sort[rank[found]])
+        texts.extend(' '.join(store.vocab[i] for i in phrase) for phrase in phrase_ids)
+
+    if not texts:
+        return csr_matrix((store.n_docs, 0), dtype=np.int32), []
+    rows, cols = np.concatenate(rows), np.concatenate(cols)
+    matrix = csr_matrix((np.ones(len(rows), dtype=np.int32), (rows, cols)),
+                        shape=(store.n_docs, len(texts)))
+    matrix.sum_duplicates()
+    return matrix, texts
+
+
+def _top_entries(row, labels, k, mask=None):
+    """Top-k {text, value} entries of one sparse count row"""
+    indices, values = row.indices, row.data
+    if mask is not None:
+        keep = mask[indices]
+        indices, values = indices[keep], values[keep]
+    if len(values) > k:
+        top = np.argpartition(-values, k - 1)[:k]
+        indices, values = indices[top], values[top]
+    order = np.lexsort((indices, -values))
+    return [{"text": labels[indices[i]], "value": int(values[i])} for i in order]
+
+
+def export_word_clouds(analyzer, out_dir, top_k=100, top_phrases=30, compression='gzip'):
+    """
+    Write one compressed {text, value} shard per segment plus a manifest.
+
+    All segments are counted with two sparse products (segments x reviews
+    times reviews x words / phrases) over a single tokenization. Every export
+    recomputes these counts over the whole corpus; only the writes are
+    incremental: a shard file is rewritten when its content hash changed, so
+    after new reviews arrive unchanged segments keep their files (and their
+    HTTP caches), and shards of segments that disappeared are removed. brotli shards have to be served with
+    Content-Encoding: br, since the frontend loader cannot inflate them itself.
+    """
+    df = analyzer.df
+    store = TokenStore.build(df['review_cleaned'].fillna(''), normalize=True)
+    # Same word filter as KeywordDiscovery.extract_frequent_words
+    word_mask = np.array([len(t) >= 3 and t.isalpha() and t not in STOP_WORDS for t in store.vocab])
+    phrases, phrase_texts = _phrase_matrix(store, word_mask)
+
+    segments = _segments(analyzer)
+    membership = _membership(segments, store.n_docs)
+    word_counts = (membership @ store.doc_term_matrix()).tocsr()
+    phrase_counts = (membership @ phrases).tocsr()
+
+    manifest_path = os.path.join(out_dir, MANIFEST_FILE)
+    try:
+        with open(manifest_path) as f:
+            previous = json.load(f).get("segments", {})
+    except (FileNotFoundError, json.JSONDecodeError):
+        previous = {}
+
+    extension = EXTENSIONS[compression]
+    entries = {}
+    written = 0
+    for i, (key, label, docs) in enumerate(segments):
+        payload = {
+            "segment": key,
+            "label": label,
+            "reviews": int(len(docs)),
+            "words": _top_entries(word_counts[i], store.vocab, top_k, word_mask),
+            "phrases": _top_entries(phrase_counts[i], phrase_texts, top_phrases)
+        }
+        data = json.dumps(payload, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+        digest = hashlib.sha1(data).hexdigest()
+        file_name = key + extension
+        path = os.path.join(out_dir, file_name)
+
+        old = previous.get(key)
+        if not (old and old["hash"] == digest and old["file"] == file_name and os.path.exists(path)):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'wb') as f:
+                f.write(_compress(data, compression))
+            written += 1
+
+        entries[key] = {"file": file_name, "label": label, "reviews": int(len(docs)),
+                        "hash": digest, "bytes": os.path.getsize(path)}
+
+    for key, old in previous.items():
+        if key not in entries and os.path.exists(os.path.join(out_dir, old["file"])):
+            os.remove(os.path.join(out_dir, old["file"]))
+
+    manifest = {
+        "generated_at": datetime.now().isoformat(),
+        "compression": compression,
+        "top_k": top_k,
+        "top_phrases": top_phrases,
+        "segments": entries
+    }
+    with open(manifest_path, 'w') as f:
+        json.dump(manifest, f, indent=1, ensure_ascii=False)
+
+    print(f"☁️  Word clouds: {len(entries)} segments, {written} shards rewritten -> {out_dir}")
+    return manifest
+
+
+def main():
+    """Usage: wordcloud_export.py OUT_DIR REVIEW_FILE..."""
+    import sys
+    from mhard_analyzer import MHARDAnalyzer
+
+    out_dir, paths = sys.argv[1], sys.argv[2:]
+    cache_dir = os.path.join(os.path.dirname(os.path.abspath(paths[0])), '.analysis_cache')
+    export_word_clouds(MHARDAnalyzer(paths, cache_dir=cache_dir), out_dir)
+
+
+if __name__ == "__main__":
+    main()
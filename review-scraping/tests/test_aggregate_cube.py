@@ -0,0 +1,38 @@
+import pandas as pd
+
+from aggregate_cube import AggregateCube
+from negation import NegationMatcher
+
+
+GROUPS = {"pain": {"bugs": ["crash", "not working"]}, "mental_health": {"improvement": ["helped"]}}
+
+
+def _reviews():
+    texts = ["keeps crashing", "it never helped", "not working, never crashed", "helped a lot",
+             "crashed. not working", "nothing helped but it helped today", "fine"]
+    return pd.DataFrame({"app_name": "calm", "source": "app_store",
+                         "rating": [1 + i % 5 for i in range(len(texts))], "review": texts})
+
+
+def test_negation_backend_feeds_mentions_and_negation_counts():
+    df = _reviews()
+    cube = AggregateCube.build(df, GROUPS, keep_matches=True, backend='negation')
+
+    for group, categories in GROUPS.items():
+        matcher = NegationMatcher(categories)
+        scans = [matcher.scan(review) for review in df['review']]
+        for cat_id, (category, docs, affirmed, negated) in enumerate(cube.negation_counts(group)):
+            affirmed_docs = [doc for doc, (a, _) in enumerate(scans) if cat_id in a]
+            negated_docs = [doc for doc, (_, n) in enumerate(scans) if cat_id in n]
+            assert docs.tolist() == affirmed_docs
+            assert affirmed.sum() == len(affirmed_docs)
+            assert negated.sum() == len(negated_docs)
+            # Mentions are exactly the reviews with an affirmed or a negated match
+            assert cube.mentions(group, categories=[category]).sum() == len(set(affirmed_docs) | set(negated_docs))
+
+
+def test_negated_hits_survive_save_and_load(tmp_path):
+    cube = AggregateCube.build(_reviews(), GROUPS, keep_matches=True, backend='negation')
+    cube.save(tmp_path / "cube.npz")
+    loaded = AggregateCube.load(tmp_path / "cube.npz")
+    assert loaded.negated_hits.tolist() == cube.negated_hits.tolist()
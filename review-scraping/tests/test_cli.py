@@ -0,0 +1,38 @@
+import json
+
+import pandas as pd
+
+import cli
+
+
+def _mhard_csv(path):
+    rows = [{"app_name": app, "rating": rating, "review": text}
+            for app in ("calm", "daylio")
+            for rating, text in [(1, "crashes after the update"), (2, "too expensive"),
+                                 (3, "okay but buggy"), (5, "love the journal")] * 5]
+    pd.DataFrame(rows).to_csv(path, index=False)
+    return str(path)
+
+
+def _query(capsys, *argv):
+    cli.main(["query", *argv])
+    return json.loads(capsys.readouterr().out)
+
+
+def test_query_prints_only_json(tmp_path, capsys):
+    path = _mhard_csv(tmp_path / "reviews.csv")
+    result = _query(capsys, "overview", path, "--no-cache")
+    assert result["total_reviews"] == 40
+
+
+def test_query_misses_when_keyword_config_changes(tmp_path, capsys):
+    path = _mhard_csv(tmp_path / "reviews.csv")
+    cache_dir = str(tmp_path / "cache")
+    before = _query(capsys, "pain_points", path, "--cache-dir", cache_dir)
+
+    keywords = tmp_path / "keywords.json"
+    keywords.write_text(json.dumps({"pain": {"bugs": ["expensive"]}}))
+    cached = _query(capsys, "pain_points", path, "--cache-dir", cache_dir, "--keywords", str(keywords))
+    fresh = _query(capsys, "pain_points", path, "--no-cache", "--keywords", str(keywords))
+    assert cached == fresh
+    assert cached != before
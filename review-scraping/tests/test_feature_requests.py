@@ -0,0 +1,16 @@
+from feature_requests import mine_feature_requests
+
+
+def test_clusters_carry_intervals_and_distinct_examples():
+    reviews = (["please add cloud sync so I can use my tablet too"] * 3
+               + ["wish it had sync between devices, I keep losing entries on my phone",
+                  "would love dark mode", "fine app", None])
+    apps = ["calm", "calm", "calm", "daylio", "daylio", "daylio", "daylio"]
+    result = mine_feature_requests(reviews, apps, n_examples=2)
+
+    sync = result["clusters"][0]
+    assert (sync["head"], sync["reviews"]) == ("sync", 4)
+    low, high = sync["percentage_ci"]
+    assert low < sync["percentage"] < high
+    # The near-duplicate copies are picked once; the second example is the distinct phrasing
+    assert [e["app"] for e in sync["examples"]] in (["calm", "daylio"], ["daylio", "calm"])
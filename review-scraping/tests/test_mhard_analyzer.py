@@ -0,0 +1,36 @@
+import pandas as pd
+
+from mhard_analyzer import MHARDAnalyzer
+from uncertainty import wilson_interval, as_percent_interval
+
+
+def _analyzer(tmp_path):
+    rows = [{"app_name": app, "rating": rating, "review": text}
+            for app, n in (("calm", 6), ("daylio", 3))
+            for rating, text in [(1, "it never helped and it crashes"), (2, "keeps crashing"),
+                                 (5, "really helped with my anxiety"), (4, "love the journal")] * n]
+    path = tmp_path / "reviews.csv"
+    pd.DataFrame(rows).to_csv(path, index=False)
+    return MHARDAnalyzer(str(path), negation_aware=True)
+
+
+def test_negated_share_intervals(tmp_path):
+    results = _analyzer(tmp_path).analyze_negation("mental_health")
+
+    improvement = results["improvement"]
+    assert (improvement["affirmed_mentions"], improvement["negated_mentions"]) == (9, 9)
+    low, high = wilson_interval(9, 18)
+    assert improvement["negated_share_ci"] == as_percent_interval(low, high)
+    assert low * 100 < improvement["negated_share"] < high * 100
+    assert results["therapy"]["negated_share_ci"] == [0.0, 100.0]
+
+
+def test_category_profile_intervals(tmp_path):
+    profile = _analyzer(tmp_path).category_profile("pain", ratings=(1, 2))
+
+    daylio = profile["daylio"]
+    assert daylio["reviews"] == 6 and daylio["shares"]["bugs"] == 100.0
+    low, high = wilson_interval(6, 6)
+    assert daylio["shares_ci"]["bugs"] == as_percent_interval(low, high)
+    assert set(daylio["shares_ci"]) == set(daylio["shares"])
+    assert all(lo <= daylio["shares"][c] <= hi for c, (lo, hi) in daylio["shares_ci"].items())
@@ -0,0 +1,17 @@
+from negation import NegationMatcher
+
+
+def test_keyword_starting_with_a_cue():
+    matcher = NegationMatcher({"bugs": ["bug", "not working"], "improvement": ["helped"]})
+
+    assert matcher.scan("the app is not working") == ({0}, set())
+    assert matcher.scan("it never helped, still not working") == ({0}, {1})
+    assert matcher.count("not working. not working!") == ([2, 0], [0, 0], 4)
+
+
+def test_negation_scope():
+    matcher = NegationMatcher({"improvement": ["helped"]})
+
+    assert matcher.scan("this never really helped me") == (set(), {0})
+    assert matcher.scan("not great but it helped") == ({0}, set())
+    assert matcher.scan("not great. helped though") == ({0}, set())
@@ -0,0 +1,62 @@
+import json
+
+import pandas as pd
+import pytest
+
+from review_state import ReviewState
+
+
+GROUPS = {"pain": {"bugs": ["crash", "not working"], "price": ["expensive", "subscription"]}}
+
+
+def _rows(n, offset=0):
+    texts = ["keeps crashing", "too expensive", "not working at all", "love it", "fine, nothing special"]
+    return [{"app_name": "calm", "rating": 1 + (i % 5), "review": texts[(i + offset) % 5]} for i in range(n)]
+
+
+def _counts(state):
+    return state.rating_counts, state.mentions, state.n_reviews
+
+
+def test_appended_csv_reads_only_the_tail(tmp_path):
+    path = tmp_path / "reviews.csv"
+    pd.DataFrame(_rows(20)).to_csv(path, index=False)
+    state = ReviewState(GROUPS)
+    assert state.ingest(str(path)) == 20
+    assert state.ingest(str(path)) == 0
+
+    pd.DataFrame(_rows(7, offset=2)).to_csv(path, mode='a', header=False, index=False)
+    assert state.ingest(str(path)) == 7
+
+    fresh = ReviewState(GROUPS)
+    fresh.ingest(str(path))
+    assert _counts(state) == _counts(fresh)
+
+
+def test_rewritten_csv_is_rejected(tmp_path):
+    path = tmp_path / "reviews.csv"
+    pd.DataFrame(_rows(20)).to_csv(path, index=False)
+    state = ReviewState(GROUPS)
+    state.ingest(str(path))
+
+    pd.DataFrame(_rows(25, offset=1)).to_csv(path, index=False)
+    with pytest.raises(ValueError, match="rewritten"):
+        state.ingest(str(path))
+
+
+def test_json_rows_are_checked(tmp_path):
+    path = tmp_path / "reviews.json"
+
+    def write(rows):
+        reviews = [{"rating": r["rating"], "date": "2 weeks ago", "text": r["review"]} for r in rows]
+        path.write_text(json.dumps({"location": {"name": "calm"}, "reviews": reviews}))
+
+    write(_rows(10))
+    state = ReviewState(GROUPS)
+    state.ingest(str(path))
+    write(_rows(10) + _rows(4))
+    assert state.ingest(str(path)) == 4
+
+    write(_rows(14, offset=3))
+    with pytest.raises(ValueError, match="rewritten"):
+        state.ingest(str(path))
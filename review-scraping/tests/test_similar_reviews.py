@@ -0,0 +1,31 @@
+import pandas as pd
+
+from mhard_analyzer import MHARDAnalyzer
+
+
+TEXTS = ["app crashes when I sync my journal", "sync keeps failing after the update",
+         "love the mood tracking charts", "mood charts are great for therapy",
+         "too expensive for a journal app", "subscription price is too high"]
+
+
+def _csv(path, texts):
+    pd.DataFrame({"app_name": "calm", "rating": 3, "review": texts}).to_csv(path, index=False)
+    return str(path)
+
+
+def test_index_is_rebuilt_for_other_data_and_extended_for_appends(tmp_path):
+    index_dir = str(tmp_path / "index")
+    path = _csv(tmp_path / "a.csv", TEXTS * 3)
+    MHARDAnalyzer(path).build_similarity_index(index_dir)
+
+    # Same length, different reviews: the stale rows must not be reused
+    other = _csv(tmp_path / "b.csv", list(reversed(TEXTS * 3)))
+    analyzer = MHARDAnalyzer(other)
+    index = analyzer.build_similarity_index(index_dir)
+    assert len(index) == 18
+    assert analyzer.find_similar_reviews("subscription price", k=1)[0]["review"] == TEXTS[-1]
+
+    # Appended reviews are added to the existing index
+    _csv(tmp_path / "b.csv", list(reversed(TEXTS * 3)) + TEXTS)
+    index = MHARDAnalyzer(other).build_similarity_index(index_dir)
+    assert len(index) == 24
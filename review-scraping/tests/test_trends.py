@@ -0,0 +1,38 @@
+import json
+
+import pandas as pd
+
+from mhard_analyzer import MHARDAnalyzer
+
+
+REVIEWS = [
+    (1, "keeps crashing, not working after the update"),
+    (2, "too expensive, the subscription is a scam"),
+    (3, "decent but I wish it had more themes"),
+    (4, "helped my anxiety, love the mood tracking"),
+    (5, "great journal, helped me cope with stress"),
+]
+
+
+def _undated_mhard_csv(path):
+    rows = [{"app_name": app, "rating": rating, "review": text}
+            for app in ("calm", "daylio") for rating, text in REVIEWS * 4]
+    pd.DataFrame(rows).to_csv(path, index=False)
+    return str(path)
+
+
+def _relative_date_json(path):
+    reviews = [{"rating": rating, "date": "2 weeks ago", "text": text} for rating, text in REVIEWS * 4]
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({"location": {"name": "Calm Counseling"}, "reviews": reviews}, f)
+    return str(path)
+
+
+def test_report_without_dates(tmp_path):
+    for path in (_undated_mhard_csv(tmp_path / "undated.csv"), _relative_date_json(tmp_path / "gm.json")):
+        output = tmp_path / "report.json"
+        MHARDAnalyzer(path).generate_report(output_path=str(output))
+
+        report = json.loads(output.read_text())
+        assert report["pain_trends"]["periods"] == []
+        assert report["pain_trends"]["apps"] == {}